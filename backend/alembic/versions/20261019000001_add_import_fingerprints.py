@@ -0,0 +1,49 @@
+"""add import fingerprints for idempotent CSV imports
+
+Revision ID: 20261019000001
+Revises: a6c1b6352e60
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "20261019000001"
+down_revision: Union[str, None] = "a6c1b6352e60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transactions",
+        sa.Column("import_fingerprint", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        "uq_transactions_import_fingerprint",
+        "transactions",
+        ["import_fingerprint"],
+        unique=True,
+    )
+
+    op.add_column(
+        "task_results",
+        sa.Column("file_fingerprint", sa.String(length=64), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_task_results_file_fingerprint"),
+        "task_results",
+        ["file_fingerprint"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_task_results_file_fingerprint"), table_name="task_results")
+    op.drop_column("task_results", "file_fingerprint")
+
+    op.drop_index("uq_transactions_import_fingerprint", table_name="transactions")
+    op.drop_column("transactions", "import_fingerprint")
@@ -0,0 +1,55 @@
+"""add sync tombstones and updated_at indexes for the changes feed
+
+Revision ID: 20261019000002
+Revises: 20261019000001
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "20261019000002"
+down_revision: Union[str, None] = "20261019000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SYNC_TABLES = ("transactions", "categories", "budgets", "recurring_transactions")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_tombstones",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("entity_type", sa.String(length=30), nullable=False),
+        sa.Column("entity_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "deleted_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_sync_tombstones_deleted_at_id",
+        "sync_tombstones",
+        ["deleted_at", "id"],
+        unique=False,
+    )
+
+    for table in SYNC_TABLES:
+        op.create_index(
+            f"ix_{table}_updated_at_id", table, ["updated_at", "id"], unique=False
+        )
+
+
+def downgrade() -> None:
+    for table in SYNC_TABLES:
+        op.drop_index(f"ix_{table}_updated_at_id", table_name=table)
+
+    op.drop_index("ix_sync_tombstones_deleted_at_id", table_name="sync_tombstones")
+    op.drop_table("sync_tombstones")
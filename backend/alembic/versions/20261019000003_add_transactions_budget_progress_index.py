@@ -0,0 +1,30 @@
+"""add covering index for budget progress sums
+
+Revision ID: 20261019000003
+Revises: 20261019000002
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "20261019000003"
+down_revision: Union[str, None] = "20261019000002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transactions_category_type_date",
+        "transactions",
+        ["category_id", "type", "transaction_date"],
+        unique=False,
+        postgresql_include=["amount"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transactions_category_type_date", table_name="transactions")
@@ -0,0 +1,88 @@
+"""add budget spend counters and threshold events
+
+Revision ID: 20261019000004
+Revises: 20261019000003
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision: str = "20261019000004"
+down_revision: Union[str, None] = "20261019000003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "budget_spend",
+        sa.Column("budget_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("spent", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["budget_id"], ["budgets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("budget_id"),
+    )
+
+    op.create_table(
+        "budget_threshold_events",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("budget_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("threshold", sa.Integer(), nullable=False),
+        sa.Column("spent", sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column("budget_amount", sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["budget_id"], ["budgets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_budget_threshold_events_created_at",
+        "budget_threshold_events",
+        ["created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_budget_threshold_events_budget_id",
+        "budget_threshold_events",
+        ["budget_id"],
+        unique=False,
+    )
+
+    # Начальные значения счётчиков по уже существующим транзакциям
+    op.execute(
+        """
+        INSERT INTO budget_spend (budget_id, spent)
+        SELECT b.id, COALESCE(SUM(t.amount), 0)
+        FROM budgets b
+        LEFT JOIN transactions t
+          ON t.category_id = b.category_id
+         AND t.type = 'expense'
+         AND t.transaction_date BETWEEN b.start_date AND b.end_date
+        GROUP BY b.id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_budget_threshold_events_budget_id", table_name="budget_threshold_events"
+    )
+    op.drop_index(
+        "ix_budget_threshold_events_created_at", table_name="budget_threshold_events"
+    )
+    op.drop_table("budget_threshold_events")
+    op.drop_table("budget_spend")
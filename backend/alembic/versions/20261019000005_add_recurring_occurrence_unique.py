@@ -0,0 +1,48 @@
+"""unique generated transaction per recurring template date
+
+Revision ID: 20261019000005
+Revises: 20261019000004
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "20261019000005"
+down_revision: Union[str, None] = "20261019000004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Дубликаты от параллельных запусков: у всех, кроме первой созданной
+    # транзакции на дату шаблона, снимается связь с шаблоном (сами
+    # транзакции сохраняются)
+    op.execute(
+        """
+        UPDATE transactions t
+        SET recurring_template_id = NULL, updated_at = now()
+        FROM (
+            SELECT id,
+                   row_number() OVER (
+                       PARTITION BY recurring_template_id, transaction_date
+                       ORDER BY created_at, id
+                   ) AS rn
+            FROM transactions
+            WHERE recurring_template_id IS NOT NULL
+        ) d
+        WHERE t.id = d.id AND d.rn > 1
+        """
+    )
+    op.create_index(
+        "uq_transactions_recurring_template_date",
+        "transactions",
+        ["recurring_template_id", "transaction_date"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_transactions_recurring_template_date", table_name="transactions")
@@ -0,0 +1,40 @@
+"""cover rate in the exchange rate unique constraint for as-of lookups
+
+Revision ID: 20261019000006
+Revises: 20261019000005
+Create Date: 2026-10-19
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "20261019000006"
+down_revision: Union[str, None] = "20261019000005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Вместо второго индекса по тем же колонкам: индекс уникального
+    # ограничения покрывает rate, и as-of поиск идёт index-only scan
+    op.execute(
+        """
+        ALTER TABLE exchange_rates
+            DROP CONSTRAINT uq_exchange_rate_per_day,
+            ADD CONSTRAINT uq_exchange_rate_per_day
+                UNIQUE (from_currency, to_currency, date) INCLUDE (rate)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        ALTER TABLE exchange_rates
+            DROP CONSTRAINT uq_exchange_rate_per_day,
+            ADD CONSTRAINT uq_exchange_rate_per_day
+                UNIQUE (from_currency, to_currency, date)
+        """
+    )
@@ -3,13 +3,19 @@
 from typing import Annotated
 from datetime import date
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_session
+from app.core.currency_api_client import currency_api_client
+from app.core.database import engine, get_session, pool_status
+from app.repositories.currency import CurrencyRepository
+from app.repositories.exchange_rate import ExchangeRateRepository
 from app.repositories.recurring_transaction import RecurringTransactionRepository
 from app.repositories.category import CategoryRepository
+from app.repositories.task_result import TaskResultRepository
 from app.repositories.transaction import TransactionRepository
+from app.schemas.currency import ExchangeRateBackfillJob, ExchangeRateBackfillRequest
+from app.services.exchange_rate import ExchangeRateService
 from app.services.transaction import TransactionService
 from app.services.recurring_transaction import RecurringTransactionService
 
@@ -28,6 +34,16 @@ async def get_recurring_service(
     )
 
 
+async def get_exchange_rate_service(
+    session: Annotated[AsyncSession, Depends(get_session)]
+) -> ExchangeRateService:
+    return ExchangeRateService(
+        ExchangeRateRepository(session),
+        CurrencyRepository(session),
+        task_result_repo=TaskResultRepository(session),
+    )
+
+
 @router.post(
     "/tasks/run-recurring",
     summary="Принудительный запуск создания повторяющихся транзакций",
@@ -50,3 +66,46 @@ async def run_recurring_task(
         "date": process_date.isoformat(),
         **result,
     }
+
+
+@router.post(
+    "/tasks/backfill-rates",
+    response_model=ExchangeRateBackfillJob,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Загрузка исторических курсов валют",
+    description=(
+        "Фоновая загрузка курсов за период из API курсов на дату или из CSV "
+        "в каталоге EXCHANGE_RATE_BACKFILL_DIR (date,from_currency,to_currency,"
+        "rate). Курсы пишутся пачками через upsert, повторный запуск безопасен. "
+        "Прогресс и итог — /tasks/{task_id}/status."
+    ),
+)
+async def backfill_exchange_rates(
+    body: ExchangeRateBackfillRequest,
+    service: Annotated[ExchangeRateService, Depends(get_exchange_rate_service)],
+):
+    return await service.enqueue_backfill(body)
+
+
+@router.get(
+    "/metrics/currency-api",
+    summary="Метрики клиента API курсов валют",
+)
+async def currency_api_metrics():
+    """
+    Запросы, отказы (после всех повторов), повторы и задержка запросов к
+    API курсов в этом процессе (задержка в секундах, с учётом повторов).
+    """
+    return currency_api_client.metrics.snapshot()
+
+
+@router.get(
+    "/metrics/db-pool",
+    summary="Состояние пула соединений с БД",
+)
+async def db_pool_metrics():
+    """
+    Пул этого процесса: размер, занятые (checked_out) и свободные
+    соединения, текущий и допустимый overflow.
+    """
+    return pool_status(engine)
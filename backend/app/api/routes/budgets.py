@@ -1,9 +1,10 @@
 """API маршруты для бюджетов"""
 
+from datetime import date, datetime
 from typing import Annotated, List
 import uuid
 
-from fastapi import APIRouter, Depends, Response
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_session
@@ -11,7 +12,15 @@ from app.services.budget import BudgetService
 from app.repositories.budget import BudgetRepository
 from app.repositories.category import CategoryRepository
 from app.repositories.transaction import TransactionRepository
-from app.schemas.budget import BudgetCreate, BudgetUpdate, Budget, BudgetProgress
+from app.schemas.budget import (
+    BudgetCreate,
+    BudgetUpdate,
+    Budget,
+    BudgetForecast,
+    BudgetPeriod,
+    BudgetProgress,
+    BudgetThresholdEvent,
+)
 
 
 router = APIRouter(prefix="/budgets", tags=["budgets"])
@@ -52,6 +61,65 @@ async def list_budgets(service: Annotated[BudgetService, Depends(get_budget_serv
     return await service.list_budgets()
 
 
+# Объявлен до /{budget_id}, иначе "progress" разбирался бы как ID
+@router.get(
+    "/progress",
+    response_model=List[BudgetProgress],
+    summary="Прогресс всех бюджетов",
+    description=(
+        "Прогресс всех бюджетов одним запросом; фильтры — бюджеты, активные "
+        "на дату, и период"
+    ),
+)
+async def list_budget_progress(
+    service: Annotated[BudgetService, Depends(get_budget_service)],
+    active_on: date | None = Query(None, description="Бюджеты, активные на дату"),
+    period: BudgetPeriod | None = Query(None),
+):
+    """Получить прогресс всех бюджетов"""
+    return await service.list_budget_progress(active_on, period)
+
+
+@router.get(
+    "/forecast",
+    response_model=List[BudgetForecast],
+    summary="Прогноз всех бюджетов",
+    description=(
+        "Прогноз расходов к концу периода для всех бюджетов по скользящему "
+        "среднему дневных расходов"
+    ),
+)
+async def list_budget_forecasts(
+    service: Annotated[BudgetService, Depends(get_budget_service)],
+    as_of: date | None = Query(
+        None, description="Дата прогноза (по умолчанию сегодня)"
+    ),
+    active_on: date | None = Query(None, description="Бюджеты, активные на дату"),
+    period: BudgetPeriod | None = Query(None),
+):
+    """Получить прогноз расходов всех бюджетов"""
+    return await service.list_budget_forecasts(as_of, active_on, period)
+
+
+@router.get(
+    "/threshold-events",
+    response_model=List[BudgetThresholdEvent],
+    summary="События порогов бюджетов",
+    description=(
+        "События пересечения порогов расходов (BUDGET_ALERT_THRESHOLDS, % от "
+        "суммы бюджета), новые первыми"
+    ),
+)
+async def list_threshold_events(
+    service: Annotated[BudgetService, Depends(get_budget_service)],
+    since: datetime | None = Query(None, description="Только события после метки"),
+    budget_id: uuid.UUID | None = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Получить события пересечения порогов"""
+    return await service.list_threshold_events(since, budget_id, limit)
+
+
 @router.get(
     "/{budget_id}",
     response_model=Budget,
@@ -105,3 +173,23 @@ async def get_budget_progress(
 ):
     """Получить прогресс выполнения бюджета"""
     return await service.get_budget_progress(budget_id)
+
+
+@router.get(
+    "/{budget_id}/forecast",
+    response_model=BudgetForecast,
+    summary="Прогноз бюджета",
+    description=(
+        "Прогноз расходов к концу периода по дневным расходам текущего и "
+        "предыдущего периодов"
+    ),
+)
+async def get_budget_forecast(
+    budget_id: uuid.UUID,
+    service: Annotated[BudgetService, Depends(get_budget_service)],
+    as_of: date | None = Query(
+        None, description="Дата прогноза (по умолчанию сегодня)"
+    ),
+):
+    """Получить прогноз расходов бюджета"""
+    return await service.get_budget_forecast(budget_id, as_of)
@@ -3,19 +3,37 @@
 from datetime import date
 from typing import Annotated
 import uuid
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Header, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_session
 from app.repositories.transaction import TransactionRepository
 from app.repositories.category import CategoryRepository
+from app.repositories.task_result import TaskResultRepository
 from app.services.transaction import TransactionService
 from app.services.csv_import import CSVImportService
-from app.services.csv_export import CSVExportService
+from app.services.csv_export import CSVExportService, DEFAULT_EXPORT_COLUMNS
+from app.services.export_artifacts import (
+    ARTIFACT_MEDIA_TYPES,
+    RangeNotSatisfiable,
+    artifact_filename,
+    iter_file_range,
+    parse_range,
+)
+from app.services.export_formats import (
+    EXPORT_EXTENSIONS,
+    EXPORT_MEDIA_TYPES,
+    ensure_format_available,
+)
 from app.schemas.csv_import import (
+    CSVExportJob,
+    CSVExportRequest,
     CSVImportRequest,
     CSVImportResult,
+    ExportCompression,
+    ExportFormat,
 )
 
 router = APIRouter(prefix="/csv", tags=["csv"])
@@ -27,35 +45,65 @@ async def get_csv_import_service(
     transaction_repo = TransactionRepository(session)
     category_repo = CategoryRepository(session)
     transaction_service = TransactionService(transaction_repo, category_repo)
-    return CSVImportService(transaction_service, category_repo)
+    return CSVImportService(
+        transaction_service, category_repo, TaskResultRepository(session)
+    )
 
 
 async def get_csv_export_service(
     session: Annotated[AsyncSession, Depends(get_session)]
 ) -> CSVExportService:
     transaction_repo = TransactionRepository(session)
-    return CSVExportService(transaction_repo)
+    return CSVExportService(
+        transaction_repo,
+        use_copy=settings.CSV_EXPORT_USE_COPY,
+        task_result_repo=TaskResultRepository(session),
+    )
 
 
 @router.post(
     "/import",
     response_model=CSVImportResult,
     summary="Импорт транзакций из CSV",
-    description="Загрузка CSV с маппингом колонок. При >1000 строк выполняется в фоне.",
+    description=(
+        "Загрузка CSV с маппингом колонок. При >1000 строк выполняется в фоне. "
+        "Уже импортированные строки того же источника пропускаются, "
+        "повторная загрузка того же файла возвращает прежний результат. "
+        "С dry_run=true файл только проверяется: ответ — поток NDJSON "
+        "(ошибки по мере нахождения и итоговая строка summary)."
+    ),
+    responses={200: {"content": {"application/x-ndjson": {}}}},
 )
 async def import_csv(
     body: CSVImportRequest,
     service: Annotated[CSVImportService, Depends(get_csv_import_service)],
-) -> CSVImportResult:
+):
     """Импортировать транзакции из CSV (тело: file_content Base64, mapping, date_format)."""
-    return await service.import_csv(body.file_content, body.mapping, body.date_format)
+    if body.dry_run:
+        return StreamingResponse(
+            service.validate_csv(
+                body.file_content, body.mapping, body.date_format, body.max_errors
+            ),
+            media_type="application/x-ndjson",
+        )
+    return await service.import_csv(
+        body.file_content, body.mapping, body.date_format, body.import_source
+    )
 
 
 @router.get(
     "/export",
-    response_class=Response,
-    summary="Экспорт транзакций в CSV",
-    description="Скачать CSV с выбранными колонками и форматом даты.",
+    response_class=StreamingResponse,
+    summary="Экспорт транзакций",
+    description=(
+        "Скачать CSV с выбранными колонками и форматом даты или типизированный "
+        "файл (format=ndjson|parquet|arrow: Decimal, даты, словарные категории). "
+        "Ответ отдаётся потоково, без ограничения на число строк. "
+        "С async=true экспорт выполняется в фоне в сжатый файл (gzip/zstd): "
+        "ответ 202 с task_id, прогресс — /tasks/{task_id}/status, "
+        "файл — /csv/export/{task_id}/download."
+    ),
+    responses={202: {"model": CSVExportJob}},
 )
 async def export_csv(
     service: Annotated[CSVExportService, Depends(get_csv_export_service)],
@@ -66,27 +114,95 @@ async def export_csv(
         None,
         description="Колонки через запятую: amount,currency,category_name,description,transaction_date,type",
     ),
-    date_format: str = Query("%Y-%m-%d", description="Формат даты"),
+    date_format: str = Query("%Y-%m-%d", description="Формат даты (только CSV)"),
+    export_format: ExportFormat = Query(
+        ExportFormat.CSV, alias="format", description="Формат файла"
+    ),
+    run_async: bool = Query(False, alias="async", description="Фоновый экспорт"),
+    compression: ExportCompression = Query(
+        ExportCompression.GZIP, description="Сжатие файла фонового экспорта"
+    ),
 ):
     """Экспортировать транзакции в CSV."""
     column_list = (
-        [c.strip() for c in columns.split(",")]
-        if columns
-        else [
-            "amount",
-            "currency",
-            "category_name",
-            "description",
-            "transaction_date",
-            "type",
-        ]
-    )
-    content = await service.export_csv(
-        start_date, end_date, category_id, column_list, date_format
+        [c.strip() for c in columns.split(",")] if columns else DEFAULT_EXPORT_COLUMNS
     )
-    filename = f"transactions_{date.today().isoformat()}.csv"
-    return Response(
-        content=content,
-        media_type="text/csv",
+    if run_async:
+        params = CSVExportRequest(
+            start_date=start_date,
+            end_date=end_date,
+            category_id=category_id,
+            columns=column_list,
+            date_format=date_format,
+            format=export_format,
+        )
+        job = await service.enqueue_export(params, compression)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED, content=job.model_dump()
+        )
+
+    ensure_format_available(export_format)
+    extension = EXPORT_EXTENSIONS[export_format]
+    filename = f"transactions_{date.today().isoformat()}.{extension}"
+    return StreamingResponse(
+        service.stream_export(
+            export_format, start_date, end_date, category_id, column_list, date_format
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
+
+
+@router.get(
+    "/export/{task_id}/download",
+    response_class=StreamingResponse,
+    summary="Скачать файл фонового экспорта",
+    description=(
+        "Сжатый CSV завершённого фонового экспорта. Поддерживает Range "
+        "(один диапазон) и If-Range для докачки."
+    ),
+    responses={
+        206: {"description": "Часть файла"},
+        416: {"description": "Диапазон вне файла"},
+    },
+)
+async def download_export(
+    task_id: str,
+    service: Annotated[CSVExportService, Depends(get_csv_export_service)],
+    range_header: str | None = Header(None, alias="Range"),
+    if_range: str | None = Header(None, alias="If-Range"),
+):
+    """Отдать файл экспорта целиком или запрошенный диапазон байт."""
+    path, export_format, compression = await service.get_artifact(task_id)
+    size = path.stat().st_size
+    etag = f'"{task_id}-{size}"'
+    filename = artifact_filename(f"transactions_{task_id}", export_format, compression)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f"attachment; filename={filename}",
+    }
+    # If-Range с другим ETag — файл изменился, отдаём целиком
+    if if_range is not None and if_range != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, size)
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{size}"},
+        )
+
+    status_code = status.HTTP_200_OK
+    start, end = 0, size - 1
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        iter_file_range(path, start, end),
+        status_code=status_code,
+        media_type=ARTIFACT_MEDIA_TYPES[compression],
+        headers=headers,
+    )
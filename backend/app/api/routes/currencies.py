@@ -11,7 +11,14 @@ from app.repositories.currency import CurrencyRepository
 from app.repositories.exchange_rate import ExchangeRateRepository
 from app.services.currency import CurrencyService
 from app.services.exchange_rate import ExchangeRateService
-from app.schemas.currency import Currency, ExchangeRate
+from app.schemas.currency import (
+    ConversionRequest,
+    ConversionResponse,
+    Currency,
+    ExchangeRate,
+    RateLookupRequest,
+    RateLookupResult,
+)
 
 router = APIRouter(prefix="/currencies", tags=["currencies"])
 
@@ -55,3 +62,36 @@ async def get_exchange_rate(
     rate_date: date = Query(..., description="Дата курса"),
 ):
     return await service.get_rate(from_currency, to_currency, rate_date)
+
+
+@router.post(
+    "/convert",
+    response_model=ConversionResponse,
+    summary="Пакетная конвертация сумм",
+    description=(
+        "Конвертация списка сумм (amount, from, to, date) по курсам на даты. "
+        "Результаты — в порядке запроса; позиции без курса содержат error"
+    ),
+)
+async def convert_amounts(
+    data: ConversionRequest,
+    service: Annotated[CurrencyService, Depends(get_currency_service)],
+):
+    return await service.convert_batch(data.items)
+
+
+@router.post(
+    "/rates/as-of",
+    response_model=list[RateLookupResult],
+    summary="Курсы на даты для набора пар",
+    description=(
+        "Курс на дату для каждого ключа (from, to, date) одним запросом к БД: "
+        "последний не позже даты, иначе последний известный; обратные и "
+        "кросс-курсы выводятся из хранимых. Результаты — в порядке ключей"
+    ),
+)
+async def get_rates_as_of(
+    data: RateLookupRequest,
+    service: Annotated[ExchangeRateService, Depends(get_exchange_rate_service)],
+):
+    return await service.get_rates_as_of(data.keys)
@@ -1,5 +1,6 @@
 """API маршруты для шаблонов повторяющихся транзакций"""
 
+from datetime import date
 from typing import Annotated
 import uuid
 
@@ -13,6 +14,7 @@ from app.repositories.transaction import TransactionRepository
 from app.services.transaction import TransactionService
 from app.services.recurring_transaction import RecurringTransactionService
 from app.schemas.recurring_transaction import (
+    CashFlowForecast,
     RecurringTransaction,
     RecurringTransactionCreate,
     RecurringTransactionUpdate,
@@ -61,6 +63,25 @@ async def list_recurring(
     return await service.list_all(skip=skip, limit=limit)
 
 
+@router.get(
+    "/forecast",
+    response_model=CashFlowForecast,
+    response_model_by_alias=True,
+    summary="Прогноз денежного потока",
+    description=(
+        "Доходы, расходы и накопленный баланс по дням и месяцам от всех "
+        "будущих выполнений активных шаблонов в окне [start, until]"
+    ),
+)
+async def forecast_cash_flow(
+    service: Annotated[RecurringTransactionService, Depends(get_recurring_service)],
+    until: date = Query(..., description="Последняя дата прогноза"),
+    start: date | None = Query(None, description="Начало окна (по умолчанию сегодня)"),
+    currency: str = Query("RUB", min_length=3, max_length=3),
+):
+    return await service.forecast(until, start, currency.upper())
+
+
 @router.get(
     "/{recurring_id}",
     response_model=RecurringTransaction,
@@ -0,0 +1,39 @@
+"""API маршруты ленты изменений для синхронизации клиентов"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_session
+from app.repositories.sync import SyncRepository
+from app.schemas.sync import SyncChanges
+from app.services.sync import DEFAULT_SYNC_LIMIT, SyncService
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+async def get_sync_service(
+    session: Annotated[AsyncSession, Depends(get_session)]
+) -> SyncService:
+    """Dependency для получения SyncService"""
+    return SyncService(SyncRepository(session))
+
+
+@router.get(
+    "/changes",
+    response_model=SyncChanges,
+    summary="Лента изменений",
+    description=(
+        "Транзакции, категории, бюджеты и шаблоны повторяющихся транзакций, "
+        "созданные, изменённые или удалённые после токена since. Без since — "
+        "полная выгрузка; next_token из ответа передаётся в следующий запрос."
+    ),
+)
+async def get_changes(
+    service: Annotated[SyncService, Depends(get_sync_service)],
+    since: str | None = Query(None, description="Токен из предыдущего ответа"),
+    limit: int = Query(DEFAULT_SYNC_LIMIT, ge=1, le=1000),
+):
+    """Вернуть страницу изменений после токена"""
+    return await service.get_changes(since, limit)
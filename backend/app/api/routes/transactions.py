@@ -6,14 +6,24 @@ from decimal import Decimal
 import uuid
 
 from fastapi import APIRouter, Depends, Query, UploadFile, File, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_session
 from app.services.transaction import TransactionService
 from app.repositories.transaction import TransactionRepository
 from app.repositories.category import CategoryRepository
 from app.repositories.recurring_transaction import RecurringTransactionRepository
+from app.repositories.task_result import TaskResultRepository
+from app.schemas.csv_import import CSVImportResult
 from app.schemas.transaction import TransactionCreate, TransactionUpdate, Transaction
+from app.services.csv_export import CSVExportService, DEFAULT_EXPORT_COLUMNS
+from app.services.csv_import import (
+    CSVImportService,
+    DEFAULT_IMPORT_SOURCE,
+    TRANSACTIONS_CSV_MAPPING,
+)
 
 
 router = APIRouter(prefix="/transactions", tags=["transactions"])
@@ -29,6 +39,28 @@ async def get_transaction_service(
     return TransactionService(transaction_repo, category_repo, recurring_repo)
 
 
+async def get_csv_export_service(
+    session: Annotated[AsyncSession, Depends(get_session)]
+) -> CSVExportService:
+    """Dependency для получения CSVExportService"""
+    return CSVExportService(
+        TransactionRepository(session), use_copy=settings.CSV_EXPORT_USE_COPY
+    )
+
+
+async def get_csv_import_service(
+    session: Annotated[AsyncSession, Depends(get_session)]
+) -> CSVImportService:
+    """Dependency для получения CSVImportService (общий движок импорта с /csv/import)"""
+    category_repo = CategoryRepository(session)
+    transaction_service = TransactionService(
+        TransactionRepository(session), category_repo
+    )
+    return CSVImportService(
+        transaction_service, category_repo, TaskResultRepository(session)
+    )
+
+
 @router.post(
     "/",
     response_model=Transaction,
@@ -78,38 +110,46 @@ async def list_transactions(
 
 @router.post(
     "/import",
-    response_model=dict,
+    response_model=CSVImportResult,
     summary="Импорт транзакций",
-    description="Импортировать транзакции из CSV файла",
+    description=(
+        "Импортировать транзакции из CSV файла в формате /transactions/export. "
+        "Использует тот же движок, что и /csv/import: при >1000 строк — в фоне."
+    ),
 )
 async def import_transactions(
-    service: Annotated[TransactionService, Depends(get_transaction_service)],
+    service: Annotated[CSVImportService, Depends(get_csv_import_service)],
     file: UploadFile = File(...),
-):
+    import_source: str = Query(
+        DEFAULT_IMPORT_SOURCE,
+        min_length=1,
+        max_length=100,
+        description="Источник импорта: область уникальности строк",
+    ),
+) -> CSVImportResult:
     """Импортировать транзакции из CSV файла"""
-    content = await file.read()
-    csv_content = content.decode("utf-8")
-    return await service.import_from_csv(csv_content)
+    return await service.import_file(
+        file.file, TRANSACTIONS_CSV_MAPPING, "%Y-%m-%d", import_source
+    )
 
 
 @router.get(
     "/export",
-    response_class=Response,
+    response_class=StreamingResponse,
     summary="Экспорт транзакций",
-    description="Экспортировать транзакции в CSV файл",
+    description="Экспортировать транзакции в CSV файл (потоково, без ограничения строк)",
 )
 async def export_transactions(
-    service: Annotated[TransactionService, Depends(get_transaction_service)],
+    service: Annotated[CSVExportService, Depends(get_csv_export_service)],
     start_date: date | None = Query(None),
     end_date: date | None = Query(None),
     category_id: uuid.UUID | None = Query(None),
 ):
     """Экспортировать транзакции в CSV файл"""
-    csv_content = await service.export_to_csv(
-        start_date=start_date, end_date=end_date, category_id=category_id
-    )
-    return Response(
-        content=csv_content,
+    return StreamingResponse(
+        service.stream_csv(
+            start_date, end_date, category_id, DEFAULT_EXPORT_COLUMNS, "%Y-%m-%d"
+        ),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=transactions.csv"},
     )
@@ -4,9 +4,9 @@ import asyncio
 from collections.abc import Coroutine
 from typing import TypeVar
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.core.config import settings
+from app.core.database import build_engine
 
 T = TypeVar("T")
 
@@ -17,10 +17,7 @@ _session_factory = None
 def _get_engine():
     global _engine
     if _engine is None:
-        _engine = create_async_engine(
-            settings.DATABASE_URL,
-            echo=False,
-        )
+        _engine = build_engine()
     return _engine
 
 
@@ -0,0 +1,236 @@
+"""
+Сжатие ответов по Accept-Encoding: gzip, опционально br (пакет brotli)
+и zstd (пакет zstandard).
+
+Потоковые ответы (StreamingResponse) сжимаются поблочно: каждый блок тела
+сжимается и сбрасывается клиенту сразу, весь ответ в памяти не копится.
+"""
+
+import zlib
+from typing import Protocol
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Уже сжатые форматы — повторное сжатие только тратит CPU
+INCOMPRESSIBLE_MEDIA_TYPES = {
+    "application/gzip",
+    "application/zstd",
+    "application/zip",
+    "application/vnd.apache.parquet",
+}
+INCOMPRESSIBLE_MEDIA_PREFIXES = ("image/", "audio/", "video/")
+
+
+class _Encoder(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+    def finish(self) -> bytes: ...
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, level: int):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        import zstandard
+
+        self._flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(self._flush_block)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+ENCODERS: dict[str, type] = {
+    "gzip": _GzipEncoder,
+    "br": _BrotliEncoder,
+    "zstd": _ZstdEncoder,
+}
+_OPTIONAL_MODULES = {"br": "brotli", "zstd": "zstandard"}
+
+
+def available_encodings(preferred: list[str]) -> list[str]:
+    """Известные кодировки из списка (в порядке предпочтения), чьи пакеты установлены."""
+    result = []
+    for encoding in preferred:
+        if encoding not in ENCODERS:
+            continue
+        module = _OPTIONAL_MODULES.get(encoding)
+        if module is not None:
+            try:
+                __import__(module)
+            except ImportError:
+                continue
+        result.append(encoding)
+    return result
+
+
+def negotiate_encoding(accept_encoding: str, available: list[str]) -> str | None:
+    """
+    Выбрать кодировку по Accept-Encoding (с учётом q и «*»). При равном q
+    побеждает порядок available; None — сжимать нельзя.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI-middleware сжатия ответов. Не трогает ответы меньше minimum_size
+    (если размер известен сразу), уже закодированные, частичные (206 /
+    Content-Range), с Cache-Control: no-transform и несжимаемые форматы.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        encodings: list[str] | None = None,
+        levels: dict[str, int] | None = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = available_encodings(encodings or ["gzip"])
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3, **(levels or {})}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(
+            send, encoding, self.levels[encoding], self.minimum_size
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Перехватывает сообщения ответа и сжимает тело по мере поступления."""
+
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message: Message | None = None
+        self.encoder: _Encoder | None = None
+        self.passthrough = False
+
+    def _skip(self, body: bytes, more_body: bool) -> bool:
+        message = self.start_message
+        headers = Headers(raw=message["headers"])
+        media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return (
+            message["status"] in (204, 206, 304)
+            or "content-encoding" in headers
+            or "content-range" in headers
+            or "no-transform" in headers.get("cache-control", "").lower()
+            or media_type in INCOMPRESSIBLE_MEDIA_TYPES
+            or media_type.startswith(INCOMPRESSIBLE_MEDIA_PREFIXES)
+            or (not more_body and len(body) < self.minimum_size)
+        )
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Заголовки отправим с первым блоком тела, когда решим, сжимать ли
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if self.encoder is None:
+            if self._skip(body, more_body):
+                self.passthrough = True
+                await self._send(self.start_message)
+                await self._send(message)
+                return
+            self.encoder = ENCODERS[self.encoding](self.level)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # Байты ответа меняются — сильный ETag становится слабым
+                headers["ETag"] = f"W/{etag}"
+            del headers["content-length"]
+            if not more_body:
+                body = self.encoder.compress(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.start_message)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self.start_message)
+
+        if more_body:
+            chunk = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            chunk = self.encoder.compress(body) + self.encoder.finish()
+        await self._send(
+            {"type": "http.response.body", "body": chunk, "more_body": more_body}
+        )
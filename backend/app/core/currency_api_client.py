@@ -1,14 +1,62 @@
-"""Клиент API курсов валют (exchangerate-api.com или аналог)."""
+"""
+Клиент API курсов валют (exchangerate-api.com или аналог).
 
+Один долгоживущий httpx.AsyncClient на процесс: пул соединений с
+keep-alive вместо TLS-рукопожатия на каждый запрос. Сетевые ошибки,
+429 и 5xx повторяются до max_retries раз с экспоненциальной задержкой и
+случайным разбросом (full jitter); исчерпанные попытки и некорректные
+ответы поднимают CurrencyAPIError. Задержки и отказы копятся в metrics.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date
 import logging
-from typing import Any
+import random
+import time
+from typing import Any, Awaitable, Callable, Iterable
 
 import httpx
 
 from app.core.config import settings
+from app.core.exceptions import CurrencyAPIError
 
 logger = logging.getLogger(__name__)
 
+# Ответы, после которых запрос имеет смысл повторить
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Предел одной задержки между попытками, секунды
+MAX_BACKOFF_SECONDS = 30.0
+
+
+@dataclass
+class CurrencyAPIMetrics:
+    """Счётчики запросов к API курсов с момента старта процесса"""
+
+    requests: int = 0
+    failures: int = 0
+    retries: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    def observe(self, latency: float, failed: bool) -> None:
+        self.requests += 1
+        self.failures += failed
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Счётчики и задержка (с учётом повторов) в секундах"""
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "retries": self.retries,
+            "latency_avg": (
+                self.latency_total / self.requests if self.requests else 0.0
+            ),
+            "latency_max": self.latency_max,
+        }
+
 
 class CurrencyAPIClient:
     """Получение курсов валют через внешний API."""
@@ -17,11 +65,71 @@ class CurrencyAPIClient:
         self,
         base_url: str | None = None,
         api_key: str | None = None,
-        timeout: float = 10.0,
+        timeout: float | None = None,
+        history_url: str | None = None,
+        connect_timeout: float | None = None,
+        max_retries: int | None = None,
+        backoff: float | None = None,
+        max_connections: int | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
     ):
         self.base_url = (base_url or settings.EXCHANGE_RATE_API_BASE).rstrip("/")
         self.api_key = api_key or settings.EXCHANGE_RATE_API_KEY
-        self.timeout = timeout
+        self.timeout = (
+            timeout if timeout is not None else settings.EXCHANGE_RATE_API_TIMEOUT
+        )
+        self.history_url = (
+            history_url or settings.EXCHANGE_RATE_HISTORY_API_BASE
+        ).rstrip("/")
+        self.connect_timeout = (
+            connect_timeout
+            if connect_timeout is not None
+            else settings.EXCHANGE_RATE_API_CONNECT_TIMEOUT
+        )
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else settings.EXCHANGE_RATE_API_MAX_RETRIES
+        )
+        self.backoff = (
+            backoff if backoff is not None else settings.EXCHANGE_RATE_API_BACKOFF
+        )
+        self.max_connections = (
+            max_connections or settings.EXCHANGE_RATE_API_MAX_CONNECTIONS
+        )
+        self.metrics = CurrencyAPIMetrics()
+        # transport — для тестов (httpx.MockTransport как локальная заглушка API)
+        self._transport = transport
+        self._sleep = sleep
+        self._http: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _client(self) -> httpx.AsyncClient:
+        """
+        Пул соединений, созданный в текущем event loop. Celery (run_async)
+        может сменить loop между задачами — тогда пул создаётся заново.
+        """
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._loop is not loop:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self._transport,
+            )
+            self._loop = loop
+        return self._http
+
+    async def aclose(self) -> None:
+        """Закрыть пул соединений (при остановке приложения)."""
+        if self._http is not None and not self._http.is_closed:
+            if self._loop is asyncio.get_running_loop():
+                await self._http.aclose()
+        self._http = None
+        self._loop = None
 
     async def get_latest_rates(self, base_currency: str = "USD") -> dict[str, float]:
         """
@@ -32,17 +140,111 @@ class CurrencyAPIClient:
         params: dict[str, str] = {}
         if self.api_key:
             params["apikey"] = self.api_key
+        data = await self._get_json(url, params)
+        rates = data.get("rates") or data.get("conversion_rates")
+        if not isinstance(rates, dict):
+            raise CurrencyAPIError(f"В ответе API нет курсов для {base_currency}")
+        return _numeric_rates(rates)
 
+    async def get_latest_rates_many(
+        self, base_currencies: Iterable[str]
+    ) -> tuple[dict[str, dict[str, float]], dict[str, str]]:
+        """
+        Курсы для нескольких базовых валют параллельно (в пределах пула).
+        Возвращает курсы по базам и ошибки по базам, которые не удались.
+        """
+        bases = list(dict.fromkeys(base_currencies))
+        results = await asyncio.gather(
+            *(self.get_latest_rates(base) for base in bases), return_exceptions=True
+        )
+        rates: dict[str, dict[str, float]] = {}
+        errors: dict[str, str] = {}
+        for base, result in zip(bases, results):
+            if isinstance(result, CurrencyAPIError):
+                errors[base] = result.message
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                rates[base] = result
+        return rates, errors
+
+    async def get_historical_rates(
+        self, base_currency: str, start: date, end: date
+    ) -> dict[date, dict[str, float]]:
+        """
+        Курсы за период относительно base_currency одним запросом (формат
+        frankfurter.app: GET {history_url}/{start}..{end}?from=USD).
+        Возвращает { date: { "EUR": 0.92, ... } } только за дни с курсами.
+        """
+        url = f"{self.history_url}/{start.isoformat()}..{end.isoformat()}"
+        data = await self._get_json(url, {"from": base_currency})
+        by_day = data.get("rates")
+        if not isinstance(by_day, dict):
+            raise CurrencyAPIError(f"В ответе API нет курсов для {base_currency}")
+        result: dict[date, dict[str, float]] = {}
+        for day, rates in by_day.items():
+            try:
+                rate_date = date.fromisoformat(day)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(rates, dict):
+                result[rate_date] = _numeric_rates(rates)
+        return result
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full jitter: случайная задержка до backoff * 2^(attempt - 1)."""
+        ceiling = min(MAX_BACKOFF_SECONDS, self.backoff * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    async def _get_json(self, url: str, params: dict[str, str]) -> dict[str, Any]:
+        started = time.perf_counter()
+        failed = True
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                resp = await client.get(url, params=params or None)
-                resp.raise_for_status()
-                data: dict[str, Any] = resp.json()
-        except httpx.HTTPError as e:
-            logger.warning("Ошибка запроса курсов валют: %s", e)
-            return {}
+            response = await self._get_with_retries(url, params)
+            try:
+                data = response.json()
+            except ValueError:
+                raise CurrencyAPIError(f"Некорректный JSON от API курсов: {url}")
+            if not isinstance(data, dict):
+                raise CurrencyAPIError(f"Некорректный ответ API курсов: {url}")
+            failed = False
+            return data
+        finally:
+            self.metrics.observe(time.perf_counter() - started, failed)
 
-        rates = data.get("rates") or data.get("conversion_rates")
-        if not isinstance(rates, dict):
-            return {}
-        return {k: float(v) for k, v in rates.items() if isinstance(v, (int, float))}
+    async def _get_with_retries(
+        self, url: str, params: dict[str, str]
+    ) -> httpx.Response:
+        error = ""
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.metrics.retries += 1
+                await self._sleep(self._backoff_delay(attempt))
+            try:
+                response = await self._client().get(url, params=params or None)
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {e}"
+                logger.warning(
+                    "Ошибка запроса курсов валют (попытка %d): %s", attempt + 1, error
+                )
+                continue
+            if response.status_code in RETRY_STATUSES:
+                error = f"HTTP {response.status_code}"
+                logger.warning("API курсов ответил %s (попытка %d)", error, attempt + 1)
+                continue
+            if response.is_error:
+                raise CurrencyAPIError(
+                    f"API курсов ответил HTTP {response.status_code}: {url}"
+                )
+            return response
+        raise CurrencyAPIError(
+            f"API курсов недоступен после {self.max_retries + 1} попыток: {error}"
+        )
+
+
+def _numeric_rates(rates: dict[str, Any]) -> dict[str, float]:
+    return {k: float(v) for k, v in rates.items() if isinstance(v, (int, float))}
+
+
+# Общий клиент процесса (API или воркер)
+currency_api_client = CurrencyAPIClient()
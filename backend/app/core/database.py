@@ -2,9 +2,11 @@
 Database configuration and session management
 """
 
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
+from uuid import uuid4
 
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
@@ -12,12 +14,56 @@ from sqlalchemy.ext.asyncio import (
 
 from app.core.config import settings
 
+
+def _connect_args() -> dict[str, Any]:
+    """Параметры подключения asyncpg: таймауты сервера и кэш выражений."""
+    server_settings = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    if settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS:
+        server_settings["idle_in_transaction_session_timeout"] = str(
+            settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS
+        )
+    args: dict[str, Any] = {
+        "server_settings": server_settings,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+    if not settings.DB_STATEMENT_CACHE_SIZE:
+        # PgBouncer (transaction) отдаёт соединения сервера разным клиентам:
+        # имена подготовленных выражений не должны пересекаться
+        args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    return args
+
+
+def build_engine(url: str | None = None) -> AsyncEngine:
+    """Engine с пулом и таймаутами из настроек (API и Celery-воркер)."""
+    return create_async_engine(
+        url or settings.DATABASE_URL,
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args(),
+    )
+
+
+def pool_status(engine: AsyncEngine) -> dict[str, int]:
+    """Состояние пула: размер, занятые и свободные соединения, overflow."""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
+
+
 # Create async engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    future=True,
-)
+engine = build_engine()
 
 # Create async session maker
 AsyncSessionLocal = async_sessionmaker(
@@ -29,3 +29,10 @@ class ValidationException(AppException):
 
     def __init__(self, message: str):
         super().__init__(message, status_code=422)
+
+
+class CurrencyAPIError(AppException):
+    """Внешний API курсов недоступен или вернул некорректный ответ"""
+
+    def __init__(self, message: str):
+        super().__init__(message, status_code=502)
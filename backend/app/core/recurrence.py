@@ -0,0 +1,211 @@
+"""
+Расписания повторяющихся транзакций — единая точка расчёта дат.
+
+Семантика везде одна: шаг (interval единиц frequency) прибавляется к
+предыдущей дате, как relativedelta, поэтому месячный шаблон с 31-го
+числа идёт 31.01 -> 29.02 -> 29.03 (день — накопленный минимум длин
+месяцев). Точечные расчёты делает ScheduleRule (compile_rule кэширует
+правило на (frequency, interval, anchor)), пакетные — expand_schedules
+матрицей NumPy, SQL (обработка шаблонов) — sql_interval.
+"""
+
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import case, func
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Длина шага в днях и в месяцах по частоте
+_DAY_STEPS = {"daily": 1, "weekly": 7}
+_MONTH_STEPS = {"monthly": 1, "yearly": 12}
+
+# Календарь повторяется каждые 400 лет: дальше минимум длин месяцев не меняется
+_CALENDAR_CYCLE_MONTHS = 400 * 12
+
+
+def _step(frequency: str, interval: int) -> Tuple[int, int]:
+    """Шаг расписания: (дни, месяцы)"""
+    if interval < 1:
+        raise ValueError(f"Недопустимый интервал: {interval}")
+    if frequency in _DAY_STEPS:
+        return _DAY_STEPS[frequency] * interval, 0
+    if frequency in _MONTH_STEPS:
+        return 0, _MONTH_STEPS[frequency] * interval
+    raise ValueError(f"Недопустимая частота: {frequency}")
+
+
+def _month_number(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def _month_length(month_number: int) -> int:
+    return monthrange(month_number // 12, month_number % 12 + 1)[1]
+
+
+@lru_cache(maxsize=65536)
+def _clamped_day(start_month: int, step: int, count: int, anchor_day: int) -> int:
+    """
+    День count-го месячного шага: накопленный минимум дня якоря и длин
+    месяцев start_month + step * i (i = 1..count). Кэшируется — у шаблонов
+    одни и те же якоря, а «зажатие» к концу месяца быстро достигает 28.
+    """
+    day = anchor_day
+    for i in range(1, min(count, _CALENDAR_CYCLE_MONTHS) + 1):
+        day = min(day, _month_length(start_month + step * i))
+        if day <= 28:
+            break
+    return day
+
+
+class ScheduleRule:
+    """Расписание с якорем anchor (первая дата) и шагом interval × frequency"""
+
+    __slots__ = ("frequency", "interval", "anchor", "_days", "_months")
+
+    def __init__(self, frequency: str, interval: int, anchor: date):
+        self.frequency = frequency
+        self.interval = interval
+        self.anchor = anchor
+        self._days, self._months = _step(frequency, interval)
+
+    def __repr__(self) -> str:
+        return (
+            f"<ScheduleRule({self.frequency}, interval={self.interval}, "
+            f"anchor={self.anchor})>"
+        )
+
+    def occurrence(self, index: int) -> date:
+        """Дата выполнения с номером index (0 — якорь)"""
+        if self._days:
+            return self.anchor + timedelta(days=self._days * index)
+        start_month = _month_number(self.anchor)
+        month = start_month + self._months * index
+        day = _clamped_day(start_month, self._months, index, self.anchor.day)
+        return date(month // 12, month % 12 + 1, day)
+
+    def index_after(self, current: date) -> int:
+        """Номер первой даты строго после current"""
+        if current < self.anchor:
+            return 0
+        if self._days:
+            return (current - self.anchor).days // self._days + 1
+        # Оценка по месяцам; день шага не больше дня якоря, поэтому
+        # нужная дата — оценка или следующая за ней
+        index = (_month_number(current) - _month_number(self.anchor)) // self._months
+        while self.occurrence(index) <= current:
+            index += 1
+        return index
+
+    def next_after(self, current: date) -> date:
+        """Первая дата расписания строго после current"""
+        return self.occurrence(self.index_after(current))
+
+    def between(self, start: date, end: date) -> List[date]:
+        """Все даты расписания в [start, end]"""
+        dates = []
+        index = self.index_after(start - timedelta(days=1))
+        while (day := self.occurrence(index)) <= end:
+            dates.append(day)
+            index += 1
+        return dates
+
+
+@lru_cache(maxsize=4096)
+def compile_rule(frequency: str, interval: int, anchor: date) -> ScheduleRule:
+    """Правило расписания (кэшируется на (frequency, interval, anchor))"""
+    return ScheduleRule(frequency, interval, anchor)
+
+
+def sql_interval(frequency, interval):
+    """
+    SQL-шаг расписания для колонок frequency и interval:
+    make_interval(0, месяцы, 0, дни) по тем же таблицам шагов.
+    """
+
+    def units(steps: Dict[str, int]):
+        return case(
+            *((frequency == name, interval * size) for name, size in steps.items()),
+            else_=0,
+        )
+
+    return func.make_interval(0, units(_MONTH_STEPS), 0, units(_DAY_STEPS))
+
+
+def to_datetime64(dates: Sequence[date]) -> np.ndarray:
+    """Массив datetime64[D] из дат (через ordinal — быстрее поэлементного разбора)"""
+    ordinals = np.fromiter((d.toordinal() for d in dates), dtype=np.int64)
+    return (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]")
+
+
+def _expand_days(
+    starts: np.ndarray, bounds: np.ndarray, step: int, lower: np.datetime64
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Даты с шагом в днях: сразу с первого шага не раньше lower"""
+    first = np.maximum(-(-(lower - starts).astype(int) // step), 0)
+    last = (bounds - starts).astype(int) // step
+    counts = np.maximum(last - first + 1, 0)
+    if not counts.any():
+        return np.empty(0, dtype=int), np.empty(0, dtype="datetime64[D]")
+    columns = np.arange(counts.max())
+    mask = columns[None, :] < counts[:, None]
+    steps = (first[:, None] + columns[None, :]) * step
+    dates = starts[:, None] + steps.astype("timedelta64[D]")
+    rows = np.broadcast_to(np.arange(len(starts))[:, None], mask.shape)
+    return rows[mask], dates[mask]
+
+
+def _expand_months(
+    starts: np.ndarray, bounds: np.ndarray, step: int, lower: np.datetime64
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Даты с шагом в месяцах (день зажимается к концу короткого месяца)"""
+    start_months = starts.astype("datetime64[M]")
+    start_days = (starts - start_months.astype("datetime64[D]")).astype(int) + 1
+    spans = (bounds.astype("datetime64[M]") - start_months).astype(int) // step + 1
+    width = int(spans.max(initial=0))
+    if width <= 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype="datetime64[D]")
+    months = start_months[:, None] + (np.arange(width) * step).astype("timedelta64[M]")
+    lengths = (months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")
+    days = np.minimum.accumulate(
+        np.minimum(lengths.astype(int), start_days[:, None]), axis=1
+    )
+    dates = months.astype("datetime64[D]") + (days - 1).astype("timedelta64[D]")
+    mask = (dates >= lower) & (dates <= bounds[:, None])
+    rows = np.broadcast_to(np.arange(len(starts))[:, None], mask.shape)
+    return rows[mask], dates[mask]
+
+
+def expand_schedules(
+    schedules: Sequence[Tuple[str, int, date, date]], lower: date
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Все даты расписаний (frequency, interval, первая дата, последняя
+    допустимая дата) не раньше lower. Возвращает массивы одной длины:
+    индекс расписания во входной последовательности и дату (datetime64[D]).
+    """
+    groups: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+    for index, (frequency, interval, _, _) in enumerate(schedules):
+        groups[(frequency, interval)].append(index)
+
+    lower64 = np.datetime64(lower, "D")
+    all_rows, all_dates = [], []
+    for (frequency, interval), indexes in groups.items():
+        days, months = _step(frequency, interval)
+        positions = np.array(indexes)
+        starts = to_datetime64([schedules[i][2] for i in indexes])
+        bounds = to_datetime64([schedules[i][3] for i in indexes])
+        if days:
+            rows, dates = _expand_days(starts, bounds, days, lower64)
+        else:
+            rows, dates = _expand_months(starts, bounds, months, lower64)
+        all_rows.append(positions[rows])
+        all_dates.append(dates)
+
+    if not all_rows:
+        return np.empty(0, dtype=int), np.empty(0, dtype="datetime64[D]")
+    return np.concatenate(all_rows), np.concatenate(all_dates)
@@ -14,7 +14,10 @@ from alembic import command
 import os
 
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.currency_api_client import currency_api_client
 from app.core.exceptions import AppException
+from app.services.exchange_rate_cache import RedisRateVersion, exchange_rate_cache
 from app.api.routes import (
     categories,
     transactions,
@@ -25,6 +28,7 @@ from app.api.routes import (
     currencies,
     tasks,
     admin,
+    sync,
 )
 from app.api.routes import settings as settings_routes
 
@@ -65,6 +69,9 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Завершение работы приложения")
+    await currency_api_client.aclose()
+    if isinstance(exchange_rate_cache.version, RedisRateVersion):
+        await exchange_rate_cache.version.aclose()
 
 
 app = FastAPI(
@@ -106,6 +113,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Сжатие ответов (gzip/br/zstd по Accept-Encoding, потоковые — поблочно)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        encodings=[e.strip() for e in settings.COMPRESSION_ENCODINGS.split(",")],
+        levels={
+            "gzip": settings.COMPRESSION_GZIP_LEVEL,
+            "br": settings.COMPRESSION_BROTLI_QUALITY,
+            "zstd": settings.COMPRESSION_ZSTD_LEVEL,
+        },
+    )
+
 # Register routers
 app.include_router(categories.router, prefix=settings.API_V1_PREFIX)
 app.include_router(transactions.router, prefix=settings.API_V1_PREFIX)
@@ -117,6 +137,7 @@ app.include_router(currencies.router, prefix=settings.API_V1_PREFIX)
 app.include_router(tasks.router, prefix=settings.API_V1_PREFIX)
 app.include_router(settings_routes.router, prefix=settings.API_V1_PREFIX)
 app.include_router(admin.router, prefix=settings.API_V1_PREFIX)
+app.include_router(sync.router, prefix=settings.API_V1_PREFIX)
 
 
 @app.get("/health", tags=["Health"])
@@ -171,6 +192,9 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         """Recursively convert Decimal objects to strings for JSON serialization"""
         if isinstance(obj, Decimal):
             return str(obj)
+        elif isinstance(obj, Exception):
+            # ctx.error у ошибок из ValueError в валидаторах
+            return str(obj)
         elif isinstance(obj, dict):
             return {k: convert_decimals(v) for k, v in obj.items()}
         elif isinstance(obj, list):
@@ -4,10 +4,13 @@ SQLAlchemy models
 
 from app.models.base import Base
 from app.models.budget import Budget
+from app.models.budget_spend import BudgetSpend
+from app.models.budget_threshold_event import BudgetThresholdEvent
 from app.models.category import Category
 from app.models.currency import Currency
 from app.models.exchange_rate import ExchangeRate
 from app.models.recurring_transaction import RecurringTransaction
+from app.models.sync_tombstone import SyncTombstone
 from app.models.task_result import TaskResult
 from app.models.transaction import Transaction
 from app.models.app_setting import AppSetting
@@ -15,10 +18,13 @@ from app.models.app_setting import AppSetting
 __all__ = [
     "Base",
     "Budget",
+    "BudgetSpend",
+    "BudgetThresholdEvent",
     "Category",
     "Currency",
     "ExchangeRate",
     "RecurringTransaction",
+    "SyncTombstone",
     "TaskResult",
     "Transaction",
     "AppSetting",
@@ -10,6 +10,7 @@ from sqlalchemy import (
     CheckConstraint,
     Date,
     ForeignKey,
+    Index,
     Numeric,
     String,
     UniqueConstraint,
@@ -54,6 +55,8 @@ class Budget(Base, UUIDMixin, TimestampMixin):
         UniqueConstraint(
             "category_id", "period", "start_date", name="uq_budget_category_period"
         ),
+        # Лента изменений /sync/changes
+        Index("ix_budgets_updated_at_id", "updated_at", "id"),
     )
 
     def __repr__(self) -> str:
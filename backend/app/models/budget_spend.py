@@ -0,0 +1,40 @@
+"""
+Модель счётчика расходов бюджета
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import DateTime, ForeignKey, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class BudgetSpend(Base):
+    """
+    Потраченная сумма бюджета, обновляемая инкрементально при записи
+    расходных транзакций (в той же транзакции БД).
+    """
+
+    __tablename__ = "budget_spend"
+
+    budget_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("budgets.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    spent: Mapped[Decimal] = mapped_column(
+        Numeric(precision=12, scale=2), nullable=False, default=0
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<BudgetSpend(budget_id={self.budget_id}, spent={self.spent})>"
@@ -0,0 +1,49 @@
+"""
+Модель события пересечения порога бюджета
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Numeric, func
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, UUIDMixin
+
+
+class BudgetThresholdEvent(Base, UUIDMixin):
+    """
+    Расходы бюджета достигли порога (процент от суммы бюджета). Пишется в
+    момент пересечения снизу вверх, поэтому оповещениям не нужен обход бюджетов.
+    """
+
+    __tablename__ = "budget_threshold_events"
+
+    budget_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("budgets.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    threshold: Mapped[int] = mapped_column(Integer, nullable=False)
+    spent: Mapped[Decimal] = mapped_column(
+        Numeric(precision=12, scale=2), nullable=False
+    )
+    budget_amount: Mapped[Decimal] = mapped_column(
+        Numeric(precision=10, scale=2), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_budget_threshold_events_created_at", "created_at"),
+        Index("ix_budget_threshold_events_budget_id", "budget_id"),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<BudgetThresholdEvent(budget_id={self.budget_id}, "
+            f"threshold={self.threshold})>"
+        )
@@ -4,7 +4,7 @@ Category model
 
 from typing import TYPE_CHECKING
 
-from sqlalchemy import CheckConstraint, String, UniqueConstraint
+from sqlalchemy import CheckConstraint, Index, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base, TimestampMixin, UUIDMixin
@@ -43,6 +43,8 @@ class Category(Base, UUIDMixin, TimestampMixin):
         UniqueConstraint("name", "type", name="uq_category_name_type"),
         CheckConstraint("type IN ('income', 'expense')", name="ck_category_type"),
         CheckConstraint("color ~ '^#[0-9A-Fa-f]{6}$'", name="ck_category_color_hex"),
+        # Лента изменений /sync/changes
+        Index("ix_categories_updated_at_id", "updated_at", "id"),
     )
 
     def __repr__(self) -> str:
@@ -6,12 +6,14 @@ from datetime import date, datetime
 from decimal import Decimal
 
 from sqlalchemy import (
+    DDL,
     CheckConstraint,
     Date,
     ForeignKey,
     Numeric,
     String,
     UniqueConstraint,
+    event,
 )
 from sqlalchemy import DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column
@@ -44,11 +46,25 @@ class ExchangeRate(Base, UUIDMixin):
     )
 
     __table_args__ = (
+        # В БД — UNIQUE (...) INCLUDE (rate): as-of поиск (последний курс пары
+        # не позже даты) идёт index-only scan по индексу ограничения
         UniqueConstraint(
             "from_currency", "to_currency", "date", name="uq_exchange_rate_per_day"
         ),
         CheckConstraint("rate > 0", name="ck_exchange_rate_positive"),
     )
 
-    def __repr__(self) -> str:
-        return f"<ExchangeRate({self.from_currency}->{self.to_currency} {self.date}={self.rate})>"
+
+# SQLAlchemy не задаёт INCLUDE у UniqueConstraint: при create_all ограничение
+# пересоздаётся с покрывающей колонкой, как в миграции 20261019000006
+UNIQUE_PAIR_DATE_INCLUDE_RATE = DDL(
+    "ALTER TABLE exchange_rates "
+    "DROP CONSTRAINT uq_exchange_rate_per_day, "
+    "ADD CONSTRAINT uq_exchange_rate_per_day "
+    "UNIQUE (from_currency, to_currency, date) INCLUDE (rate)"
+)
+event.listen(
+    ExchangeRate.__table__,
+    "after_create",
+    UNIQUE_PAIR_DATE_INCLUDE_RATE.execute_if(dialect="postgresql"),
+)
@@ -11,6 +11,7 @@ from sqlalchemy import (
     CheckConstraint,
     Date,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
@@ -70,6 +71,8 @@ class RecurringTransaction(Base, UUIDMixin, TimestampMixin):
         CheckConstraint(
             "currency ~ '^[A-Z]{3}$'", name="ck_recurring_currency_iso4217"
         ),
+        # Лента изменений /sync/changes
+        Index("ix_recurring_transactions_updated_at_id", "updated_at", "id"),
     )
 
     def __repr__(self) -> str:
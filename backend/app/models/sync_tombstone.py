@@ -0,0 +1,32 @@
+"""
+Модель надгробия удалённой сущности для ленты изменений (/sync/changes).
+"""
+
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, Index, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base, UUIDMixin
+
+
+class SyncTombstone(Base, UUIDMixin):
+    """
+    Запись об удалении сущности: клиенты синхронизации узнают по ней,
+    что объект нужно убрать из локальной копии.
+    """
+
+    __tablename__ = "sync_tombstones"
+
+    entity_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    entity_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    deleted_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    __table_args__ = (Index("ix_sync_tombstones_deleted_at_id", "deleted_at", "id"),)
+
+    def __repr__(self) -> str:
+        return f"<SyncTombstone(entity_type={self.entity_type}, entity_id={self.entity_id})>"
@@ -26,6 +26,10 @@ class TaskResult(Base, UUIDMixin):
     status: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
     result: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
     error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Отпечаток загруженного файла: повторная загрузка возвращает прежний результат
+    file_fingerprint: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, index=True
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
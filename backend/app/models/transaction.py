@@ -6,7 +6,15 @@ from datetime import date
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
-from sqlalchemy import CheckConstraint, Date, ForeignKey, Numeric, String, Text
+from sqlalchemy import (
+    CheckConstraint,
+    Date,
+    ForeignKey,
+    Index,
+    Numeric,
+    String,
+    Text,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -43,6 +51,8 @@ class Transaction(Base, UUIDMixin, TimestampMixin):
         ForeignKey("recurring_transactions.id", ondelete="SET NULL"),
         nullable=True,
     )
+    # Отпечаток строки импорта (sha256): защищает от повторной загрузки выписки
+    import_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     # Relationships
     category: Mapped["Category"] = relationship(
@@ -59,6 +69,24 @@ class Transaction(Base, UUIDMixin, TimestampMixin):
         CheckConstraint(
             "currency ~ '^[A-Z]{3}$'", name="ck_transaction_currency_iso4217"
         ),
+        Index("uq_transactions_import_fingerprint", "import_fingerprint", unique=True),
+        # Одна транзакция на дату шаблона: повторный запуск обработки идемпотентен
+        Index(
+            "uq_transactions_recurring_template_date",
+            "recurring_template_id",
+            "transaction_date",
+            unique=True,
+        ),
+        # Лента изменений /sync/changes
+        Index("ix_transactions_updated_at_id", "updated_at", "id"),
+        # Прогресс бюджета: SUM(amount) по категории, типу и периоду
+        Index(
+            "ix_transactions_category_type_date",
+            "category_id",
+            "type",
+            "transaction_date",
+            postgresql_include=["amount"],
+        ),
     )
 
     def __repr__(self) -> str:
@@ -2,15 +2,20 @@
 
 from typing import Generic, TypeVar, Type, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, func
+from sqlalchemy import select, delete, func, insert
 import uuid
 
+from app.models.sync_tombstone import SyncTombstone
+
 ModelType = TypeVar("ModelType")
 
 
 class BaseRepository(Generic[ModelType]):
     """Базовый репозиторий с CRUD операциями"""
 
+    # Тип сущности в ленте изменений /sync/changes; None — удаления не журналируются
+    sync_entity: str | None = None
+
     def __init__(self, model: Type[ModelType], session: AsyncSession):
         self.model = model
         self.session = session
@@ -52,12 +57,26 @@ class BaseRepository(Generic[ModelType]):
         return instance
 
     async def delete(self, id: uuid.UUID) -> bool:
-        """Удалить запись по ID"""
+        """Удалить запись по ID (с надгробием для синхронизации в той же транзакции)"""
         result = await self.session.execute(
-            delete(self.model).where(self.model.id == id)
+            delete(self.model).where(self.model.id == id).returning(self.model.id)
         )
+        deleted_ids = list(result.scalars().all())
+        await self.record_tombstones(deleted_ids)
         await self.session.commit()
-        return result.rowcount > 0
+        return bool(deleted_ids)
+
+    async def record_tombstones(
+        self, ids: List[uuid.UUID], entity_type: str | None = None
+    ) -> None:
+        """Записать надгробия удалённых сущностей (без commit)"""
+        entity_type = entity_type or self.sync_entity
+        if entity_type is None or not ids:
+            return
+        await self.session.execute(
+            insert(SyncTombstone),
+            [{"entity_type": entity_type, "entity_id": id} for id in ids],
+        )
 
     async def count(self) -> int:
         """Получить общее количество записей"""
@@ -1,18 +1,23 @@
 """Репозиторий для работы с бюджетами"""
 
 from datetime import date
-from typing import List
-from sqlalchemy import select, and_
+from decimal import Decimal
+from typing import List, Tuple
+from sqlalchemy import Date, Numeric, and_, case, cast, func, literal_column, select
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
 from app.models.budget import Budget
+from app.models.budget_spend import BudgetSpend
+from app.models.transaction import Transaction
 from app.repositories.base import BaseRepository
 
 
 class BudgetRepository(BaseRepository[Budget]):
     """Репозиторий для бюджетов"""
 
+    sync_entity = "budget"
+
     def __init__(self, session: AsyncSession):
         super().__init__(Budget, session)
 
@@ -39,3 +44,88 @@ class BudgetRepository(BaseRepository[Budget]):
             )
         )
         return list(result.scalars().all())
+
+    async def get_all_with_spent(
+        self, active_on: date | None = None, period: str | None = None
+    ) -> List[Tuple[Budget, Decimal]]:
+        """
+        Бюджеты с суммой расходов за период — один запрос. Сумма берётся
+        из счётчика budget_spend; подзапрос по транзакциям выполняется только
+        для бюджетов без счётчика (COALESCE вычисляется лениво).
+        """
+        computed = (
+            select(cast(func.coalesce(func.sum(Transaction.amount), 0), Numeric(12, 2)))
+            .where(
+                and_(
+                    Transaction.category_id == Budget.category_id,
+                    Transaction.type == "expense",
+                    Transaction.transaction_date >= Budget.start_date,
+                    Transaction.transaction_date <= Budget.end_date,
+                )
+            )
+            .correlate(Budget)
+            .scalar_subquery()
+        )
+        query = (
+            select(Budget, func.coalesce(BudgetSpend.spent, computed))
+            .outerjoin(BudgetSpend, BudgetSpend.budget_id == Budget.id)
+            .order_by(Budget.start_date.desc(), Budget.id)
+        )
+        result = await self.session.execute(self._filter(query, active_on, period))
+        return [(budget, Decimal(total)) for budget, total in result.all()]
+
+    async def get_filtered(
+        self, active_on: date | None = None, period: str | None = None
+    ) -> List[Budget]:
+        """Бюджеты, активные на дату и/или заданного периода"""
+        query = select(Budget).order_by(Budget.start_date.desc(), Budget.id)
+        result = await self.session.execute(self._filter(query, active_on, period))
+        return list(result.scalars().all())
+
+    @staticmethod
+    def _filter(query, active_on: date | None, period: str | None):
+        if active_on is not None:
+            query = query.where(
+                and_(Budget.start_date <= active_on, Budget.end_date >= active_on)
+            )
+        if period is not None:
+            query = query.where(Budget.period == period)
+        return query
+
+    async def get_daily_spend(
+        self, budget_ids: List[uuid.UUID], as_of: date
+    ) -> List[Tuple[uuid.UUID, date, Decimal]]:
+        """
+        Дневные расходы категорий бюджетов от начала предыдущего периода
+        (месяц/год до start_date) по as_of, не позже конца бюджета. Один
+        агрегированный запрос на все бюджеты: (budget_id, дата, сумма).
+        """
+        prior_start = cast(
+            case(
+                (
+                    Budget.period == "yearly",
+                    Budget.start_date - literal_column("interval '1 year'"),
+                ),
+                else_=Budget.start_date - literal_column("interval '1 month'"),
+            ),
+            Date,
+        )
+        result = await self.session.execute(
+            select(
+                Budget.id,
+                Transaction.transaction_date,
+                func.sum(Transaction.amount),
+            )
+            .join(
+                Transaction,
+                and_(
+                    Transaction.category_id == Budget.category_id,
+                    Transaction.type == "expense",
+                    Transaction.transaction_date >= prior_start,
+                    Transaction.transaction_date <= func.least(Budget.end_date, as_of),
+                ),
+            )
+            .where(Budget.id.in_(budget_ids))
+            .group_by(Budget.id, Transaction.transaction_date)
+        )
+        return [tuple(row) for row in result.all()]
@@ -0,0 +1,135 @@
+"""Репозиторий счётчиков расходов бюджетов и событий порогов"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Sequence, Tuple
+import uuid
+
+from sqlalchemy import Row, Date, Numeric, and_, bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.budget import Budget
+from app.models.budget_spend import BudgetSpend
+from app.models.budget_threshold_event import BudgetThresholdEvent
+from app.models.transaction import Transaction
+
+
+class BudgetSpendRepository:
+    """
+    Счётчики расходов бюджетов. Методы изменения не делают commit: счётчик
+    фиксируется вместе с записью транзакции, которая его изменила.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_spent(self, budget_id: uuid.UUID) -> Decimal | None:
+        """Значение счётчика (None — счётчик ещё не создан)"""
+        result = await self.session.execute(
+            select(BudgetSpend.spent).where(BudgetSpend.budget_id == budget_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def apply_deltas(
+        self, deltas: Sequence[Tuple[uuid.UUID, date, Decimal]]
+    ) -> List[Row]:
+        """
+        Прибавить суммы (category_id, дата, ±сумма) к счётчикам бюджетов,
+        чьи категория и период их покрывают. Один UPDATE на любое число
+        изменений (массивы через unnest). Возвращает по бюджету новое spent,
+        применённую delta и budget_amount.
+        """
+        category_ids, days, amounts = (list(column) for column in zip(*deltas))
+        changes = (
+            func.unnest(
+                bindparam(
+                    "category_ids", category_ids, type_=ARRAY(UUID(as_uuid=True))
+                ),
+                bindparam("days", days, type_=ARRAY(Date)),
+                bindparam("amounts", amounts, type_=ARRAY(Numeric(12, 2))),
+            )
+            .table_valued("category_id", "day", "amount")
+            .render_derived("changes")
+        )
+        per_budget = (
+            select(
+                Budget.id.label("budget_id"),
+                Budget.amount.label("budget_amount"),
+                func.sum(changes.c.amount).label("delta"),
+            )
+            .join(
+                changes,
+                and_(
+                    changes.c.category_id == Budget.category_id,
+                    changes.c.day >= Budget.start_date,
+                    changes.c.day <= Budget.end_date,
+                ),
+            )
+            .group_by(Budget.id)
+            .subquery()
+        )
+        result = await self.session.execute(
+            update(BudgetSpend)
+            .where(BudgetSpend.budget_id == per_budget.c.budget_id)
+            .values(spent=BudgetSpend.spent + per_budget.c.delta)
+            .returning(
+                BudgetSpend.budget_id,
+                BudgetSpend.spent,
+                per_budget.c.delta,
+                per_budget.c.budget_amount,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return list(result.all())
+
+    async def recalculate(self, budget_id: uuid.UUID) -> Decimal:
+        """Пересчитать счётчик бюджета по транзакциям (создав его при отсутствии)"""
+        spent = (
+            select(
+                Budget.id,
+                func.coalesce(func.sum(Transaction.amount), 0),
+            )
+            .outerjoin(
+                Transaction,
+                and_(
+                    Transaction.category_id == Budget.category_id,
+                    Transaction.type == "expense",
+                    Transaction.transaction_date >= Budget.start_date,
+                    Transaction.transaction_date <= Budget.end_date,
+                ),
+            )
+            .where(Budget.id == budget_id)
+            .group_by(Budget.id)
+        )
+        stmt = insert(BudgetSpend).from_select(["budget_id", "spent"], spent)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BudgetSpend.budget_id],
+            set_={"spent": stmt.excluded.spent, "updated_at": func.now()},
+        ).returning(BudgetSpend.spent)
+        result = await self.session.execute(stmt)
+        return result.scalar_one()
+
+    async def add_events(self, events: List[dict]) -> None:
+        """Записать события пересечения порогов"""
+        if events:
+            await self.session.execute(insert(BudgetThresholdEvent), events)
+
+    async def list_events(
+        self,
+        since: datetime | None = None,
+        budget_id: uuid.UUID | None = None,
+        limit: int = 100,
+    ) -> List[BudgetThresholdEvent]:
+        """События порогов (новые первыми)"""
+        query = select(BudgetThresholdEvent)
+        if since is not None:
+            query = query.where(BudgetThresholdEvent.created_at > since)
+        if budget_id is not None:
+            query = query.where(BudgetThresholdEvent.budget_id == budget_id)
+        result = await self.session.execute(
+            query.order_by(
+                BudgetThresholdEvent.created_at.desc(), BudgetThresholdEvent.id
+            ).limit(limit)
+        )
+        return list(result.scalars().all())
@@ -1,9 +1,11 @@
 """Репозиторий для работы с категориями"""
 
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, tuple_, delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
+from app.models.budget import Budget
 from app.models.category import Category
 from app.models.transaction import Transaction
 from app.repositories.base import BaseRepository
@@ -12,9 +14,19 @@ from app.repositories.base import BaseRepository
 class CategoryRepository(BaseRepository[Category]):
     """Репозиторий для категорий"""
 
+    sync_entity = "category"
+
     def __init__(self, session: AsyncSession):
         super().__init__(Category, session)
 
+    async def delete(self, id: uuid.UUID) -> bool:
+        """Удалить категорию; бюджеты удаляются явно, чтобы получить надгробия"""
+        result = await self.session.execute(
+            delete(Budget).where(Budget.category_id == id).returning(Budget.id)
+        )
+        await self.record_tombstones(list(result.scalars().all()), "budget")
+        return await super().delete(id)
+
     async def get_by_name_and_type(self, name: str, type: str) -> Category | None:
         """Получить категорию по имени и типу"""
         result = await self.session.execute(
@@ -31,3 +43,44 @@ class CategoryRepository(BaseRepository[Category]):
         )
         count = result.scalar()
         return count > 0
+
+    async def get_or_create_many(
+        self, keys: set[tuple[str, str]]
+    ) -> dict[tuple[str, str], uuid.UUID]:
+        """
+        Получить ID категорий по набору (name, type), создав недостающие.
+        Два SELECT и один INSERT ... ON CONFLICT DO NOTHING на весь набор.
+        """
+        if not keys:
+            return {}
+
+        async def _select(wanted: set[tuple[str, str]]) -> dict:
+            result = await self.session.execute(
+                select(Category.id, Category.name, Category.type).where(
+                    tuple_(Category.name, Category.type).in_(list(wanted))
+                )
+            )
+            return {(row.name, row.type): row.id for row in result}
+
+        found = await _select(keys)
+        missing = keys - found.keys()
+        if missing:
+            await self.session.execute(
+                insert(Category)
+                .values(
+                    [
+                        {
+                            "id": uuid.uuid4(),
+                            "name": name,
+                            "type": type_,
+                            "icon": "📁",
+                            "color": "#808080",
+                        }
+                        for name, type_ in missing
+                    ]
+                )
+                .on_conflict_do_nothing(constraint="uq_category_name_type")
+            )
+            await self.session.commit()
+            found.update(await _select(missing))
+        return found
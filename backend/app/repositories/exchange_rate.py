@@ -1,7 +1,9 @@
 """Репозиторий для курсов валют"""
 
 from datetime import date
-from sqlalchemy import select, and_
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import Date, Row, String, bindparam, func, select, and_, true
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.exchange_rate import ExchangeRate
@@ -46,8 +48,100 @@ class ExchangeRateRepository(BaseRepository[ExchangeRate]):
         )
         return result.scalar_one_or_none()
 
-    async def bulk_create(self, rates: list[dict]) -> None:
-        """Массовое создание записей курсов."""
-        instances = [ExchangeRate(**r) for r in rates]
-        self.session.add_all(instances)
+    async def get_all_rates(self, after: date | None = None) -> List[Row]:
+        """
+        Все курсы (для кэша), отсортированные по паре валют и дате; с after —
+        только курсы за даты позже неё (догрузка новых дней).
+        """
+        query = select(
+            ExchangeRate.id,
+            ExchangeRate.from_currency,
+            ExchangeRate.to_currency,
+            ExchangeRate.rate,
+            ExchangeRate.date,
+            ExchangeRate.created_at,
+        )
+        if after is not None:
+            query = query.where(ExchangeRate.date > after)
+        result = await self.session.execute(
+            query.order_by(
+                ExchangeRate.from_currency, ExchangeRate.to_currency, ExchangeRate.date
+            )
+        )
+        return list(result.all())
+
+    async def get_rates_as_of(
+        self, keys: Iterable[Tuple[str, str, date]]
+    ) -> Dict[Tuple[str, str, date], Row]:
+        """
+        Курсы для набора ключей (from, to, date) одним запросом: ключи
+        приходят массивами через unnest, для каждого LEFT JOIN LATERAL
+        берёт последний курс не позже даты (индекс uq_exchange_rate_per_day
+        с INCLUDE (rate), index-only scan), а если таких нет — последний известный.
+        Ключи без курса в результат не попадают.
+        """
+        unique = list(dict.fromkeys((f.upper(), t.upper(), d) for f, t, d in keys))
+        if not unique:
+            return {}
+        from_codes, to_codes, dates = (list(column) for column in zip(*unique))
+        k = (
+            func.unnest(
+                bindparam("from_codes", from_codes, type_=ARRAY(String(3))),
+                bindparam("to_codes", to_codes, type_=ARRAY(String(3))),
+                bindparam("dates", dates, type_=ARRAY(Date)),
+            )
+            .table_valued("from_currency", "to_currency", "rate_date")
+            .render_derived("k")
+        )
+        same_pair = and_(
+            ExchangeRate.from_currency == k.c.from_currency,
+            ExchangeRate.to_currency == k.c.to_currency,
+        )
+        as_of = (
+            select(ExchangeRate.rate, ExchangeRate.date)
+            .where(same_pair, ExchangeRate.date <= k.c.rate_date)
+            .order_by(ExchangeRate.date.desc())
+            .limit(1)
+            .lateral("as_of")
+        )
+        # Fallback читается только при промахе as_of (One-Time Filter)
+        latest = (
+            select(ExchangeRate.rate, ExchangeRate.date)
+            .where(same_pair, as_of.c.rate.is_(None))
+            .order_by(ExchangeRate.date.desc())
+            .limit(1)
+            .lateral("latest")
+        )
+        result = await self.session.execute(
+            select(
+                k.c.from_currency,
+                k.c.to_currency,
+                k.c.rate_date,
+                func.coalesce(as_of.c.rate, latest.c.rate).label("rate"),
+                func.coalesce(as_of.c.date, latest.c.date).label("date"),
+            )
+            .select_from(k)
+            .outerjoin(as_of, true())
+            .outerjoin(latest, true())
+        )
+        return {
+            (row.from_currency, row.to_currency, row.rate_date): row
+            for row in result.all()
+            if row.rate is not None
+        }
+
+    async def upsert_many(self, rates: list[dict]) -> None:
+        """
+        Массовая запись курсов: INSERT ... ON CONFLICT (пара, дата) DO UPDATE.
+        Повторная загрузка за тот же день обновляет курс, а не падает на
+        uq_exchange_rate_per_day. Ключи в rates должны быть уникальны.
+        """
+        if not rates:
+            return
+        stmt = insert(ExchangeRate)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_exchange_rate_per_day",
+            set_={"rate": stmt.excluded.rate},
+        )
+        await self.session.execute(stmt, rates)
         await self.session.commit()
@@ -1,38 +1,224 @@
 """Репозиторий для шаблонов повторяющихся транзакций"""
 
 from datetime import date
-from sqlalchemy import select, and_, or_, update
+from typing import Collection, List
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Row,
+    cast,
+    func,
+    literal,
+    select,
+    true,
+    and_,
+    or_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
 from app.models.recurring_transaction import RecurringTransaction
+from app.models.transaction import Transaction
 from app.repositories.base import BaseRepository
+from app.core.recurrence import sql_interval
 
 
 class RecurringTransactionRepository(BaseRepository[RecurringTransaction]):
     """Репозиторий для шаблонов повторяющихся транзакций"""
 
+    sync_entity = "recurring_transaction"
+
     def __init__(self, session: AsyncSession):
         super().__init__(RecurringTransaction, session)
 
+    async def delete(self, id: uuid.UUID) -> bool:
+        """
+        Удалить шаблон. Связь с транзакциями снимается явным UPDATE (а не
+        ON DELETE SET NULL), чтобы у них сдвинулся updated_at для синхронизации.
+        """
+        await self.session.execute(
+            update(Transaction)
+            .where(Transaction.recurring_template_id == id)
+            .values(recurring_template_id=None)
+        )
+        return await super().delete(id)
+
+    @staticmethod
+    def _due(current_date: date):
+        """
+        Условие «у шаблона есть невыполненные даты по current_date»: в том
+        числе у шаблонов, чей end_date уже прошёл, но был пропущен.
+        """
+        return and_(
+            RecurringTransaction.is_active.is_(True),
+            RecurringTransaction.next_occurrence <= current_date,
+            or_(
+                RecurringTransaction.end_date.is_(None),
+                RecurringTransaction.end_date >= RecurringTransaction.next_occurrence,
+            ),
+        )
+
+    @staticmethod
+    def _step():
+        """SQL-интервал шаблона (шаги частот — из модуля расписаний)"""
+        return sql_interval(
+            RecurringTransaction.frequency, RecurringTransaction.interval
+        )
+
+    @classmethod
+    def _occurrences(cls, current_date: date):
+        """
+        Все пропущенные даты шаблона: generate_series от next_occurrence до
+        min(current_date, end_date) с шагом шаблона. Шаг прибавляется к
+        предыдущей дате (31.01 -> 29.02 -> 29.03), как при обработке по одной.
+        """
+        R = RecurringTransaction
+        bound = func.least(
+            literal(current_date), func.coalesce(R.end_date, current_date)
+        )
+        return func.generate_series(
+            cast(R.next_occurrence, DateTime),
+            cast(bound, DateTime),
+            cls._step(),
+        )
+
+    async def get_active_for_forecast(self, start: date, until: date) -> List[Row]:
+        """
+        Активные шаблоны с датами в окне [start, until]: только поля,
+        нужные для развёртки расписания и сумм.
+        """
+        R = RecurringTransaction
+        result = await self.session.execute(
+            select(
+                R.amount,
+                R.currency,
+                R.type,
+                R.frequency,
+                R.interval,
+                R.next_occurrence,
+                R.end_date,
+            ).where(
+                R.is_active.is_(True),
+                R.next_occurrence <= until,
+                or_(R.end_date.is_(None), R.end_date >= start),
+            )
+        )
+        return list(result.all())
+
     async def get_active_due_today(
         self, current_date: date
     ) -> list[RecurringTransaction]:
         """Получить активные шаблоны, которые должны быть выполнены на указанную дату."""
         result = await self.session.execute(
-            select(RecurringTransaction).where(
-                and_(
-                    RecurringTransaction.is_active.is_(True),
-                    RecurringTransaction.next_occurrence <= current_date,
-                    or_(
-                        RecurringTransaction.end_date.is_(None),
-                        RecurringTransaction.end_date >= current_date,
-                    ),
-                )
-            )
+            select(RecurringTransaction).where(self._due(current_date))
         )
         return list(result.scalars().all())
 
+    async def claim_due(
+        self,
+        current_date: date,
+        limit: int,
+        exclude: Collection[uuid.UUID] = (),
+        template_ids: Collection[uuid.UUID] | None = None,
+    ) -> list[uuid.UUID]:
+        """
+        Захватить пачку шаблонов к исполнению: SELECT ... FOR UPDATE SKIP
+        LOCKED. Строки заблокированы до конца транзакции, шаблоны, захваченные
+        другим воркером, пропускаются. exclude исключает шаблоны (например,
+        с ошибкой), template_ids сужает выборку.
+        """
+        query = select(RecurringTransaction.id).where(self._due(current_date))
+        if exclude:
+            query = query.where(RecurringTransaction.id.not_in(exclude))
+        if template_ids is not None:
+            query = query.where(RecurringTransaction.id.in_(template_ids))
+        result = await self.session.execute(
+            query.order_by(RecurringTransaction.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(result.scalars().all())
+
+    async def generate_due(
+        self,
+        current_date: date,
+        template_ids: Collection[uuid.UUID],
+    ) -> List[Row]:
+        """
+        Создать транзакции на все пропущенные даты шаблонов template_ids
+        (захваченных claim_due) одним INSERT ... SELECT (даты разворачиваются
+        generate_series) и перенести next_occurrence за последнюю из них
+        одним UPDATE (без commit). Уже созданные даты пропускаются
+        (ON CONFLICT DO NOTHING). Возвращает вставленные строки (id,
+        recurring_template_id, category_id, transaction_date, amount, type).
+        """
+        R = RecurringTransaction
+        occurrences = (
+            self._occurrences(current_date)
+            .table_valued("occurrence")
+            .render_derived("occurrences")
+            .lateral()
+        )
+        due = (
+            select(
+                func.gen_random_uuid(),
+                R.amount,
+                R.currency,
+                R.category_id,
+                func.concat(R.name, literal(" (автоматически создано)")),
+                cast(occurrences.c.occurrence, Date),
+                R.type,
+                literal(False),
+                R.id,
+            )
+            .join(occurrences, true())
+            .where(self._due(current_date), R.id.in_(template_ids))
+        )
+        result = await self.session.execute(
+            insert(Transaction)
+            .from_select(
+                [
+                    "id",
+                    "amount",
+                    "currency",
+                    "category_id",
+                    "description",
+                    "transaction_date",
+                    "type",
+                    "is_recurring",
+                    "recurring_template_id",
+                ],
+                due,
+                include_defaults=False,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[
+                    Transaction.recurring_template_id,
+                    Transaction.transaction_date,
+                ]
+            )
+            .returning(
+                Transaction.id,
+                Transaction.recurring_template_id,
+                Transaction.category_id,
+                Transaction.transaction_date,
+                Transaction.amount,
+                Transaction.type,
+            )
+        )
+        inserted = list(result.all())
+        occurrence = self._occurrences(current_date).column_valued()
+        last = select(func.max(occurrence)).scalar_subquery()
+        await self.session.execute(
+            update(R)
+            .where(R.id.in_(template_ids), self._due(current_date))
+            .values(next_occurrence=cast(last + self._step(), Date))
+            .execution_options(synchronize_session=False)
+        )
+        return inserted
+
     async def update_next_occurrence(
         self, recurring_id: uuid.UUID, next_date: date
     ) -> None:
@@ -0,0 +1,118 @@
+"""Репозиторий ленты изменений (/sync/changes)"""
+
+from datetime import datetime
+from typing import Any, List
+import uuid
+
+from sqlalchemy import and_, select, text, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.sync_tombstone import SyncTombstone
+from app.models.transaction import Transaction
+
+# Начало самой старой незавершённой пишущей транзакции других клиентов.
+# now() в updated_at — время начала транзакции, поэтому запись, закоммиченная
+# позже, может получить метку раньше уже выданного токена. Строки новее
+# горизонта не отдаются, пока все такие транзакции не завершатся. Читающие
+# транзакции (потоковый экспорт, фоновые задачи, забытая сессия psql) xid не
+# получают и горизонт не держат.
+_HORIZON_SQL = text(
+    """
+    SELECT LEAST(
+        clock_timestamp(),
+        (
+            SELECT min(xact_start)
+            FROM pg_stat_activity
+            WHERE datname = current_database()
+              AND pid <> pg_backend_pid()
+              AND backend_type = 'client backend'
+              AND backend_xid IS NOT NULL
+        )
+    )
+    """
+)
+
+
+class SyncRepository:
+    """Выборка изменённых и удалённых сущностей по курсору (метка времени, id)"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_horizon(self) -> datetime:
+        """Метка, до которой набор изменений уже не пополнится"""
+        result = await self.session.execute(_HORIZON_SQL)
+        return result.scalar_one()
+
+    @staticmethod
+    def _after(
+        column: Any,
+        id_column: Any,
+        since: datetime | None,
+        since_id: uuid.UUID | None,
+        inclusive: bool,
+    ) -> Any:
+        """
+        Условие «после курсора»: с since_id — по паре (метка, id), иначе
+        строго или нестрого по метке (для источников до/после курсора).
+        """
+        if since is None:
+            return true()
+        if since_id is not None:
+            return tuple_(column, id_column) > tuple_(since, since_id)
+        return column >= since if inclusive else column > since
+
+    async def get_changed(
+        self,
+        model: type,
+        horizon: datetime,
+        since: datetime | None,
+        since_id: uuid.UUID | None,
+        inclusive: bool,
+        limit: int,
+    ) -> List[Any]:
+        """Сущности модели с updated_at после курсора и до горизонта"""
+        query = (
+            select(model)
+            .where(
+                and_(
+                    model.updated_at < horizon,
+                    self._after(model.updated_at, model.id, since, since_id, inclusive),
+                )
+            )
+            .order_by(model.updated_at, model.id)
+            .limit(limit)
+        )
+        if model is Transaction:
+            query = query.options(selectinload(Transaction.category))
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def get_tombstones(
+        self,
+        horizon: datetime,
+        since: datetime | None,
+        since_id: uuid.UUID | None,
+        inclusive: bool,
+        limit: int,
+    ) -> List[SyncTombstone]:
+        """Надгробия после курсора и до горизонта"""
+        result = await self.session.execute(
+            select(SyncTombstone)
+            .where(
+                and_(
+                    SyncTombstone.deleted_at < horizon,
+                    self._after(
+                        SyncTombstone.deleted_at,
+                        SyncTombstone.id,
+                        since,
+                        since_id,
+                        inclusive,
+                    ),
+                )
+            )
+            .order_by(SyncTombstone.deleted_at, SyncTombstone.id)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
@@ -1,6 +1,8 @@
 """Репозиторий для результатов фоновых задач"""
 
-from sqlalchemy import select
+from typing import Any
+
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.task_result import TaskResult
@@ -19,3 +21,31 @@ class TaskResultRepository(BaseRepository[TaskResult]):
             select(TaskResult).where(TaskResult.task_id == task_id)
         )
         return result.scalar_one_or_none()
+
+    async def get_by_file_fingerprint(self, fingerprint: str) -> TaskResult | None:
+        """Последний неупавший результат импорта того же файла."""
+        result = await self.session.execute(
+            select(TaskResult)
+            .where(
+                TaskResult.file_fingerprint == fingerprint,
+                TaskResult.status != "failed",
+            )
+            .order_by(TaskResult.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def update_status(
+        self,
+        task_id: str,
+        status: str,
+        result: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Обновить статус, результат и ошибку задачи по идентификатору."""
+        await self.session.execute(
+            update(TaskResult)
+            .where(TaskResult.task_id == task_id)
+            .values(status=status, result=result, error=error)
+        )
+        await self.session.commit()
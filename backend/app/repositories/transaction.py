@@ -2,19 +2,35 @@
 
 from datetime import date
 from decimal import Decimal
-from typing import List, Tuple
-from sqlalchemy import select, and_, func
+from typing import AsyncIterator, Awaitable, Callable, List, Sequence, Tuple
+from sqlalchemy import Numeric, Row, select, and_, cast, func, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 import uuid
 
+from app.models.category import Category
 from app.models.transaction import Transaction
 from app.repositories.base import BaseRepository
 
 
+# SQL-выражения колонок экспорта для COPY (дата форматируется отдельно через to_char)
+_COPY_EXPORT_COLUMNS = {
+    "id": "t.id",
+    "amount": "t.amount",
+    "currency": "t.currency",
+    "category_id": "t.category_id",
+    "category_name": "c.name",
+    "description": "NULLIF(t.description, '')",
+    "type": "t.type",
+}
+
+
 class TransactionRepository(BaseRepository[Transaction]):
     """Репозиторий для транзакций"""
 
+    sync_entity = "transaction"
+
     def __init__(self, session: AsyncSession):
         super().__init__(Transaction, session)
 
@@ -25,6 +41,42 @@ class TransactionRepository(BaseRepository[Transaction]):
         await self.session.refresh(transaction, ["category"])
         return transaction
 
+    async def bulk_insert_ignore_conflicts(
+        self,
+        rows: list[dict],
+        before_commit: Callable[[Sequence[Row]], Awaitable[None]] | None = None,
+    ) -> int:
+        """
+        Массовая вставка транзакций с ON CONFLICT DO NOTHING по import_fingerprint.
+        Возвращает число реально вставленных строк (дубликаты пропускаются).
+        before_commit получает вставленные строки (category_id, transaction_date,
+        amount, type) и выполняется в той же транзакции.
+        """
+        if not rows:
+            return 0
+        stmt = (
+            insert(Transaction)
+            .on_conflict_do_nothing(index_elements=[Transaction.import_fingerprint])
+            .returning(
+                Transaction.id,
+                Transaction.category_id,
+                Transaction.transaction_date,
+                Transaction.amount,
+                Transaction.type,
+            )
+        )
+        try:
+            result = await self.session.execute(stmt, rows)
+            inserted_rows = result.all()
+            inserted = len(inserted_rows)
+            if before_commit is not None:
+                await before_commit(inserted_rows)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return inserted
+
     async def get_by_id(self, id: uuid.UUID) -> Transaction | None:
         """Получить транзакцию по ID с загрузкой категории"""
         result = await self.session.execute(
@@ -45,6 +97,22 @@ class TransactionRepository(BaseRepository[Transaction]):
         await self.session.refresh(transaction, ["category"])
         return transaction
 
+    async def template_occurrence_exists(
+        self,
+        recurring_template_id: uuid.UUID,
+        transaction_date: date,
+        exclude_id: uuid.UUID | None = None,
+    ) -> bool:
+        """Есть ли уже транзакция шаблона на дату (uq_transactions_recurring_template_date)"""
+        query = select(Transaction.id).where(
+            Transaction.recurring_template_id == recurring_template_id,
+            Transaction.transaction_date == transaction_date,
+        )
+        if exclude_id is not None:
+            query = query.where(Transaction.id != exclude_id)
+        result = await self.session.execute(query.limit(1))
+        return result.scalar_one_or_none() is not None
+
     async def get_filtered(
         self,
         start_date: date | None = None,
@@ -113,3 +181,148 @@ class TransactionRepository(BaseRepository[Transaction]):
             .order_by(Transaction.transaction_date.desc())
         )
         return list(result.scalars().all())
+
+    async def sum_amount(
+        self, category_id: uuid.UUID, type: str, start_date: date, end_date: date
+    ) -> Decimal:
+        """
+        Сумма транзакций категории и типа за период одним агрегатом
+        (index-only scan по ix_transactions_category_type_date).
+        """
+        result = await self.session.execute(
+            select(
+                cast(func.coalesce(func.sum(Transaction.amount), 0), Numeric(12, 2))
+            ).where(
+                and_(
+                    Transaction.category_id == category_id,
+                    Transaction.type == type,
+                    Transaction.transaction_date >= start_date,
+                    Transaction.transaction_date <= end_date,
+                )
+            )
+        )
+        return Decimal(result.scalar_one())
+
+    @staticmethod
+    def _export_filters(
+        start_date: date | None, end_date: date | None, category_id: uuid.UUID | None
+    ) -> list:
+        """Условия выборки экспорта (период и категория)."""
+        filters = []
+        if start_date:
+            filters.append(Transaction.transaction_date >= start_date)
+        if end_date:
+            filters.append(Transaction.transaction_date <= end_date)
+        if category_id:
+            filters.append(Transaction.category_id == category_id)
+        return filters
+
+    async def count_export_rows(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        category_id: uuid.UUID | None = None,
+    ) -> int:
+        """Число строк, которые попадут в экспорт (для прогресса фоновой выгрузки)."""
+        query = (
+            select(func.count())
+            .select_from(Transaction)
+            .where(*self._export_filters(start_date, end_date, category_id))
+        )
+        return (await self.session.execute(query)).scalar_one()
+
+    async def _disable_statement_timeout(self) -> None:
+        """
+        Потоковая выгрузка — один запрос на всё время скачивания: снять
+        DB_STATEMENT_TIMEOUT_MS до конца текущей транзакции. Между FETCH
+        серверного курсора соединение простаивает в транзакции, пока клиент
+        читает ответ, поэтому DB_IDLE_IN_TRANSACTION_TIMEOUT_MS тоже снимается.
+        """
+        await self.session.execute(text("SET LOCAL statement_timeout = 0"))
+        await self.session.execute(
+            text("SET LOCAL idle_in_transaction_session_timeout = 0")
+        )
+
+    async def stream_export_rows(
+        self,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        category_id: uuid.UUID | None = None,
+        batch_size: int = 2000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Потоково отдать строки для экспорта пачками по batch_size через серверный
+        курсор (session.stream + yield_per). ORM-объекты не создаются: только
+        нужные колонки и имя категории из JOIN.
+        """
+        query = (
+            select(
+                Transaction.id,
+                Transaction.amount,
+                Transaction.currency,
+                Transaction.category_id,
+                Category.name.label("category_name"),
+                Transaction.description,
+                Transaction.transaction_date,
+                Transaction.type,
+            )
+            .join(Category, Category.id == Transaction.category_id)
+            .where(*self._export_filters(start_date, end_date, category_id))
+            .order_by(Transaction.transaction_date.desc())
+            .execution_options(yield_per=batch_size)
+        )
+
+        await self._disable_statement_timeout()
+        result = await self.session.stream(query)
+        async for partition in result.partitions():
+            yield partition
+
+    async def copy_export_csv(
+        self,
+        columns: list[str],
+        to_char_format: str,
+        output: Callable[[bytes], Awaitable[None]],
+        start_date: date | None = None,
+        end_date: date | None = None,
+        category_id: uuid.UUID | None = None,
+    ) -> None:
+        """
+        Выгрузить транзакции через COPY (SELECT ... JOIN categories ...) TO STDOUT
+        WITH CSV HEADER: Postgres сам форматирует CSV (дата — через to_char),
+        блоки байтов передаются в output без создания Python-объектов строк.
+        Неизвестные колонки выгружаются пустыми.
+        """
+        args: list = []
+
+        def param(value) -> str:
+            args.append(value)
+            return f"${len(args)}"
+
+        expressions = []
+        for name in columns:
+            if name == "transaction_date":
+                expression = f"to_char(t.transaction_date, {param(to_char_format)})"
+            else:
+                expression = _COPY_EXPORT_COLUMNS.get(name, "NULL")
+            expressions.append('{} AS "{}"'.format(expression, name.replace('"', '""')))
+
+        filters = []
+        if start_date:
+            filters.append(f"t.transaction_date >= {param(start_date)}")
+        if end_date:
+            filters.append(f"t.transaction_date <= {param(end_date)}")
+        if category_id:
+            filters.append(f"t.category_id = {param(category_id)}")
+        where = f" WHERE {' AND '.join(filters)}" if filters else ""
+        query = (
+            f"SELECT {', '.join(expressions)} FROM transactions t "
+            f"JOIN categories c ON c.id = t.category_id{where} "
+            "ORDER BY t.transaction_date DESC"
+        )
+
+        await self._disable_statement_timeout()
+        connection = await self.session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_from_query(
+            query, *args, output=output, format="csv", header=True
+        )
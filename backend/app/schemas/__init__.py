@@ -20,6 +20,9 @@ from .csv_import import (
     CSVImportRequest,
     CSVImportResult,
     CSVExportRequest,
+    CSVExportJob,
+    ExportCompression,
+    ExportFormat,
 )
 from .currency import Currency, CurrencyBase, ExchangeRate, ExchangeRateBase
 from .task import TaskStatus, TaskStatusResponse
@@ -52,6 +55,9 @@ __all__ = [
     "CSVImportRequest",
     "CSVImportResult",
     "CSVExportRequest",
+    "CSVExportJob",
+    "ExportCompression",
+    "ExportFormat",
     # Currency schemas
     "Currency",
     "CurrencyBase",
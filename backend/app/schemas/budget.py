@@ -67,3 +67,32 @@ class BudgetProgress(BaseModel):
     spent: Decimal
     remaining: Decimal
     percentage: Decimal
+
+
+class BudgetThresholdEvent(BaseModel):
+    """Событие: расходы бюджета достигли порога (в процентах от суммы)"""
+
+    id: uuid.UUID
+    budget_id: uuid.UUID
+    threshold: int
+    spent: Decimal
+    budget_amount: Decimal
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class BudgetForecast(BaseModel):
+    """Прогноз расходов бюджета к концу периода"""
+
+    budget: Budget
+    as_of: date
+    days_elapsed: int
+    days_remaining: int
+    spent: Decimal
+    prior_period_spent: Decimal
+    daily_rate: Decimal
+    projected_spend: Decimal
+    projected_remaining: Decimal
+    projected_percentage: Decimal
+    will_exceed: bool
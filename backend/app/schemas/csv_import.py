@@ -1,6 +1,7 @@
 """Pydantic схемы для импорта и экспорта CSV"""
 
 from datetime import date
+from enum import Enum
 from typing import Any
 
 import uuid
@@ -24,6 +25,22 @@ class CSVImportRequest(BaseModel):
     file_content: str = Field(..., description="Содержимое CSV в Base64")
     mapping: CSVColumnMapping
     date_format: str = Field(default="%Y-%m-%d", description="Формат даты в файле")
+    import_source: str = Field(
+        default="csv",
+        min_length=1,
+        max_length=100,
+        description="Источник импорта (банк, счёт): область уникальности строк",
+    )
+    dry_run: bool = Field(
+        default=False,
+        description="Только проверить файл без записи в БД; ответ — поток NDJSON с ошибками",
+    )
+    max_errors: int = Field(
+        default=100,
+        ge=1,
+        le=10_000,
+        description="Dry run: после стольких ошибок проверка прерывается",
+    )
 
 
 class CSVImportResult(BaseModel):
@@ -32,12 +49,34 @@ class CSVImportResult(BaseModel):
     task_id: str
     status: str
     created_count: int = 0
+    skipped_count: int = Field(
+        default=0, description="Строки, уже импортированные ранее из того же источника"
+    )
     error_count: int = 0
+    duplicate_file: bool = Field(
+        default=False, description="Файл уже загружался — возвращён прежний результат"
+    )
     errors: list[dict[str, Any]] = Field(default_factory=list)
 
 
+class ExportFormat(str, Enum):
+    """Формат файла экспорта"""
+
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+
+class ExportCompression(str, Enum):
+    """Сжатие файла фонового экспорта"""
+
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+
 class CSVExportRequest(BaseModel):
-    """Параметры экспорта в CSV"""
+    """Параметры экспорта (CSV или колоночные форматы)"""
 
     start_date: date | None = None
     end_date: date | None = None
@@ -53,3 +92,13 @@ class CSVExportRequest(BaseModel):
         ]
     )
     date_format: str = "%Y-%m-%d"
+    format: ExportFormat = ExportFormat.CSV
+
+
+class CSVExportJob(BaseModel):
+    """Фоновый экспорт поставлен в очередь: статус — /tasks/{task_id}/status"""
+
+    task_id: str
+    status: str = "pending"
+    status_url: str
+    download_url: str
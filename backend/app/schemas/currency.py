@@ -1,8 +1,10 @@
 """Pydantic схемы для валют и курсов"""
 
 from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
 import uuid
-from pydantic import BaseModel, Field, condecimal
+from pydantic import BaseModel, Field, condecimal, field_validator, model_validator
 
 
 class CurrencyBase(BaseModel):
@@ -34,7 +36,107 @@ class ExchangeRateBase(BaseModel):
 class ExchangeRate(ExchangeRateBase):
     """Схема курса с полными данными"""
 
-    id: uuid.UUID
-    created_at: datetime
+    # Пусты у выведенных курсов (обратных и кросс), которых нет в БД
+    id: uuid.UUID | None = None
+    created_at: datetime | None = None
 
     model_config = {"from_attributes": True}
+
+
+# Максимум позиций в одном запросе пакетной конвертации
+MAX_CONVERSION_ITEMS = 10000
+
+
+class ConversionItem(BaseModel):
+    """Позиция пакетной конвертации"""
+
+    amount: Decimal
+    from_currency: str = Field(..., min_length=3, max_length=3)
+    to_currency: str = Field(..., min_length=3, max_length=3)
+    date: date
+
+
+class ConversionRequest(BaseModel):
+    """Запрос пакетной конвертации"""
+
+    items: list[ConversionItem] = Field(
+        ..., min_length=1, max_length=MAX_CONVERSION_ITEMS
+    )
+
+
+class ConversionResult(ConversionItem):
+    """Результат конвертации позиции (в порядке запроса)"""
+
+    rate: Decimal | None = None
+    rate_date: date | None = None
+    converted: Decimal | None = None
+    error: str | None = None
+
+
+class ConversionResponse(BaseModel):
+    """Ответ пакетной конвертации"""
+
+    results: list[ConversionResult]
+    error_count: int
+
+
+class RateKey(BaseModel):
+    """Пара валют и дата курса"""
+
+    from_currency: str = Field(..., min_length=3, max_length=3)
+    to_currency: str = Field(..., min_length=3, max_length=3)
+    date: date
+
+
+class RateLookupRequest(BaseModel):
+    """Курсы для набора пар и дат (переоценка по курсу на дату операции)"""
+
+    keys: list[RateKey] = Field(..., min_length=1, max_length=MAX_CONVERSION_ITEMS)
+
+
+class RateLookupResult(RateKey):
+    """Курс для ключа запроса; rate пуст, если курс не вывести"""
+
+    rate: Decimal | None = None
+    rate_date: date | None = None
+
+
+class BackfillSource(str, Enum):
+    """Источник исторических курсов"""
+
+    API = "api"
+    FILE = "file"
+
+
+class ExchangeRateBackfillRequest(BaseModel):
+    """Загрузка исторических курсов за период"""
+
+    start_date: date
+    end_date: date
+    base_currency: str = Field("USD", min_length=3, max_length=3)
+    source: BackfillSource = BackfillSource.API
+    # CSV в каталоге EXCHANGE_RATE_BACKFILL_DIR (для source=file)
+    file_path: str | None = Field(None, min_length=1)
+
+    @field_validator("end_date")
+    @classmethod
+    def validate_date_range(cls, v, info):
+        """Проверить что end_date не раньше start_date"""
+        if "start_date" in info.data and v < info.data["start_date"]:
+            raise ValueError("end_date must not be before start_date")
+        return v
+
+    @model_validator(mode="after")
+    def validate_file_source(self):
+        """file_path обязателен для source=file"""
+        if self.source == BackfillSource.FILE and not self.file_path:
+            raise ValueError("file_path is required for source=file")
+        return self
+
+
+class ExchangeRateBackfillJob(BaseModel):
+    """Загрузка поставлена в очередь: статус — /tasks/{task_id}/status"""
+
+    task_id: str
+    status: str = "pending"
+    status_url: str
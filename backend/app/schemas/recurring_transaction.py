@@ -78,3 +78,30 @@ class RecurringTransaction(RecurringTransactionBase):
     is_active: bool = Field(..., alias="isActive")
     created_at: datetime = Field(..., alias="createdAt")
     updated_at: datetime = Field(..., alias="updatedAt")
+
+
+class CashFlowPoint(BaseModel):
+    """Прогноз денежного потока за день или месяц"""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    period: str = Field(..., description="Дата (YYYY-MM-DD) или месяц (YYYY-MM)")
+    income: Decimal
+    expense: Decimal
+    net: Decimal
+    balance: Decimal = Field(..., description="Накопленный net с начала окна")
+
+
+class CashFlowForecast(BaseModel):
+    """Прогноз денежного потока по активным шаблонам"""
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    start: date
+    until: date
+    currency: str
+    occurrences: int
+    total_income: Decimal = Field(..., alias="totalIncome")
+    total_expense: Decimal = Field(..., alias="totalExpense")
+    days: list[CashFlowPoint]
+    months: list[CashFlowPoint]
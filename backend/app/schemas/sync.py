@@ -0,0 +1,46 @@
+"""Pydantic схемы ленты изменений (delta sync)"""
+
+from datetime import datetime
+from enum import Enum
+from typing import List
+import uuid
+
+from pydantic import BaseModel
+
+from app.schemas.budget import Budget
+from app.schemas.category import Category
+from app.schemas.recurring_transaction import RecurringTransaction
+from app.schemas.transaction import Transaction
+
+
+class SyncEntityType(str, Enum):
+    """Тип сущности в ленте изменений"""
+
+    CATEGORY = "category"
+    RECURRING_TRANSACTION = "recurring_transaction"
+    TRANSACTION = "transaction"
+    BUDGET = "budget"
+
+
+class SyncDeletion(BaseModel):
+    """Удалённая сущность (надгробие)"""
+
+    entity_type: SyncEntityType
+    id: uuid.UUID
+    deleted_at: datetime
+
+
+class SyncChanges(BaseModel):
+    """
+    Изменения после токена since. Созданные и изменённые сущности приходят
+    целиком, удалённые — в deleted. next_token передаётся в следующий запрос;
+    при has_more=true нужно сразу запросить следующую страницу.
+    """
+
+    categories: List[Category] = []
+    recurring_transactions: List[RecurringTransaction] = []
+    transactions: List[Transaction] = []
+    budgets: List[Budget] = []
+    deleted: List[SyncDeletion] = []
+    next_token: str
+    has_more: bool
@@ -1,13 +1,25 @@
 """Сервис для работы с бюджетами"""
 
+from datetime import date, datetime
 from typing import List
 from decimal import Decimal
 import uuid
 
 from app.repositories.budget import BudgetRepository
+from app.repositories.budget_spend import BudgetSpendRepository
 from app.repositories.category import CategoryRepository
 from app.repositories.transaction import TransactionRepository
-from app.schemas.budget import BudgetCreate, BudgetUpdate, Budget, BudgetProgress
+from app.schemas.budget import (
+    BudgetCreate,
+    BudgetUpdate,
+    Budget,
+    BudgetPeriod,
+    BudgetForecast,
+    BudgetProgress,
+    BudgetThresholdEvent,
+)
+from app.services.budget_forecast import forecast_budgets
+from app.services.budget_spend import BudgetSpendService
 from app.core.exceptions import NotFoundException, ConflictException
 
 
@@ -19,10 +31,14 @@ class BudgetService:
         budget_repo: BudgetRepository,
         category_repo: CategoryRepository,
         transaction_repo: TransactionRepository,
+        budget_spend: BudgetSpendService | None = None,
     ):
         self.budget_repo = budget_repo
         self.category_repo = category_repo
         self.transaction_repo = transaction_repo
+        self.budget_spend = budget_spend or BudgetSpendService(
+            BudgetSpendRepository(budget_repo.session)
+        )
 
     async def create_budget(self, data: BudgetCreate) -> Budget:
         """Создать бюджет"""
@@ -51,6 +67,9 @@ class BudgetService:
         }
 
         budget = await self.budget_repo.create(**budget_data)
+        # Счётчик расходов: транзакции периода могли появиться раньше бюджета
+        await self.budget_spend.recalculate(budget.id, budget.amount)
+        await self.budget_repo.session.commit()
         return Budget.model_validate(budget)
 
     async def get_budget(self, budget_id: uuid.UUID) -> Budget:
@@ -77,9 +96,16 @@ class BudgetService:
             if not category:
                 raise NotFoundException("Category not found")
 
+        old_amount = existing.amount
+        old_spent = await self.budget_spend.spend_repo.get_spent(budget_id)
         updated = await self.budget_repo.update(
             budget_id, **data.model_dump(exclude_unset=True)
         )
+        # Категория, период или сумма могли измениться — пересчитать счётчик
+        await self.budget_spend.recalculate(
+            budget_id, updated.amount, old_spent, old_amount
+        )
+        await self.budget_repo.session.commit()
         return Budget.model_validate(updated)
 
     async def delete_budget(self, budget_id: uuid.UUID) -> None:
@@ -94,19 +120,64 @@ class BudgetService:
         if not budget:
             raise NotFoundException("Budget not found")
 
-        # Получить транзакции за период бюджета
-        transactions = await self.transaction_repo.get_by_date_range(
-            budget.start_date, budget.end_date
+        # Счётчик расходов (без конвертации валют, упрощённо); для бюджета
+        # без счётчика сумма считается по транзакциям
+        spent = await self.budget_spend.spend_repo.get_spent(budget_id)
+        if spent is None:
+            spent = await self.transaction_repo.sum_amount(
+                budget.category_id, "expense", budget.start_date, budget.end_date
+            )
+        return self._build_progress(budget, spent)
+
+    async def list_budget_progress(
+        self, active_on: date | None = None, period: BudgetPeriod | None = None
+    ) -> List[BudgetProgress]:
+        """Прогресс всех бюджетов (с фильтрами) одним запросом к БД"""
+        rows = await self.budget_repo.get_all_with_spent(
+            active_on=active_on, period=period.value if period else None
         )
+        return [self._build_progress(budget, spent) for budget, spent in rows]
 
-        # Рассчитать сумму расходов по категории
-        spent = Decimal(0)
-        for t in transactions:
-            if t.category_id == budget.category_id and t.type == "expense":
-                # Конвертировать в USD если нужно (упрощённо)
-                spent += t.amount
+    async def get_budget_forecast(
+        self, budget_id: uuid.UUID, as_of: date | None = None
+    ) -> BudgetForecast:
+        """Прогноз расходов бюджета к концу периода"""
+        budget = await self.budget_repo.get_by_id(budget_id)
+        if not budget:
+            raise NotFoundException("Budget not found")
+        forecasts = await self._forecast([budget], as_of or date.today())
+        return forecasts[0]
 
-        # Рассчитать остаток и процент
+    async def list_budget_forecasts(
+        self,
+        as_of: date | None = None,
+        active_on: date | None = None,
+        period: BudgetPeriod | None = None,
+    ) -> List[BudgetForecast]:
+        """Прогноз для всех бюджетов (с фильтрами)"""
+        budgets = await self.budget_repo.get_filtered(
+            active_on=active_on, period=period.value if period else None
+        )
+        return await self._forecast(budgets, as_of or date.today())
+
+    async def _forecast(self, budgets: list, as_of: date) -> List[BudgetForecast]:
+        if not budgets:
+            return []
+        daily = await self.budget_repo.get_daily_spend([b.id for b in budgets], as_of)
+        return forecast_budgets(budgets, daily, as_of)
+
+    async def list_threshold_events(
+        self,
+        since: datetime | None = None,
+        budget_id: uuid.UUID | None = None,
+        limit: int = 100,
+    ) -> List[BudgetThresholdEvent]:
+        """События пересечения порогов расходов (новые первыми)"""
+        return await self.budget_spend.list_events(since, budget_id, limit)
+
+    @staticmethod
+    def _build_progress(budget, spent: Decimal) -> BudgetProgress:
+        """Рассчитать остаток и процент по потраченной сумме"""
         remaining = budget.amount - spent
         percentage = (spent / budget.amount * 100) if budget.amount > 0 else Decimal(0)
 
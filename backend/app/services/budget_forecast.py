@@ -0,0 +1,126 @@
+"""
+Прогноз расходов бюджета к концу периода по дневному ряду расходов.
+
+Дневные суммы текущего и предыдущего периода приходят одним агрегированным
+запросом и раскладываются в матрицу NumPy (бюджет × день), выровненную по
+правому краю — последней учтённой дате. Скорость расходов — скользящее
+среднее за FORECAST_WINDOW_DAYS дней, посчитанное через cumsum сразу для
+всех бюджетов; в начале периода окно захватывает хвост предыдущего.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List, Sequence, Tuple
+import uuid
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from app.models.budget import Budget as BudgetModel
+from app.schemas.budget import Budget, BudgetForecast
+
+FORECAST_WINDOW_DAYS = 14
+_CENT = Decimal("0.01")
+
+# Дневной расход: (budget_id, дата, сумма)
+DailySpend = Tuple[uuid.UUID, date, Decimal]
+
+
+def prior_period_start(budget: BudgetModel) -> date:
+    """Начало предыдущего периода (месяц или год до start_date)"""
+    if budget.period == "yearly":
+        return budget.start_date - relativedelta(years=1)
+    return budget.start_date - relativedelta(months=1)
+
+
+def _cutoff(budget: BudgetModel, as_of: date) -> date:
+    """Последняя учитываемая дата: as_of внутри периода, не позже его конца"""
+    return max(min(as_of, budget.end_date), budget.start_date - timedelta(days=1))
+
+
+def _money(cents: float) -> Decimal:
+    return (Decimal(str(round(cents))) / 100).quantize(_CENT)
+
+
+def forecast_budgets(
+    budgets: Sequence[BudgetModel],
+    daily: Sequence[DailySpend],
+    as_of: date,
+    window: int = FORECAST_WINDOW_DAYS,
+) -> List[BudgetForecast]:
+    """Прогноз расходов к концу периода для всех бюджетов сразу"""
+    if not budgets:
+        return []
+
+    n = len(budgets)
+    index = {b.id: i for i, b in enumerate(budgets)}
+    cutoffs = [_cutoff(b, as_of) for b in budgets]
+    # Длина ряда бюджета: от начала предыдущего периода до cutoff
+    lengths = np.array(
+        [(c - prior_period_start(b)).days + 1 for b, c in zip(budgets, cutoffs)]
+    )
+    width = max(int(lengths.max()), window)
+
+    # Матрица дневных расходов в копейках (суммы целые — без ошибок
+    # округления float), последний столбец — cutoff каждого бюджета
+    series = np.zeros((n, width))
+    if daily:
+        rows = np.array([index[budget_id] for budget_id, _, _ in daily])
+        offsets = np.array(
+            [(cutoffs[index[budget_id]] - day).days for budget_id, day, _ in daily]
+        )
+        amounts = np.array([int(amount * 100) for _, _, amount in daily], dtype=float)
+        inside = (offsets >= 0) & (offsets < width)
+        np.add.at(series, (rows[inside], width - 1 - offsets[inside]), amounts[inside])
+
+    columns = np.arange(width)
+    # Первый столбец текущего периода (для будущих бюджетов — за краем матрицы)
+    start_columns = np.array(
+        [width - 1 - (c - b.start_date).days for b, c in zip(budgets, cutoffs)]
+    )
+    prior_columns = width - lengths
+    current_mask = columns[None, :] >= start_columns[:, None]
+    prior_mask = (columns[None, :] >= prior_columns[:, None]) & ~current_mask
+
+    spent = (series * current_mask).sum(axis=1)
+    prior_spent = (series * prior_mask).sum(axis=1)
+
+    # Скользящее среднее по окну через cumsum; берётся значение на cutoff
+    cumulative = np.cumsum(series, axis=1)
+    padded = np.concatenate([np.zeros((n, 1)), cumulative], axis=1)
+    rolling = (padded[:, window:] - padded[:, :-window]) / window
+    daily_rate = rolling[:, -1]
+
+    period_days = np.array([(b.end_date - b.start_date).days + 1 for b in budgets])
+    elapsed = np.clip(
+        np.array([(c - b.start_date).days + 1 for b, c in zip(budgets, cutoffs)]),
+        0,
+        period_days,
+    )
+    remaining_days = period_days - elapsed
+    projected = spent + daily_rate * remaining_days
+
+    forecasts = []
+    for i, budget in enumerate(budgets):
+        amount = budget.amount
+        projected_spend = _money(projected[i])
+        forecasts.append(
+            BudgetForecast(
+                budget=Budget.model_validate(budget),
+                as_of=as_of,
+                days_elapsed=int(elapsed[i]),
+                days_remaining=int(remaining_days[i]),
+                spent=_money(spent[i]),
+                prior_period_spent=_money(prior_spent[i]),
+                daily_rate=_money(daily_rate[i]),
+                projected_spend=projected_spend,
+                projected_remaining=amount - projected_spend,
+                projected_percentage=(
+                    (projected_spend / amount * 100).quantize(_CENT)
+                    if amount > 0
+                    else Decimal(0)
+                ),
+                will_exceed=projected_spend > amount,
+            )
+        )
+    return forecasts
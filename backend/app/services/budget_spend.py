@@ -0,0 +1,127 @@
+"""
+Инкрементальные счётчики расходов бюджетов и события порогов.
+
+Счётчик меняется в той же транзакции БД, что и расходная транзакция,
+поэтому прогресс бюджета читается одной строкой, а пересечение порога
+(например, 80% и 100%) фиксируется событием в момент записи.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+from datetime import date, datetime
+from typing import Iterable, List, Tuple
+import uuid
+
+from app.core.config import settings
+from app.repositories.budget_spend import BudgetSpendRepository
+from app.schemas.budget import BudgetThresholdEvent
+
+# Изменение расходов: (category_id, дата транзакции, ±сумма)
+SpendChange = Tuple[uuid.UUID, date, Decimal]
+
+
+def parse_thresholds(value: str) -> List[int]:
+    """Пороги в процентах из строки настроек ("80,100")"""
+    return sorted({int(item) for item in value.split(",") if item.strip()} - {0})
+
+
+def expense_change(
+    category_id: uuid.UUID, transaction_date: date, amount: Decimal, type: str
+) -> List[SpendChange]:
+    """Вклад транзакции в расходы: доходы бюджеты не затрагивают"""
+    if type != "expense":
+        return []
+    return [(category_id, transaction_date, amount)]
+
+
+class BudgetSpendService:
+    """Обновление счётчиков расходов бюджетов (без commit)"""
+
+    def __init__(
+        self, spend_repo: BudgetSpendRepository, thresholds: List[int] | None = None
+    ):
+        self.spend_repo = spend_repo
+        self.thresholds = (
+            thresholds
+            if thresholds is not None
+            else parse_thresholds(settings.BUDGET_ALERT_THRESHOLDS)
+        )
+
+    def _crossed(
+        self,
+        budget_id: uuid.UUID,
+        old_spent: Decimal,
+        old_amount: Decimal,
+        new_spent: Decimal,
+        new_amount: Decimal,
+    ) -> List[dict]:
+        """События порогов, которые расходы пересекли снизу вверх"""
+        events = []
+        for threshold in self.thresholds:
+            was_reached = old_spent * 100 >= old_amount * threshold
+            is_reached = new_spent * 100 >= new_amount * threshold
+            if is_reached and not was_reached:
+                events.append(
+                    {
+                        "budget_id": budget_id,
+                        "threshold": threshold,
+                        "spent": new_spent,
+                        "budget_amount": new_amount,
+                    }
+                )
+        return events
+
+    async def apply(self, changes: Iterable[SpendChange]) -> None:
+        """Учесть изменения расходов в счётчиках и записать события порогов"""
+        totals: dict[tuple[uuid.UUID, date], Decimal] = defaultdict(Decimal)
+        for category_id, transaction_date, amount in changes:
+            totals[(category_id, transaction_date)] += amount
+        deltas = [(c, d, amount) for (c, d), amount in totals.items() if amount]
+        if not deltas:
+            return
+
+        rows = await self.spend_repo.apply_deltas(deltas)
+        events = []
+        for row in rows:
+            events += self._crossed(
+                row.budget_id,
+                row.spent - row.delta,
+                row.budget_amount,
+                row.spent,
+                row.budget_amount,
+            )
+        await self.spend_repo.add_events(events)
+
+    async def recalculate(
+        self,
+        budget_id: uuid.UUID,
+        budget_amount: Decimal,
+        old_spent: Decimal | None = None,
+        old_amount: Decimal | None = None,
+    ) -> Decimal:
+        """
+        Пересчитать счётчик бюджета целиком (создание бюджета, смена
+        категории, периода или суммы). Без прежних значений считается, что
+        расходов не было.
+        """
+        spent = await self.spend_repo.recalculate(budget_id)
+        await self.spend_repo.add_events(
+            self._crossed(
+                budget_id,
+                old_spent if old_spent is not None else Decimal(0),
+                old_amount if old_amount is not None else budget_amount,
+                spent,
+                budget_amount,
+            )
+        )
+        return spent
+
+    async def list_events(
+        self,
+        since: datetime | None = None,
+        budget_id: uuid.UUID | None = None,
+        limit: int = 100,
+    ) -> List[BudgetThresholdEvent]:
+        """События пересечения порогов"""
+        events = await self.spend_repo.list_events(since, budget_id, limit)
+        return [BudgetThresholdEvent.model_validate(e) for e in events]
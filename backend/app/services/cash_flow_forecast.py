@@ -0,0 +1,103 @@
+"""
+Прогноз денежного потока по шаблонам повторяющихся транзакций.
+
+Будущие даты всех активных шаблонов разворачиваются пакетно
+(expand_schedules), суммы складываются по дням и месяцам через
+np.bincount в копейках по смещению дня в окне — без цикла по датам
+и без сортировки.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Sequence
+
+import numpy as np
+from sqlalchemy import Row
+
+from app.schemas.recurring_transaction import CashFlowForecast, CashFlowPoint
+from app.services.analytics import convert_from_rub, convert_to_rub
+from app.core.recurrence import expand_schedules
+
+_CENT = Decimal("0.01")
+
+
+def _money(cents: float) -> Decimal:
+    return (Decimal(int(round(cents))) / 100).quantize(_CENT)
+
+
+def _points(
+    periods: np.ndarray, income: np.ndarray, expense: np.ndarray
+) -> list[CashFlowPoint]:
+    """Точки ряда с накопленным балансом (периоды уже отсортированы)"""
+    net = income - expense
+    balance = np.cumsum(net)
+    return [
+        CashFlowPoint(
+            period=str(periods[i]),
+            income=_money(income[i]),
+            expense=_money(expense[i]),
+            net=_money(net[i]),
+            balance=_money(balance[i]),
+        )
+        for i in range(len(periods))
+    ]
+
+
+def forecast_cash_flow(
+    templates: Sequence[Row], start: date, until: date, currency: str = "RUB"
+) -> CashFlowForecast:
+    """
+    Прогноз доходов, расходов и баланса по дням и месяцам окна [start, until].
+    templates — строки (amount, currency, type, frequency, interval,
+    next_occurrence, end_date). Суммы приводятся к currency по курсам аналитики.
+    """
+    schedules = [
+        (
+            t.frequency,
+            t.interval,
+            t.next_occurrence,
+            min(until, t.end_date) if t.end_date else until,
+        )
+        for t in templates
+    ]
+    cents = np.array(
+        [
+            int(
+                (
+                    convert_from_rub(convert_to_rub(t.amount, t.currency), currency)
+                    * 100
+                ).quantize(Decimal(1))
+            )
+            for t in templates
+        ],
+        dtype=float,
+    )
+    is_income = np.array([t.type == "income" for t in templates], dtype=bool)
+
+    rows, dates = expand_schedules(schedules, start)
+    # Суммы по дням окна: bincount по смещению от start (без сортировки)
+    width = (until - start).days + 1
+    offsets = (dates - np.datetime64(start, "D")).astype(int)
+    amounts = cents[rows]
+    income = np.bincount(offsets, weights=amounts * is_income[rows], minlength=width)
+    expense = np.bincount(offsets, weights=amounts * ~is_income[rows], minlength=width)
+    window = np.datetime64(start, "D") + np.arange(width)
+    active = (income != 0) | (expense != 0)
+
+    # Месяцы: свёртка дневных сумм по номеру месяца окна
+    months = window.astype("datetime64[M]")
+    month_index = (months - months[0]).astype(int)
+    return CashFlowForecast(
+        start=start,
+        until=until,
+        currency=currency,
+        occurrences=len(dates),
+        total_income=_money(income.sum()),
+        total_expense=_money(expense.sum()),
+        days=_points(window[active], income[active], expense[active]),
+        months=_points(
+            np.unique(months),
+            np.bincount(month_index, weights=income),
+            np.bincount(month_index, weights=expense),
+        ),
+    )
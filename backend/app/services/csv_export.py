@@ -1,18 +1,265 @@
-"""Сервис экспорта транзакций в CSV"""
+"""Сервис экспорта транзакций (CSV, NDJSON, Parquet, Arrow)"""
 
+import asyncio
 import csv
+import re
 from io import StringIO
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable
 import uuid
 
+from sqlalchemy import Row
+
+from app.core.config import settings
+from app.core.exceptions import ConflictException, NotFoundException
+from app.repositories.task_result import TaskResultRepository
 from app.repositories.transaction import TransactionRepository
+from app.schemas.csv_import import (
+    CSVExportJob,
+    CSVExportRequest,
+    ExportCompression,
+    ExportFormat,
+)
+from app.services.export_artifacts import (
+    artifact_path,
+    ensure_compression_available,
+    write_artifact,
+)
+from app.services.export_formats import (
+    COLUMNAR_BATCH_SIZE,
+    ensure_format_available,
+    iter_arrow,
+    iter_ndjson,
+)
+
+# Колонки экспорта по умолчанию (и формат /transactions/export)
+DEFAULT_EXPORT_COLUMNS = [
+    "amount",
+    "currency",
+    "category_name",
+    "description",
+    "transaction_date",
+    "type",
+]
+# Строк на одну пачку серверного курсора и один отправляемый блок ответа
+EXPORT_BATCH_SIZE = 2000
+# Сколько блоков COPY может ждать отправки клиенту (ограничивает память)
+COPY_QUEUE_SIZE = 16
+# Как часто (в строках) фоновый экспорт сообщает о прогрессе
+PROGRESS_EVERY_ROWS = 50_000
+
+# Директивы strftime, которые to_char выражает так же, как Python (локаль C)
+_STRFTIME_TO_CHAR = {
+    "%Y": "YYYY",
+    "%y": "YY",
+    "%m": "MM",
+    "%d": "DD",
+    "%j": "DDD",
+    "%b": "Mon",
+    "%B": "FMMonth",
+    "%a": "Dy",
+    "%A": "FMDay",
+    "%H": "HH24",
+    "%M": "MI",
+    "%S": "SS",
+}
+_STRFTIME_TOKEN = re.compile(r"%.|[^%]+|%$")
+
+
+def strftime_to_char(date_format: str) -> str | None:
+    """
+    Перевести формат strftime в шаблон to_char. Литеральный текст берётся в
+    двойные кавычки; None — формат не выразим (тогда экспорт идёт через Python).
+    """
+    parts = []
+    for token in _STRFTIME_TOKEN.findall(date_format):
+        if token in _STRFTIME_TO_CHAR:
+            parts.append(_STRFTIME_TO_CHAR[token])
+            continue
+        if token == "%%":
+            token = "%"
+        elif token.startswith("%"):
+            return None
+        if '"' in token or "\\" in token:
+            return None
+        parts.append(f'"{token}"')
+    return "".join(parts) or None
+
+
+def _column_getters(columns: list[str], date_format: str) -> list[Callable[[Row], str]]:
+    """Функции форматирования значения для каждой колонки (неизвестные — пустые)."""
+    getters: dict[str, Callable[[Row], str]] = {
+        "id": lambda r: str(r.id),
+        "amount": lambda r: str(r.amount),
+        "currency": lambda r: r.currency,
+        "category_id": lambda r: str(r.category_id),
+        "category_name": lambda r: r.category_name or "",
+        "description": lambda r: r.description or "",
+        "transaction_date": lambda r: r.transaction_date.strftime(date_format),
+        "type": lambda r: r.type,
+    }
+    return [getters.get(c, lambda r: "") for c in columns]
 
 
 class CSVExportService:
-    """Сервис экспорта транзакций в CSV с выбором колонок и формата даты."""
+    """
+    Сервис экспорта транзакций с выбором колонок: CSV (с форматом даты),
+    NDJSON, Parquet и Arrow IPC. CSV с use_copy=True выгружается через
+    COPY ... TO STDOUT, иначе (и для форматов даты, которые не выразить
+    через to_char) — через Python.
+    """
 
-    def __init__(self, transaction_repo: TransactionRepository):
+    def __init__(
+        self,
+        transaction_repo: TransactionRepository,
+        use_copy: bool = False,
+        task_result_repo: TaskResultRepository | None = None,
+    ):
         self.transaction_repo = transaction_repo
+        self.use_copy = use_copy
+        self.task_result_repo = task_result_repo
+
+    async def stream_csv(
+        self,
+        start_date: date | None,
+        end_date: date | None,
+        category_id: uuid.UUID | None,
+        columns: list[str],
+        date_format: str,
+    ) -> AsyncIterator[bytes]:
+        """Потоковый экспорт в CSV блоками байтов (UTF-8); сессия закрывается в конце."""
+        to_char_format = strftime_to_char(date_format) if self.use_copy else None
+        try:
+            if to_char_format is not None:
+                chunks = self._stream_copy(
+                    start_date, end_date, category_id, columns, to_char_format
+                )
+                async for chunk in chunks:
+                    yield chunk
+            else:
+                chunks = self._stream_rows(
+                    start_date, end_date, category_id, columns, date_format
+                )
+                async for text in chunks:
+                    yield text.encode("utf-8")
+        finally:
+            # FastAPI закрывает yield-зависимости до отправки тела StreamingResponse,
+            # так что выгрузка работает в новой транзакции сессии — освобождаем её сами.
+            await self.transaction_repo.session.close()
+
+    async def stream_export(
+        self,
+        export_format: ExportFormat,
+        start_date: date | None,
+        end_date: date | None,
+        category_id: uuid.UUID | None,
+        columns: list[str],
+        date_format: str,
+    ) -> AsyncIterator[bytes]:
+        """
+        Потоковый экспорт в выбранном формате. date_format применяется только
+        к CSV: в остальных форматах дата типизирована (date32 / ISO 8601).
+        """
+        if export_format == ExportFormat.CSV:
+            async for chunk in self.stream_csv(
+                start_date, end_date, category_id, columns, date_format
+            ):
+                yield chunk
+            return
+
+        ensure_format_available(export_format)
+        batches = self.transaction_repo.stream_export_rows(
+            start_date, end_date, category_id, batch_size=COLUMNAR_BATCH_SIZE
+        )
+        if export_format == ExportFormat.NDJSON:
+            chunks = iter_ndjson(batches, columns)
+        else:
+            chunks = iter_arrow(batches, columns, export_format)
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await self.transaction_repo.session.close()
+
+    async def _stream_copy(
+        self,
+        start_date: date | None,
+        end_date: date | None,
+        category_id: uuid.UUID | None,
+        columns: list[str],
+        to_char_format: str,
+    ) -> AsyncIterator[bytes]:
+        """
+        Отдавать блоки COPY TO STDOUT по мере поступления. Очередь ограничена,
+        поэтому медленный клиент притормаживает чтение COPY, а не копит память.
+        """
+        queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=COPY_QUEUE_SIZE)
+
+        async def output(data: bytes | bytearray | memoryview) -> None:
+            # asyncpg отдаёт изменяемый буфер — копируем в bytes для ответа
+            await queue.put(bytes(data))
+
+        async def produce() -> None:
+            try:
+                await self.transaction_repo.copy_export_csv(
+                    columns,
+                    to_char_format,
+                    output,
+                    start_date=start_date,
+                    end_date=end_date,
+                    category_id=category_id,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await queue.put(None)
+                raise
+            await queue.put(None)
+
+        task = asyncio.create_task(produce())
+        try:
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    async def _stream_rows(
+        self,
+        start_date: date | None,
+        end_date: date | None,
+        category_id: uuid.UUID | None,
+        columns: list[str],
+        date_format: str,
+    ) -> AsyncIterator[str]:
+        """
+        Экспорт через Python: строки читаются серверным курсором пачками и
+        пишутся через один переиспользуемый буфер, поэтому память не растёт
+        с размером выгрузки.
+        """
+        getters = _column_getters(columns, date_format)
+        buffer = StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_MINIMAL)
+
+        def drain() -> str:
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            return chunk
+
+        writer.writerow(columns)
+        yield drain()
+        async for rows in self.transaction_repo.stream_export_rows(
+            start_date, end_date, category_id, batch_size=EXPORT_BATCH_SIZE
+        ):
+            writer.writerows([get(r) for get in getters] for r in rows)
+            yield drain()
 
     async def export_csv(
         self,
@@ -22,36 +269,133 @@ class CSVExportService:
         columns: list[str],
         date_format: str,
     ) -> str:
-        """Экспорт в CSV с заданными колонками и форматом даты."""
-        transactions, _ = await self.transaction_repo.get_filtered(
-            start_date=start_date,
-            end_date=end_date,
-            category_id=category_id,
-            limit=100_000,
+        """Экспорт в CSV одной строкой (для небольших выгрузок и фоновых задач)."""
+        chunks = [
+            chunk
+            async for chunk in self.stream_csv(
+                start_date, end_date, category_id, columns, date_format
+            )
+        ]
+        return b"".join(chunks).decode("utf-8")
+
+    async def enqueue_export(
+        self, params: CSVExportRequest, compression: ExportCompression
+    ) -> CSVExportJob:
+        """
+        Поставить экспорт в очередь Celery. TaskResult (csv_export, pending)
+        создаётся заранее, прогресс и итог — через /tasks/{task_id}/status.
+        """
+        from app.tasks.csv_tasks import export_csv_task
+
+        ensure_format_available(params.format)
+        ensure_compression_available(compression)
+        args = (params.model_dump(mode="json"), compression.value)
+        if self.task_result_repo is None:
+            task_id = export_csv_task.delay(*args).id
+        else:
+            task_id = str(uuid.uuid4())
+            await self.task_result_repo.create(
+                task_id=task_id, task_type="csv_export", status="pending"
+            )
+            try:
+                export_csv_task.apply_async(args=args, task_id=task_id)
+            except Exception as e:
+                await self.task_result_repo.update_status(
+                    task_id, "failed", error=str(e)
+                )
+                raise
+        return CSVExportJob(
+            task_id=task_id,
+            status_url=f"{settings.API_V1_PREFIX}/tasks/{task_id}/status",
+            download_url=_download_url(task_id),
         )
 
-        output = StringIO()
-        writer = csv.DictWriter(
-            output,
-            fieldnames=columns,
-            quoting=csv.QUOTE_MINIMAL,
+    async def export_to_artifact(
+        self,
+        task_id: str,
+        params: CSVExportRequest,
+        compression: ExportCompression,
+        on_progress: Callable[[dict[str, Any]], Awaitable[None]] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Записать экспорт в сжатый файл задачи; on_progress получает
+        промежуточный результат (processed_rows / total_rows / progress).
+        Для CSV и NDJSON строки считаются по переводам строк, колоночные
+        форматы сообщают прогресс только по завершении.
+        Возвращает итоговый result для TaskResult.
+        """
+        total = await self.transaction_repo.count_export_rows(
+            params.start_date, params.end_date, params.category_id
         )
-        writer.writeheader()
-
-        for t in transactions:
-            row: dict[str, str] = {}
-            if "amount" in columns:
-                row["amount"] = str(t.amount)
-            if "currency" in columns:
-                row["currency"] = t.currency
-            if "category_name" in columns:
-                row["category_name"] = t.category.name if t.category else ""
-            if "description" in columns:
-                row["description"] = t.description or ""
-            if "transaction_date" in columns:
-                row["transaction_date"] = t.transaction_date.strftime(date_format)
-            if "type" in columns:
-                row["type"] = t.type
-            writer.writerow(row)
-
-        return output.getvalue()
+        # Строка заголовка CSV не считается строкой данных
+        header_lines = 1 if params.format == ExportFormat.CSV else 0
+        lines = 0
+        reported = 0
+
+        def snapshot(processed: int) -> dict[str, Any]:
+            return {
+                "total_rows": total,
+                "processed_rows": processed,
+                "progress": round(100 * processed / total, 1) if total else 100.0,
+                "format": params.format.value,
+                "compression": compression.value,
+            }
+
+        async def count_lines(chunk: bytes) -> None:
+            nonlocal lines, reported
+            lines += chunk.count(b"\n")
+            if on_progress is not None and lines - reported >= PROGRESS_EVERY_ROWS:
+                reported = lines
+                processed = min(max(lines - header_lines, 0), total)
+                await on_progress(snapshot(processed))
+
+        text_format = params.format in (ExportFormat.CSV, ExportFormat.NDJSON)
+        path = artifact_path(task_id, params.format, compression)
+        await write_artifact(
+            self.stream_export(
+                params.format,
+                params.start_date,
+                params.end_date,
+                params.category_id,
+                params.columns,
+                params.date_format,
+            ),
+            path,
+            compression,
+            count_lines if text_format else None,
+        )
+        expires_at = datetime.now(timezone.utc) + timedelta(
+            hours=settings.EXPORT_ARTIFACT_RETENTION_HOURS
+        )
+        return {
+            **snapshot(total),
+            "size_bytes": path.stat().st_size,
+            "download_url": _download_url(task_id),
+            "expires_at": expires_at.isoformat(),
+        }
+
+    async def get_artifact(
+        self, task_id: str
+    ) -> tuple[Path, ExportFormat, ExportCompression]:
+        """Файл завершённого фонового экспорта, его формат и сжатие."""
+        task_result = (
+            await self.task_result_repo.get_by_task_id(task_id)
+            if self.task_result_repo is not None
+            else None
+        )
+        if task_result is None or task_result.task_type != "csv_export":
+            raise NotFoundException("Export task not found")
+        if task_result.status != "completed":
+            raise ConflictException(
+                f"Export is not ready (status: {task_result.status})"
+            )
+        export_format = ExportFormat(task_result.result.get("format", "csv"))
+        compression = ExportCompression(task_result.result["compression"])
+        path = artifact_path(task_id, export_format, compression)
+        if not path.is_file():
+            raise NotFoundException("Export file has expired")
+        return path, export_format, compression
+
+
+def _download_url(task_id: str) -> str:
+    return f"{settings.API_V1_PREFIX}/csv/export/{task_id}/download"
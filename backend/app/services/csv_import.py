@@ -1,18 +1,27 @@
 """Сервис импорта транзакций из CSV"""
 
+import asyncio
 import base64
+import binascii
+import codecs
 import csv
+import hashlib
+import json
+from collections import defaultdict
+from dataclasses import dataclass
 from decimal import Decimal, InvalidOperation
-from io import StringIO
-from datetime import datetime
+from io import StringIO, TextIOWrapper
+from datetime import date, datetime
+from typing import AsyncIterator, BinaryIO, Callable, Iterable, Iterator
+import uuid
 
+from app.models.task_result import TaskResult
 from app.repositories.category import CategoryRepository
+from app.repositories.task_result import TaskResultRepository
 from app.schemas.csv_import import (
     CSVColumnMapping,
     CSVImportResult,
 )
-from app.schemas.transaction import TransactionCreate, TransactionType
-from app.schemas.category import CategoryCreate, CategoryType
 from app.services.transaction import TransactionService
 
 
@@ -31,7 +40,201 @@ VALID_CURRENCIES = {
 }
 MAX_DESCRIPTION_LENGTH = 500
 MAX_CATEGORY_NAME_LENGTH = 100
+# Numeric(10, 2) в transactions.amount
+MAX_AMOUNT = Decimal("99999999.99")
 CSV_BACKGROUND_THRESHOLD = 1000
+# Сколько валидных строк вставляется одним INSERT
+IMPORT_BATCH_SIZE = 1000
+DEFAULT_IMPORT_SOURCE = "csv"
+# Размер блока при потоковом чтении загруженного файла
+FILE_CHUNK_SIZE = 1024 * 1024
+# Размер блока Base64 при потоковом декодировании (кратен 4)
+BASE64_CHUNK_SIZE = 64 * 1024
+# Как часто проверка (dry run) отдаёт управление event loop
+DRY_RUN_YIELD_EVERY = 5000
+# Колонки CSV, которые отдаёт GET /transactions/export (формат /transactions/import)
+TRANSACTIONS_CSV_MAPPING = CSVColumnMapping(
+    amount="amount",
+    currency="currency",
+    category_name="category_name",
+    description="description",
+    transaction_date="transaction_date",
+    type="type",
+)
+
+
+class CSVRowError(ValueError):
+    """Строка CSV не прошла валидацию"""
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedRow:
+    """Провалидированная и нормализованная строка CSV"""
+
+    amount: Decimal
+    currency: str
+    category_name: str
+    description: str | None
+    transaction_date: date
+    type: str
+
+
+def parse_row(row: dict, mapping: CSVColumnMapping, date_format: str) -> ParsedRow:
+    """Провалидировать строку CSV. При ошибке бросает CSVRowError с текстом для отчёта."""
+    # Обязательные поля (требование 7.7)
+    amount_raw = (row.get(mapping.amount) or "").strip()
+    date_raw = (row.get(mapping.transaction_date) or "").strip()
+    if not amount_raw or not date_raw:
+        raise CSVRowError("Отсутствуют обязательные поля: сумма или дата")
+
+    # Сумма: число, > 0 (7.1, 7.2)
+    try:
+        amount = Decimal(amount_raw.replace(",", "."))
+    except (InvalidOperation, ValueError):
+        raise CSVRowError("Некорректный формат суммы")
+    if not amount.is_finite() or amount.as_tuple().exponent < -2:
+        raise CSVRowError("Некорректный формат суммы")
+    if amount <= 0:
+        raise CSVRowError("Сумма должна быть положительной")
+    if amount > MAX_AMOUNT:
+        raise CSVRowError("Сумма превышает допустимое значение")
+
+    # Дата (7.3)
+    try:
+        transaction_date = datetime.strptime(date_raw, date_format).date()
+    except ValueError:
+        raise CSVRowError("Некорректный формат даты")
+
+    # Тип (income/expense)
+    type_raw = (row.get(mapping.type) or "").strip().lower()
+    if type_raw not in ("income", "expense"):
+        raise CSVRowError(f"Недопустимый тип транзакции: {type_raw}")
+
+    # Нормализация суммы по типу (7.5, 7.6)
+    # В модели amount хранится положительным, тип задаётся отдельно
+    amount = abs(amount)
+
+    # Валюта (7.8)
+    currency_raw = (
+        (row.get(mapping.currency) or "USD").strip().upper()
+        if mapping.currency
+        else "USD"
+    )
+    if currency_raw and currency_raw not in VALID_CURRENCIES:
+        raise CSVRowError(f"Неизвестный код валюты: {currency_raw}")
+    currency = currency_raw or "USD"
+
+    # Категория: обрезка (7.9), лимит длины (7.10)
+    category_name = (row.get(mapping.category_name) or "").strip()[
+        :MAX_CATEGORY_NAME_LENGTH
+    ]
+    if not category_name:
+        category_name = "Без категории"
+
+    description_raw = (
+        (row.get(mapping.description) or "").strip() if mapping.description else ""
+    )
+    description = description_raw[:MAX_DESCRIPTION_LENGTH] if description_raw else None
+
+    return ParsedRow(
+        amount=amount,
+        currency=currency,
+        category_name=category_name,
+        description=description,
+        transaction_date=transaction_date,
+        type=type_raw,
+    )
+
+
+def row_fingerprint(import_source: str, row: ParsedRow, occurrence: int) -> str:
+    """
+    Стабильный отпечаток строки в рамках источника импорта.
+    occurrence — порядковый номер одинаковой строки в файле, чтобы две
+    одинаковые покупки за день не схлопнулись в одну.
+    """
+    parts = (
+        import_source,
+        row.transaction_date.isoformat(),
+        str(row.amount.quantize(Decimal("0.01"))),
+        row.currency,
+        row.type,
+        row.category_name,
+        row.description or "",
+        str(occurrence),
+    )
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _fingerprint_digest(
+    mapping: CSVColumnMapping, date_format: str, import_source: str
+):
+    """sha256, предзаполненный параметрами разбора (другой маппинг — другой импорт)."""
+    digest = hashlib.sha256()
+    header = json.dumps(
+        [import_source, mapping.model_dump(), date_format], sort_keys=True
+    )
+    digest.update(header.encode("utf-8"))
+    digest.update(b"\x00")
+    return digest
+
+
+def file_fingerprint(
+    csv_content: str,
+    mapping: CSVColumnMapping,
+    date_format: str,
+    import_source: str,
+) -> str:
+    """Отпечаток файла вместе с параметрами разбора."""
+    digest = _fingerprint_digest(mapping, date_format, import_source)
+    digest.update(csv_content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def iter_base64_lines(file_content: str) -> Iterator[str]:
+    """
+    Лениво декодировать Base64 (UTF-8) и отдавать строки CSV по одной.
+    Позволяет прервать разбор, не декодируя многомегабайтный файл целиком.
+    Бросает ValueError при неверном Base64 или кодировке.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending_b64 = ""
+    tail = ""
+    for start in range(0, len(file_content), BASE64_CHUNK_SIZE):
+        chunk = pending_b64 + "".join(
+            file_content[start : start + BASE64_CHUNK_SIZE].split()
+        )
+        usable = len(chunk) - len(chunk) % 4
+        pending_b64 = chunk[usable:]
+        try:
+            text = decoder.decode(base64.b64decode(chunk[:usable], validate=True))
+        except (binascii.Error, UnicodeDecodeError) as e:
+            raise ValueError(str(e)) from e
+        lines = (tail + text).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    try:
+        if pending_b64:
+            raise ValueError("Неполный блок Base64")
+        tail += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        raise ValueError(str(e)) from e
+    if tail:
+        yield tail
+
+
+def _ndjson(payload: dict) -> str:
+    return json.dumps(payload, ensure_ascii=False) + "\n"
+
+
+def _failed_result(message: str) -> CSVImportResult:
+    """Результат для файла, который не удалось даже прочитать."""
+    return CSVImportResult(
+        task_id="",
+        status="failed",
+        error_count=1,
+        errors=[{"row": 0, "error": message}],
+    )
 
 
 class CSVImportService:
@@ -41,181 +244,286 @@ class CSVImportService:
         self,
         transaction_service: TransactionService,
         category_repo: CategoryRepository,
+        task_result_repo: TaskResultRepository | None = None,
     ):
         self.transaction_service = transaction_service
         self.category_repo = category_repo
+        self.task_result_repo = task_result_repo
 
     async def import_csv(
         self,
         file_content: str,
         mapping: CSVColumnMapping,
         date_format: str = "%Y-%m-%d",
+        import_source: str = DEFAULT_IMPORT_SOURCE,
     ) -> CSVImportResult:
         """
         Импорт CSV. При более чем 1000 строках возвращает task_id для фоновой задачи.
         Иначе обрабатывает синхронно и возвращает результат.
+        Повторная загрузка того же файла возвращает результат прежнего импорта.
         """
         try:
             decoded = base64.b64decode(file_content).decode("utf-8")
         except Exception:
-            return CSVImportResult(
-                task_id="",
-                status="failed",
-                error_count=1,
-                errors=[{"row": 0, "error": "Неверное Base64 или кодировка файла"}],
+            return _failed_result("Неверное Base64 или кодировка файла")
+
+        return await self._dispatch(
+            fingerprint=file_fingerprint(decoded, mapping, date_format, import_source),
+            line_count=decoded.count("\n") + (1 if decoded.strip() else 0),
+            read_content=lambda: decoded,
+            lines=StringIO(decoded),
+            mapping=mapping,
+            date_format=date_format,
+            import_source=import_source,
+        )
+
+    async def import_file(
+        self,
+        file: BinaryIO,
+        mapping: CSVColumnMapping,
+        date_format: str = "%Y-%m-%d",
+        import_source: str = DEFAULT_IMPORT_SOURCE,
+    ) -> CSVImportResult:
+        """
+        Импорт из бинарного файла (UploadFile.file) без чтения целиком в память:
+        первый проход блоками считает отпечаток и число строк, второй — потоковый
+        разбор. Целиком файл читается только для передачи в фоновую задачу.
+        """
+        digest = _fingerprint_digest(mapping, date_format, import_source)
+        line_count = 0
+        has_content = False
+        for chunk in iter(lambda: file.read(FILE_CHUNK_SIZE), b""):
+            digest.update(chunk)
+            line_count += chunk.count(b"\n")
+            has_content = has_content or bool(chunk.strip())
+        file.seek(0)
+
+        def read_content() -> str:
+            file.seek(0)
+            return file.read().decode("utf-8")
+
+        lines = TextIOWrapper(file, encoding="utf-8", newline="")
+        try:
+            return await self._dispatch(
+                fingerprint=digest.hexdigest(),
+                line_count=line_count + (1 if has_content else 0),
+                read_content=read_content,
+                lines=lines,
+                mapping=mapping,
+                date_format=date_format,
+                import_source=import_source,
             )
+        except UnicodeDecodeError:
+            return _failed_result("Неверная кодировка файла (ожидается UTF-8)")
+        finally:
+            # Не закрываем файл вызывающей стороны вместе с обёрткой
+            lines.detach()
+
+    async def validate_csv(
+        self,
+        file_content: str,
+        mapping: CSVColumnMapping,
+        date_format: str = "%Y-%m-%d",
+        max_errors: int = 100,
+    ) -> AsyncIterator[str]:
+        """
+        Проверка файла без записи в БД (dry run). Отдаёт NDJSON: строку на каждую
+        найденную ошибку сразу по мере разбора и итоговую строку summary.
+        После max_errors ошибок разбор прерывается (aborted=true).
+        """
+        checked = 0
+        valid = 0
+        errors = 0
+        aborted = False
+
+        def error(row: int, message: str) -> str:
+            nonlocal errors
+            errors += 1
+            return _ndjson({"type": "error", "row": row, "error": message})
+
+        try:
+            reader = csv.DictReader(iter_base64_lines(file_content))
+            required = [mapping.amount, mapping.transaction_date, mapping.type]
+            missing = [c for c in required if c not in (reader.fieldnames or [])]
+            if missing:
+                yield error(1, f"В файле нет колонок: {', '.join(missing)}")
+                aborted = True
+            else:
+                for row_num, row in enumerate(reader, start=2):
+                    checked += 1
+                    try:
+                        parse_row(row, mapping, date_format)
+                        valid += 1
+                    except CSVRowError as e:
+                        yield error(row_num, str(e))
+                        if errors >= max_errors:
+                            aborted = True
+                            break
+                    if checked % DRY_RUN_YIELD_EVERY == 0:
+                        await asyncio.sleep(0)
+        except (ValueError, csv.Error):
+            yield error(0, "Неверное Base64, кодировка или структура файла")
+            aborted = True
+
+        yield _ndjson(
+            {
+                "type": "summary",
+                "checked_rows": checked,
+                "valid_rows": valid,
+                "error_count": errors,
+                "aborted": aborted,
+            }
+        )
+
+    async def _dispatch(
+        self,
+        fingerprint: str,
+        line_count: int,
+        read_content: Callable[[], str],
+        lines: Iterable[str],
+        mapping: CSVColumnMapping,
+        date_format: str,
+        import_source: str,
+    ) -> CSVImportResult:
+        """Общий путь импорта: дедупликация файла, порог фоновой обработки, TaskResult."""
+        if self.task_result_repo is not None:
+            previous = await self.task_result_repo.get_by_file_fingerprint(fingerprint)
+            if previous is not None:
+                return self._result_from_task(previous)
 
-        line_count = decoded.count("\n") + (1 if decoded.strip() else 0)
         if line_count > CSV_BACKGROUND_THRESHOLD:
-            from app.tasks.csv_tasks import import_csv_task
+            return await self._enqueue(
+                read_content(), mapping, date_format, import_source, fingerprint
+            )
+
+        result = await self._process_csv(lines, mapping, date_format, import_source)
+        if self.task_result_repo is not None:
+            task_result = await self.task_result_repo.create(
+                task_id=str(uuid.uuid4()),
+                task_type="csv_import",
+                status="completed",
+                result=result.model_dump(),
+                file_fingerprint=fingerprint,
+            )
+            result.task_id = task_result.task_id
+        return result
+
+    async def _enqueue(
+        self,
+        csv_content: str,
+        mapping: CSVColumnMapping,
+        date_format: str,
+        import_source: str,
+        fingerprint: str,
+    ) -> CSVImportResult:
+        """Поставить импорт в очередь Celery; TaskResult создаётся заранее с отпечатком файла."""
+        from app.tasks.csv_tasks import import_csv_task
 
-            task = import_csv_task.delay(decoded, mapping.model_dump(), date_format)
+        args = (csv_content, mapping.model_dump(), date_format, import_source)
+        if self.task_result_repo is None:
+            task = import_csv_task.delay(*args)
             return CSVImportResult(task_id=task.id, status="pending")
 
-        return await self._process_csv(decoded, mapping, date_format)
+        task_id = str(uuid.uuid4())
+        await self.task_result_repo.create(
+            task_id=task_id,
+            task_type="csv_import",
+            status="pending",
+            file_fingerprint=fingerprint,
+        )
+        try:
+            import_csv_task.apply_async(args=args, task_id=task_id)
+        except Exception as e:
+            # Брокер недоступен — не оставляем вечный pending, иначе повтор не пройдёт
+            await self.task_result_repo.update_status(task_id, "failed", error=str(e))
+            raise
+        return CSVImportResult(task_id=task_id, status="pending")
+
+    @staticmethod
+    def _result_from_task(task_result: TaskResult) -> CSVImportResult:
+        """Ответ для повторной загрузки уже импортированного файла."""
+        payload = dict(task_result.result or {})
+        payload.update(
+            task_id=task_result.task_id,
+            status=task_result.status,
+            duplicate_file=True,
+        )
+        return CSVImportResult(**payload)
 
     async def _process_csv(
         self,
-        csv_content: str,
+        csv_content: str | Iterable[str],
         mapping: CSVColumnMapping,
         date_format: str,
+        import_source: str = DEFAULT_IMPORT_SOURCE,
     ) -> CSVImportResult:
-        """Обработка CSV: валидация, нормализация, создание категорий и транзакций."""
-        reader = csv.DictReader(StringIO(csv_content))
+        """
+        Обработка CSV: валидация, нормализация, создание категорий и транзакций.
+        Строки накапливаются пачками по IMPORT_BATCH_SIZE: на пачку — один запрос
+        категорий и один INSERT ... ON CONFLICT DO NOTHING для транзакций.
+        """
+        lines = StringIO(csv_content) if isinstance(csv_content, str) else csv_content
+        reader = csv.DictReader(lines)
         created_count = 0
+        skipped_count = 0
         errors: list[dict] = []
+        occurrences: dict[tuple, int] = defaultdict(int)
+        category_ids: dict[tuple[str, str], uuid.UUID] = {}
+        batch: list[tuple[int, ParsedRow, str]] = []
 
-        for row_num, row in enumerate(reader, start=2):
+        async def flush() -> None:
+            nonlocal created_count, skipped_count
             try:
-                # Обязательные поля (требование 7.7)
-                amount_raw = (row.get(mapping.amount) or "").strip()
-                date_raw = (row.get(mapping.transaction_date) or "").strip()
-                if not amount_raw or not date_raw:
-                    errors.append(
-                        {
-                            "row": row_num,
-                            "error": "Отсутствуют обязательные поля: сумма или дата",
-                        }
-                    )
-                    continue
-
-                # Сумма: число, > 0 (7.1, 7.2)
-                try:
-                    amount = Decimal(amount_raw.replace(",", "."))
-                except (InvalidOperation, ValueError):
-                    errors.append(
-                        {"row": row_num, "error": "Некорректный формат суммы"}
+                wanted = {(p.category_name, p.type) for _, p, _ in batch}
+                missing = wanted - category_ids.keys()
+                if missing:
+                    category_ids.update(
+                        await self.category_repo.get_or_create_many(missing)
                     )
-                    continue
-                if amount <= 0:
-                    errors.append(
-                        {"row": row_num, "error": "Сумма должна быть положительной"}
-                    )
-                    continue
-
-                # Дата (7.3)
-                try:
-                    transaction_date = datetime.strptime(date_raw, date_format).date()
-                except ValueError:
-                    errors.append({"row": row_num, "error": "Некорректный формат даты"})
-                    continue
-
-                # Тип (income/expense)
-                type_raw = (row.get(mapping.type) or "").strip().lower()
-                if type_raw not in ("income", "expense"):
-                    errors.append(
-                        {
-                            "row": row_num,
-                            "error": f"Недопустимый тип транзакции: {type_raw}",
-                        }
-                    )
-                    continue
-
-                # Нормализация суммы по типу (7.5, 7.6)
-                if type_raw == "income" and amount < 0:
-                    amount = abs(amount)
-                elif type_raw == "expense" and amount > 0:
-                    amount = -amount
-                # В модели amount хранится положительным, тип задаётся отдельно
-                amount = abs(amount)
-
-                # Валюта (7.8)
-                currency_raw = (
-                    (row.get(mapping.currency) or "USD").strip().upper()
-                    if mapping.currency
-                    else "USD"
-                )
-                if currency_raw and currency_raw not in VALID_CURRENCIES:
-                    errors.append(
-                        {
-                            "row": row_num,
-                            "error": f"Неизвестный код валюты: {currency_raw}",
-                        }
-                    )
-                    continue
-                currency = currency_raw or "USD"
-
-                # Категория: обрезка (7.9), лимит длины (7.10)
-                category_name = (row.get(mapping.category_name) or "").strip()[
-                    :MAX_CATEGORY_NAME_LENGTH
+                rows = [
+                    {
+                        "amount": p.amount,
+                        "currency": p.currency,
+                        "category_id": category_ids[(p.category_name, p.type)],
+                        "description": p.description,
+                        "transaction_date": p.transaction_date,
+                        "type": p.type,
+                        "is_recurring": False,
+                        "import_fingerprint": fp,
+                    }
+                    for _, p, fp in batch
                 ]
-                if not category_name:
-                    category_name = "Без категории"
-
-                description_raw = (
-                    (row.get(mapping.description) or "").strip()
-                    if mapping.description
-                    else ""
-                )
-                description = (
-                    description_raw[:MAX_DESCRIPTION_LENGTH]
-                    if description_raw
-                    else None
+                inserted = await self.transaction_service.bulk_import(rows)
+                created_count += inserted
+                skipped_count += len(rows) - inserted
+            except Exception as e:
+                errors.extend(
+                    {"row": row_num, "error": str(e)} for row_num, _, _ in batch
                 )
+            batch.clear()
 
-                # Получить или создать категорию (требование 1.10)
-                category = await self.category_repo.get_by_name_and_type(
-                    category_name, type_raw
-                )
-                if not category:
-                    create_data = CategoryCreate(
-                        name=category_name,
-                        icon="📁",
-                        color="#808080",
-                        type=(
-                            CategoryType.INCOME
-                            if type_raw == "income"
-                            else CategoryType.EXPENSE
-                        ),
-                    )
-                    category = await self.category_repo.create(
-                        **create_data.model_dump()
-                    )
+        for row_num, row in enumerate(reader, start=2):
+            try:
+                parsed = parse_row(row, mapping, date_format)
+            except CSVRowError as e:
+                errors.append({"row": row_num, "error": str(e)})
+                continue
 
-                transaction_data = TransactionCreate(
-                    amount=amount,
-                    currency=currency,
-                    category_id=category.id,
-                    description=description,
-                    transaction_date=transaction_date,
-                    type=(
-                        TransactionType.INCOME
-                        if type_raw == "income"
-                        else TransactionType.EXPENSE
-                    ),
-                    is_recurring=False,
-                    recurring_pattern=None,
-                )
-                await self.transaction_service.create_transaction(transaction_data)
-                created_count += 1
+            occurrences[parsed] += 1
+            fingerprint = row_fingerprint(import_source, parsed, occurrences[parsed])
+            batch.append((row_num, parsed, fingerprint))
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                await flush()
 
-            except Exception as e:
-                errors.append({"row": row_num, "error": str(e)})
+        if batch:
+            await flush()
+        errors.sort(key=lambda e: e["row"])
 
         return CSVImportResult(
             task_id="sync",
             status="completed",
             created_count=created_count,
+            skipped_count=skipped_count,
             error_count=len(errors),
             errors=errors,
         )
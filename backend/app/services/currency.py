@@ -5,10 +5,25 @@ from decimal import Decimal
 
 from app.repositories.currency import CurrencyRepository
 from app.repositories.exchange_rate import ExchangeRateRepository
-from app.schemas.currency import Currency
+from app.schemas.currency import (
+    ConversionItem,
+    ConversionResponse,
+    ConversionResult,
+    Currency,
+)
+from app.services.exchange_rate_cache import (
+    RATE_QUANTUM,
+    ExchangeRateCache,
+    exchange_rate_cache,
+)
 from app.core.exceptions import NotFoundException
 
 
+def converted_amount(amount: Decimal, rate: Decimal) -> Decimal:
+    """Сумма по курсу с фиксированной точностью (как у курсов, Numeric(20, 10))"""
+    return (amount * rate).quantize(RATE_QUANTUM)
+
+
 class CurrencyService:
     """Сервис валют и конвертации сумм."""
 
@@ -16,9 +31,12 @@ class CurrencyService:
         self,
         currency_repo: CurrencyRepository,
         exchange_rate_repo: ExchangeRateRepository,
+        rate_cache: ExchangeRateCache | None = None,
     ):
         self.currency_repo = currency_repo
         self.exchange_rate_repo = exchange_rate_repo
+        # Курсы читаются из процессного кэша, а не запросом на каждую конвертацию
+        self.rate_cache = rate_cache if rate_cache is not None else exchange_rate_cache
 
     async def get_currencies(self) -> list[Currency]:
         """Список активных валют."""
@@ -41,13 +59,62 @@ class CurrencyService:
         if from_currency.upper() == to_currency.upper():
             return amount
 
-        rate = await self.exchange_rate_repo.get_rate(
-            from_currency, to_currency, rate_date
+        rate = await self.rate_cache.get(
+            self.exchange_rate_repo, from_currency, to_currency, rate_date
         )
-        if not rate:
-            rate = await self.exchange_rate_repo.get_latest_rate(
-                from_currency, to_currency
-            )
         if not rate:
             raise NotFoundException(f"Курс не найден: {from_currency} -> {to_currency}")
-        return amount * rate.rate
+        return converted_amount(amount, rate.rate)
+
+    async def convert_batch(self, items: list[ConversionItem]) -> ConversionResponse:
+        """
+        Конвертировать много сумм за раз. Таблица курсов загружается (при
+        необходимости) один раз, курс ищется один раз на уникальную пару
+        и дату; позиции без курса получают ошибку, остальные — результат.
+        """
+        latest = max(item.date for item in items)
+        await self.rate_cache.ensure_loaded(self.exchange_rate_repo, latest)
+
+        rates: dict[tuple[str, str, date], tuple[Decimal, date] | None] = {}
+        for item in items:
+            key = (item.from_currency.upper(), item.to_currency.upper(), item.date)
+            if key in rates:
+                continue
+            if key[0] == key[1]:
+                rates[key] = (Decimal(1), item.date)
+                continue
+            row = self.rate_cache.lookup(*key)
+            rates[key] = (row.rate, row.date) if row else None
+
+        results = []
+        error_count = 0
+        for item in items:
+            found = rates[
+                (item.from_currency.upper(), item.to_currency.upper(), item.date)
+            ]
+            if found is None:
+                error_count += 1
+                results.append(
+                    ConversionResult(
+                        **item.model_dump(),
+                        error=(
+                            f"Курс не найден: {item.from_currency} -> "
+                            f"{item.to_currency}"
+                        ),
+                    )
+                )
+                continue
+            rate, rate_date = found
+            # Та же валюта — сама сумма, как в convert_amount
+            same = item.from_currency.upper() == item.to_currency.upper()
+            results.append(
+                ConversionResult(
+                    **item.model_dump(),
+                    rate=rate,
+                    rate_date=rate_date,
+                    converted=(
+                        item.amount if same else converted_amount(item.amount, rate)
+                    ),
+                )
+            )
+        return ConversionResponse(results=results, error_count=error_count)
@@ -2,12 +2,35 @@
 
 import logging
 from datetime import date
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterable, Iterable
+import uuid
 
-from app.core.currency_api_client import CurrencyAPIClient
+from app.core.config import settings
+from app.core.currency_api_client import CurrencyAPIClient, currency_api_client
 from app.repositories.exchange_rate import ExchangeRateRepository
 from app.repositories.currency import CurrencyRepository
-from app.schemas.currency import ExchangeRate
+from app.repositories.task_result import TaskResultRepository
+from app.schemas.currency import (
+    BackfillSource,
+    ExchangeRate,
+    ExchangeRateBackfillJob,
+    ExchangeRateBackfillRequest,
+    RateKey,
+    RateLookupResult,
+)
+from app.services.exchange_rate_backfill import (
+    backfill_path,
+    iter_api_rates,
+    iter_file_rates,
+)
+from app.services.exchange_rate_cache import (
+    RATE_QUANTUM,
+    ExchangeRateCache,
+    RateQuote,
+    derive_rate,
+    exchange_rate_cache,
+)
 from app.core.exceptions import NotFoundException
 
 logger = logging.getLogger(__name__)
@@ -21,53 +44,253 @@ class ExchangeRateService:
         exchange_rate_repo: ExchangeRateRepository,
         currency_repo: CurrencyRepository,
         api_client: CurrencyAPIClient | None = None,
+        rate_cache: ExchangeRateCache | None = None,
+        task_result_repo: TaskResultRepository | None = None,
     ):
         self.exchange_rate_repo = exchange_rate_repo
         self.currency_repo = currency_repo
-        self.api_client = api_client or CurrencyAPIClient()
+        # Общий клиент процесса: пул соединений переиспользуется между запросами
+        self.api_client = api_client or currency_api_client
+        self.rate_cache = rate_cache if rate_cache is not None else exchange_rate_cache
+        self.task_result_repo = task_result_repo
 
     async def update_rates(self, base_currency: str = "USD") -> dict:
         """Обновить курсы валют из API и сохранить в БД."""
-        rates_data = await self.api_client.get_latest_rates(base_currency)
-        if not rates_data:
-            return {"success": False, "error": "Нет данных от API", "updated_count": 0}
+        return await self.update_rates_many([base_currency])
+
+    async def update_rates_many(self, base_currencies: Iterable[str]) -> dict:
+        """
+        Обновить курсы от нескольких базовых валют: запросы к API идут
+        параллельно, курсы пишутся одним upsert. Недоступность API для
+        одной базы не мешает остальным — ошибка попадает в errors.
+        """
+        bases = list(dict.fromkeys(base.upper() for base in base_currencies))
+        rates_by_base, errors = await self.api_client.get_latest_rates_many(bases)
 
         currencies = await self.currency_repo.get_active_currencies()
         codes = [c.code for c in currencies]
         today = date.today()
         to_save = []
-        for to_code in codes:
-            if to_code == base_currency:
+        for base_currency in bases:
+            rates_data = rates_by_base.get(base_currency)
+            if base_currency in errors:
                 continue
-            if to_code not in rates_data:
+            if not rates_data:
+                errors[base_currency] = "Нет данных от API"
                 continue
-            to_save.append(
-                {
-                    "from_currency": base_currency,
-                    "to_currency": to_code,
-                    "rate": Decimal(str(rates_data[to_code])),
-                    "date": today,
-                }
-            )
+            for to_code in codes:
+                if to_code == base_currency:
+                    continue
+                if to_code not in rates_data:
+                    continue
+                to_save.append(
+                    {
+                        "from_currency": base_currency,
+                        "to_currency": to_code,
+                        "rate": Decimal(str(rates_data[to_code])),
+                        "date": today,
+                    }
+                )
         if to_save:
-            await self.exchange_rate_repo.bulk_create(to_save)
-        return {
-            "success": True,
+            await self.exchange_rate_repo.upsert_many(to_save)
+            await self.rate_cache.notify_changed()
+        result = {
+            "success": not errors,
             "updated_count": len(to_save),
             "date": today.isoformat(),
         }
+        if errors:
+            logger.warning("Курсы валют обновлены не полностью: %s", errors)
+            result["error"] = "; ".join(f"{b}: {m}" for b, m in errors.items())
+            result["errors"] = errors
+        return result
 
     async def get_rate(
         self, from_currency: str, to_currency: str, rate_date: date
     ) -> ExchangeRate:
-        """Получить курс на дату; при отсутствии — последний известный."""
-        rate = await self.exchange_rate_repo.get_rate(
-            from_currency, to_currency, rate_date
+        """
+        Получить курс на дату (последний не позже неё); если таких нет —
+        последний известный. Курс берётся из процессного кэша.
+        """
+        rate = await self.rate_cache.get(
+            self.exchange_rate_repo, from_currency, to_currency, rate_date
         )
-        if not rate:
-            rate = await self.exchange_rate_repo.get_latest_rate(
-                from_currency, to_currency
-            )
         if not rate:
             raise NotFoundException(f"Курс не найден: {from_currency} -> {to_currency}")
         return ExchangeRate.model_validate(rate)
+
+    async def get_rates_as_of(self, keys: list[RateKey]) -> list[RateLookupResult]:
+        """
+        Курсы для многих пар и дат одним запросом к БД (as-of через LATERAL),
+        не считая загрузки кэша по TTL.
+        Для каждого ключа запрашиваются сама пара, обратная и ноги кросс-курса
+        через общие базы пары. Базы берутся из уже загруженного кэша курсов,
+        поэтому их выбор и вывод курса те же, что в /convert. Результаты —
+        в порядке keys.
+        """
+        await self.rate_cache.ensure_loaded(self.exchange_rate_repo)
+        pairs = [(key.from_currency.upper(), key.to_currency.upper()) for key in keys]
+        wanted = set()
+        for key, (from_currency, to_currency) in zip(keys, pairs):
+            wanted.add((from_currency, to_currency, key.date))
+            wanted.add((to_currency, from_currency, key.date))
+            for base in self.rate_cache.pivot_bases((from_currency, to_currency)):
+                wanted.add((base, from_currency, key.date))
+                wanted.add((base, to_currency, key.date))
+        stored = await self.exchange_rate_repo.get_rates_as_of(wanted)
+
+        results = []
+        for key, pair in zip(keys, pairs):
+            if pair[0] == pair[1]:
+                rate = RateQuote(pair[0], pair[1], Decimal(1), key.date)
+            else:
+                rate = derive_rate(
+                    pair,
+                    lambda p, day=key.date: stored.get((*p, day)),
+                    self.rate_cache.pivot_bases(pair),
+                )
+            results.append(
+                RateLookupResult(
+                    **key.model_dump(),
+                    rate=rate.rate if rate else None,
+                    rate_date=rate.date if rate else None,
+                )
+            )
+        return results
+
+    async def enqueue_backfill(
+        self, params: ExchangeRateBackfillRequest
+    ) -> ExchangeRateBackfillJob:
+        """
+        Поставить загрузку исторических курсов в очередь Celery. TaskResult
+        (exchange_rate_backfill, pending) создаётся заранее, если передан
+        task_result_repo; итог — через /tasks/{task_id}/status.
+        """
+        from app.tasks.currency_tasks import backfill_exchange_rates_task
+
+        if params.source == BackfillSource.FILE:
+            # Путь проверяется сразу, чтобы ошибка пришла в ответе, а не в задаче
+            backfill_path(params.file_path)
+        args = (params.model_dump(mode="json"),)
+        if self.task_result_repo is None:
+            task_id = backfill_exchange_rates_task.delay(*args).id
+        else:
+            task_id = str(uuid.uuid4())
+            await self.task_result_repo.create(
+                task_id=task_id, task_type="exchange_rate_backfill", status="pending"
+            )
+            try:
+                backfill_exchange_rates_task.apply_async(args=args, task_id=task_id)
+            except Exception as e:
+                await self.task_result_repo.update_status(
+                    task_id, "failed", error=str(e)
+                )
+                raise
+        return ExchangeRateBackfillJob(
+            task_id=task_id,
+            status_url=f"{settings.API_V1_PREFIX}/tasks/{task_id}/status",
+        )
+
+    async def run_backfill(self, params: ExchangeRateBackfillRequest) -> dict:
+        """Загрузить исторические курсы из источника запроса."""
+        base_currency = params.base_currency.upper()
+        if params.source == BackfillSource.FILE:
+            rows = iter_file_rates(backfill_path(params.file_path), base_currency)
+        else:
+            rows = iter_api_rates(
+                self.api_client, base_currency, params.start_date, params.end_date
+            )
+        return await self.backfill(rows, params.start_date, params.end_date)
+
+    async def backfill(
+        self,
+        rows: AsyncIterable[dict[str, Any]],
+        start: date,
+        end: date,
+        batch_size: int | None = None,
+    ) -> dict:
+        """
+        Записать поток курсов пачками по batch_size через upsert. Строки вне
+        [start, end], с неизвестными валютами или некорректным курсом
+        пропускаются; повтор пары и даты в пачке — побеждает последний.
+        """
+        batch_size = batch_size or settings.EXCHANGE_RATE_BACKFILL_BATCH_SIZE
+        codes = {c.code for c in await self.currency_repo.get_active_currencies()}
+        batch: dict[tuple[str, str, date], Decimal] = {}
+        upserted = skipped = batches = 0
+
+        async def flush() -> None:
+            nonlocal upserted, batches
+            await self.exchange_rate_repo.upsert_many(
+                [
+                    {
+                        "from_currency": from_currency,
+                        "to_currency": to_currency,
+                        "rate": rate,
+                        "date": rate_date,
+                    }
+                    for (from_currency, to_currency, rate_date), rate in batch.items()
+                ]
+            )
+            upserted += len(batch)
+            batches += 1
+            batch.clear()
+
+        async for row in rows:
+            parsed = _parse_rate_row(row, codes, start, end)
+            if parsed is None:
+                skipped += 1
+                continue
+            key, rate = parsed
+            batch[key] = rate
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+        if upserted:
+            await self.rate_cache.notify_changed()
+        return {
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "upserted_count": upserted,
+            "skipped_count": skipped,
+            "batches": batches,
+        }
+
+
+def base_currencies() -> list[str]:
+    """Базовые валюты курсов из EXCHANGE_RATE_BASE_CURRENCIES."""
+    return [
+        code.strip().upper()
+        for code in settings.EXCHANGE_RATE_BASE_CURRENCIES.split(",")
+        if code.strip()
+    ]
+
+
+# Наибольший курс, который помещается в Numeric(20, 10)
+MAX_RATE = Decimal(10) ** 10
+
+
+def _parse_rate_row(
+    row: dict[str, Any], codes: set[str], start: date, end: date
+) -> tuple[tuple[str, str, date], Decimal] | None:
+    """Ключ (from, to, date) и курс строки источника; None — строку пропустить."""
+    try:
+        raw_date = row["date"]
+        rate_date = (
+            raw_date if isinstance(raw_date, date) else date.fromisoformat(raw_date)
+        )
+        rate = Decimal(str(row["rate"]))
+        from_currency = row["from_currency"].upper()
+        to_currency = row["to_currency"].upper()
+    except (AttributeError, KeyError, TypeError, ValueError, InvalidOperation):
+        return None
+    if not start <= rate_date <= end:
+        return None
+    if from_currency == to_currency or not {from_currency, to_currency} <= codes:
+        return None
+    if not rate.is_finite() or not 0 < rate < MAX_RATE:
+        return None
+    rate = rate.quantize(RATE_QUANTUM)
+    # Курс меньше точности хранения нарушил бы ck_exchange_rate_positive
+    return ((from_currency, to_currency, rate_date), rate) if rate else None
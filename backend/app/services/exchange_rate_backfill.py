@@ -0,0 +1,69 @@
+"""
+Источники исторических курсов для загрузки (backfill).
+
+Источники — асинхронные генераторы строк {from_currency, to_currency,
+rate, date}: файл читается построчно, API — окнами по API_WINDOW_DAYS.
+ExchangeRateService.backfill пишет их в БД пачками, поэтому годы курсов
+не держатся в памяти целиком.
+"""
+
+import csv
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from app.core.config import settings
+from app.core.currency_api_client import CurrencyAPIClient
+from app.core.exceptions import ValidationException
+
+# Период одного запроса к API курсов за диапазон дат
+API_WINDOW_DAYS = 366
+
+RateRow = dict[str, Any]
+
+
+def backfill_path(file_path: str) -> Path:
+    """Файл курсов внутри EXCHANGE_RATE_BACKFILL_DIR (выход за каталог запрещён)."""
+    root = Path(settings.EXCHANGE_RATE_BACKFILL_DIR).resolve()
+    path = (root / file_path).resolve()
+    if not path.is_relative_to(root):
+        raise ValidationException("Файл курсов должен лежать в каталоге загрузки")
+    if not path.is_file():
+        raise ValidationException(f"Файл курсов не найден: {file_path}")
+    return path
+
+
+async def iter_file_rates(path: Path, base_currency: str) -> AsyncIterator[RateRow]:
+    """
+    CSV с заголовком date,from_currency,to_currency,rate. Колонку
+    from_currency можно опустить — тогда курсы от base_currency.
+    """
+    with path.open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield {
+                "from_currency": row.get("from_currency") or base_currency,
+                "to_currency": row.get("to_currency"),
+                "rate": row.get("rate"),
+                "date": row.get("date"),
+            }
+
+
+async def iter_api_rates(
+    client: CurrencyAPIClient, base_currency: str, start: date, end: date
+) -> AsyncIterator[RateRow]:
+    """Курсы от base_currency за [start, end] запросами по API_WINDOW_DAYS дней."""
+    window_start = start
+    while window_start <= end:
+        window_end = min(end, window_start + timedelta(days=API_WINDOW_DAYS - 1))
+        by_day = await client.get_historical_rates(
+            base_currency, window_start, window_end
+        )
+        for rate_date in sorted(by_day):
+            for code, rate in by_day[rate_date].items():
+                yield {
+                    "from_currency": base_currency,
+                    "to_currency": code,
+                    "rate": rate,
+                    "date": rate_date,
+                }
+        window_start = window_end + timedelta(days=1)
@@ -0,0 +1,317 @@
+"""
+Процессный кэш курсов валют.
+
+Курсы меняются раз в день, поэтому таблица exchange_rates целиком
+держится в памяти: по паре валют — отсортированные даты и строки курсов.
+Курс «на дату» — последний известный не позже неё (bisect), без
+обращения к БД. Таблица перечитывается целиком:
+- по истечении TTL (EXCHANGE_RATE_CACHE_TTL);
+- после записи курсов в этом процессе (invalidate / notify_changed);
+- когда изменилась версия курсов в Redis (EXCHANGE_RATE_CACHE_REDIS_URL):
+  update_rates и backfill в любом процессе поднимают её, а кэш сверяет
+  её не чаще раза в VERSION_CHECK_SECONDS.
+Без версии в Redis запрошенная дата новее загруженных курсов (воркер уже
+сохранил курсы за сегодня) догружает только дни после последнего
+загруженного — не чаще раза в RELOAD_RETRY_SECONDS.
+
+В БД хранятся только пары от базовой валюты (update_rates("USD") пишет
+USD→X). Остальные курсы выводятся при поиске: обратный Y→X = 1 / (X→Y),
+кросс-курс X→Y = (B→Y) / (B→X) через общую базу B. Курсы базы на дату —
+строка матрицы N×N, её ячейки считаются делением по запросу, без хранения
+N² строк и без дополнительных запросов. Базы для кросс-курса выбираются
+по хранимым парам (pivot_index / pivot_bases); пакетный as-of поиск
+ExchangeRateService.get_rates_as_of берёт базы из этого же кэша.
+"""
+
+import asyncio
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Protocol, Tuple
+
+from redis.asyncio import Redis
+from sqlalchemy import Row
+
+from app.core.config import settings
+from app.repositories.exchange_rate import ExchangeRateRepository
+
+logger = logging.getLogger(__name__)
+
+# Минимальный интервал догрузки, если запрошенной даты ещё нет в БД
+RELOAD_RETRY_SECONDS = 60.0
+# Интервал сверки версии курсов в Redis
+VERSION_CHECK_SECONDS = 5.0
+# Ключ версии курсов и таймаут обращения к Redis, секунды
+VERSION_KEY = "exchange_rates:version"
+VERSION_TIMEOUT_SECONDS = 0.5
+
+# Точность хранимых курсов (Numeric(20, 10))
+RATE_QUANTUM = Decimal("1e-10")
+
+Pair = Tuple[str, str]
+
+
+class RateQuote(NamedTuple):
+    """Выведенный курс (обратный или кросс); в БД его нет, поэтому нет id"""
+
+    from_currency: str
+    to_currency: str
+    rate: Decimal
+    date: date
+    id: None = None
+    created_at: None = None
+
+
+def _quote(pair: Pair, rate: Decimal, rate_date: date) -> RateQuote | None:
+    rate = rate.quantize(RATE_QUANTUM)
+    # Курс меньше точности хранения не выразить
+    return RateQuote(pair[0], pair[1], rate, rate_date) if rate else None
+
+
+def pivot_index(pairs: Iterable[Pair]) -> Dict[str, List[str]]:
+    """
+    Валюта -> базы, от которых хранятся её курсы. Базы упорядочены по числу
+    хранимых от них пар (главная база первой), при равенстве — по коду.
+    """
+    pairs = set(pairs)
+    quoted: Dict[str, int] = defaultdict(int)
+    for base, _ in pairs:
+        quoted[base] += 1
+    index: Dict[str, List[str]] = defaultdict(list)
+    for base, currency in sorted(pairs, key=lambda p: (-quoted[p[0]], p)):
+        index[currency].append(base)
+    return dict(index)
+
+
+def pivot_bases(pair: Pair, index: Dict[str, List[str]]) -> List[str]:
+    """Общие базы обеих валют пары в порядке pivot_index"""
+    to_bases = index.get(pair[1], ())
+    return [base for base in index.get(pair[0], ()) if base in to_bases]
+
+
+def derive_rate(
+    pair: Pair,
+    as_of: Callable[[Pair], Row | None],
+    bases: Iterable[str],
+) -> Row | RateQuote | None:
+    """
+    Курс пары по хранимым курсам as_of(пара): сама пара, иначе обратная,
+    иначе кросс-курс через первую из bases, от которой есть обе ноги.
+    Дата выведенного курса — самая ранняя из дат использованных курсов.
+    """
+    direct = as_of(pair)
+    if direct is not None:
+        return direct
+    inverse = as_of((pair[1], pair[0]))
+    if inverse is not None:
+        return _quote(pair, Decimal(1) / inverse.rate, inverse.date)
+    for base in bases:
+        leg_from = as_of((base, pair[0]))
+        leg_to = as_of((base, pair[1]))
+        if leg_from is not None and leg_to is not None:
+            return _quote(
+                pair, leg_to.rate / leg_from.rate, min(leg_from.date, leg_to.date)
+            )
+    return None
+
+
+class RateVersion(Protocol):
+    """Общий для процессов счётчик изменений таблицы курсов"""
+
+    async def get(self) -> int: ...
+
+    async def bump(self) -> None: ...
+
+
+class RedisRateVersion:
+    """Версия курсов в Redis (INCR при записи, GET при сверке)"""
+
+    def __init__(self, url: str, key: str = VERSION_KEY):
+        self.url = url
+        self.key = key
+        self._redis: Redis | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _client(self) -> Redis:
+        """Клиент текущего event loop (Celery run_async может сменить loop)"""
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._loop is not loop:
+            self._redis = Redis.from_url(
+                self.url,
+                socket_timeout=VERSION_TIMEOUT_SECONDS,
+                socket_connect_timeout=VERSION_TIMEOUT_SECONDS,
+            )
+            self._loop = loop
+        return self._redis
+
+    async def get(self) -> int:
+        value = await self._client().get(self.key)
+        return int(value or 0)
+
+    async def bump(self) -> None:
+        await self._client().incr(self.key)
+
+    async def aclose(self) -> None:
+        """Закрыть соединения (при остановке приложения)."""
+        if self._redis is not None and self._loop is asyncio.get_running_loop():
+            await self._redis.aclose()
+        self._redis = None
+        self._loop = None
+
+
+class ExchangeRateCache:
+    """Курсы валют в памяти с as-of поиском по дате"""
+
+    def __init__(
+        self,
+        ttl_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        version: RateVersion | None = None,
+    ):
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else settings.EXCHANGE_RATE_CACHE_TTL
+        )
+        self._clock = clock
+        if version is None and settings.EXCHANGE_RATE_CACHE_REDIS_URL:
+            version = RedisRateVersion(settings.EXCHANGE_RATE_CACHE_REDIS_URL)
+        self.version = version
+        # Версия, с которой загружена таблица; None — версия неизвестна
+        self._version: int | None = None
+        self._checked_at: float | None = None
+        self._extended_at: float | None = None
+        self._dates: Dict[Pair, List[int]] = {}
+        self._rates: Dict[Pair, List[Row]] = {}
+        # Валюта -> базы, от которых хранятся её курсы (главная база первой)
+        self._bases: Dict[str, List[str]] = {}
+        self._max_date: date | None = None
+        self._loaded_at: float | None = None
+
+    def invalidate(self) -> None:
+        """Сбросить таблицу: следующий запрос перечитает курсы из БД"""
+        self._loaded_at = None
+
+    async def notify_changed(self) -> None:
+        """
+        Курсы в БД изменились: сбросить таблицу этого процесса и поднять
+        версию, чтобы остальные процессы перечитали её при сверке.
+        """
+        self.invalidate()
+        if self.version is None:
+            return
+        try:
+            await self.version.bump()
+        except Exception as e:
+            logger.warning("Не удалось поднять версию курсов: %s", e)
+
+    async def _read_version(self) -> int | None:
+        if self.version is None:
+            return None
+        try:
+            return await self.version.get()
+        except Exception as e:
+            # Redis недоступен — работаем по TTL и догрузке новых дней
+            logger.warning("Не удалось прочитать версию курсов: %s", e)
+            return None
+
+    async def ensure_loaded(
+        self, repo: ExchangeRateRepository, rate_date: date | None = None
+    ) -> None:
+        """
+        Загрузить таблицу, если она устарела. Без блокировки: параллельные
+        перезагрузки читают одно и то же и безвредны.
+        """
+        now = self._clock()
+        if self._loaded_at is None or now - self._loaded_at >= self.ttl_seconds:
+            await self._load(repo, await self._read_version())
+            return
+        if self.version is not None and now - self._checked_at >= VERSION_CHECK_SECONDS:
+            self._checked_at = now
+            version = await self._read_version()
+            if version is not None and version != self._version:
+                await self._load(repo, version)
+                return
+            self._version = version
+        if (
+            self._version is None
+            and rate_date is not None
+            and (self._max_date is None or rate_date > self._max_date)
+            and now - self._extended_at >= RELOAD_RETRY_SECONDS
+        ):
+            await self._extend(repo)
+
+    async def _load(self, repo: ExchangeRateRepository, version: int | None) -> None:
+        """Перечитать таблицу целиком"""
+        rows = await repo.get_all_rates()
+        dates: Dict[Pair, List[int]] = defaultdict(list)
+        rates: Dict[Pair, List[Row]] = defaultdict(list)
+        # Строки отсортированы по (from, to, date)
+        for row in rows:
+            pair = (row.from_currency, row.to_currency)
+            dates[pair].append(row.date.toordinal())
+            rates[pair].append(row)
+        self._dates, self._rates = dict(dates), dict(rates)
+        self._bases = pivot_index(dates)
+        self._max_date = max((row.date for row in rows), default=None)
+        self._version = version
+        self._loaded_at = self._checked_at = self._extended_at = self._clock()
+
+    async def _extend(self, repo: ExchangeRateRepository) -> None:
+        """Догрузить курсы за дни после последнего загруженного"""
+        self._extended_at = self._clock()
+        rows = await repo.get_all_rates(after=self._max_date)
+        if not rows:
+            return
+        for row in rows:
+            pair = (row.from_currency, row.to_currency)
+            # Даты новее загруженных: списки пары остаются отсортированными
+            self._dates.setdefault(pair, []).append(row.date.toordinal())
+            self._rates.setdefault(pair, []).append(row)
+        self._bases = pivot_index(self._dates)
+        self._max_date = max(row.date for row in rows)
+
+    def _as_of(self, pair: Pair, rate_date: date) -> Row | None:
+        dates = self._dates.get(pair)
+        if not dates:
+            return None
+        index = bisect_right(dates, rate_date.toordinal()) - 1
+        # index == -1 (дата раньше всех курсов) — последний известный курс
+        return self._rates[pair][index]
+
+    def pivot_bases(self, pair: Pair) -> List[str]:
+        """Базы кросс-курса пары по загруженной таблице (см. pivot_bases)"""
+        return pivot_bases(pair, self._bases)
+
+    def lookup(
+        self, from_currency: str, to_currency: str, rate_date: date
+    ) -> Row | RateQuote | None:
+        """
+        Курс на дату: последний не позже rate_date; если таких нет —
+        последний известный (как прежний fallback). Хранимая пара
+        приоритетнее обратной, обратная — кросс-курса. Дата выведенного
+        курса — самая ранняя из дат использованных курсов. None — курс
+        не вывести.
+        """
+        pair = (from_currency.upper(), to_currency.upper())
+        return derive_rate(
+            pair,
+            lambda stored: self._as_of(stored, rate_date),
+            self.pivot_bases(pair),
+        )
+
+    async def get(
+        self,
+        repo: ExchangeRateRepository,
+        from_currency: str,
+        to_currency: str,
+        rate_date: date,
+    ) -> Row | RateQuote | None:
+        """Курс на дату с загрузкой таблицы при необходимости"""
+        await self.ensure_loaded(repo, rate_date)
+        return self.lookup(from_currency, to_currency, rate_date)
+
+
+# Общий кэш процесса (API или воркер)
+exchange_rate_cache = ExchangeRateCache()
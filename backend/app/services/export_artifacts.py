@@ -0,0 +1,154 @@
+"""
+Хранилище сжатых файлов фонового экспорта в локальном каталоге
+(EXPORT_ARTIFACT_DIR, общий для API и Celery-воркера).
+"""
+
+import gzip
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Iterator
+
+from app.core.config import settings
+from app.core.exceptions import ValidationException
+from app.schemas.csv_import import ExportCompression, ExportFormat
+from app.services.export_formats import EXPORT_EXTENSIONS
+
+ARTIFACT_SUFFIXES = {
+    ExportCompression.GZIP: ".gz",
+    ExportCompression.ZSTD: ".zst",
+}
+ARTIFACT_MEDIA_TYPES = {
+    ExportCompression.GZIP: "application/gzip",
+    ExportCompression.ZSTD: "application/zstd",
+}
+# Размер блока при чтении файла для скачивания
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+class RangeNotSatisfiable(ValueError):
+    """Запрошенный Range лежит за пределами файла (ответ 416)."""
+
+
+def artifact_dir() -> Path:
+    """Каталог файлов экспорта из настроек."""
+    return Path(settings.EXPORT_ARTIFACT_DIR)
+
+
+def artifact_filename(
+    name: str, export_format: ExportFormat, compression: ExportCompression
+) -> str:
+    """Имя файла экспорта: <name>.<расширение формата><суффикс сжатия>."""
+    extension = EXPORT_EXTENSIONS[export_format]
+    return f"{name}.{extension}{ARTIFACT_SUFFIXES[compression]}"
+
+
+def artifact_path(
+    task_id: str, export_format: ExportFormat, compression: ExportCompression
+) -> Path:
+    """Путь к файлу экспорта задачи."""
+    return artifact_dir() / artifact_filename(task_id, export_format, compression)
+
+
+def ensure_compression_available(compression: ExportCompression) -> None:
+    """zstd — опциональная зависимость (пакет zstandard)."""
+    if compression == ExportCompression.ZSTD:
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ValidationException(
+                "zstd compression requires the 'zstandard' package"
+            )
+
+
+def _open_writer(path: Path, compression: ExportCompression) -> BinaryIO:
+    if compression == ExportCompression.ZSTD:
+        import zstandard
+
+        return zstandard.ZstdCompressor().stream_writer(open(path, "wb"))
+    return gzip.open(path, "wb", compresslevel=6)
+
+
+async def write_artifact(
+    chunks: AsyncIterator[bytes],
+    path: Path,
+    compression: ExportCompression,
+    on_chunk: Callable[[bytes], Awaitable[None]] | None = None,
+) -> None:
+    """
+    Сжать поток экспорта в файл. Пишется во временный .part и переименовывается
+    в конце, так что по path никогда не лежит недописанный файл.
+    on_chunk вызывается после записи каждого блока (для прогресса).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    part = path.with_name(path.name + ".part")
+    try:
+        with _open_writer(part, compression) as writer:
+            async for chunk in chunks:
+                writer.write(chunk)
+                if on_chunk is not None:
+                    await on_chunk(chunk)
+        os.replace(part, path)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+
+
+def cleanup_expired_artifacts(
+    retention: timedelta, directory: Path | None = None, now: float | None = None
+) -> int:
+    """Удалить файлы экспорта (и брошенные .part) старше retention; вернуть их число."""
+    directory = directory or artifact_dir()
+    if not directory.is_dir():
+        return 0
+    deadline = (now if now is not None else time.time()) - retention.total_seconds()
+    removed = 0
+    for path in directory.iterdir():
+        if path.is_file() and path.stat().st_mtime < deadline:
+            path.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Разобрать заголовок Range (один диапазон bytes=...) в [start, end] включительно.
+    None — отдать файл целиком (заголовка нет, он некорректен или диапазонов
+    несколько); RangeNotSatisfiable — диапазон за пределами файла.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[len("bytes=") :].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            # Суффикс: последние N байт
+            start = max(size - int(last), 0)
+            end = size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def iter_file_range(path: Path, start: int, end: int) -> Iterator[bytes]:
+    """Читать файл с start по end включительно блоками DOWNLOAD_CHUNK_SIZE."""
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,164 @@
+"""
+Типизированные форматы экспорта: NDJSON, Parquet и Arrow IPC (stream).
+
+Строки приходят пачками серверного курсора и кодируются по мере чтения.
+pyarrow (requirements.txt) импортируется лениво, только для Parquet/Arrow:
+тяжёлый импорт не замедляет старт API и воркера.
+"""
+
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import Any, AsyncIterator, Sequence
+
+from sqlalchemy import Row
+
+from app.core.exceptions import ValidationException
+from app.schemas.csv_import import ExportFormat
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+}
+EXPORT_EXTENSIONS = {
+    ExportFormat.CSV: "csv",
+    ExportFormat.NDJSON: "ndjson",
+    ExportFormat.PARQUET: "parquet",
+    ExportFormat.ARROW: "arrows",
+}
+# Колонки с малым числом различных значений — словарное кодирование
+DICTIONARY_COLUMNS = ("currency", "category_name", "type")
+# Строк в одной пачке колоночных форматов (одна row group Parquet)
+COLUMNAR_BATCH_SIZE = 65_536
+
+
+def ensure_format_available(export_format: ExportFormat) -> None:
+    """Parquet и Arrow требуют пакет pyarrow (422, если образ собран без него)."""
+    if export_format in (ExportFormat.PARQUET, ExportFormat.ARROW):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValidationException(
+                f"{export_format.value} export requires the 'pyarrow' package"
+            )
+
+
+def _value(row: Row, column: str) -> Any:
+    """Значение колонки строки; неизвестные колонки — None, UUID — строкой."""
+    value = getattr(row, column, None)
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def _json_value(value: Any) -> Any:
+    # Decimal строкой, чтобы не терять точность суммы при разборе JSON
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+async def iter_ndjson(
+    batches: AsyncIterator[Sequence[Row]], columns: list[str]
+) -> AsyncIterator[bytes]:
+    """Одна JSON-строка на транзакцию; amount — строкой, даты — ISO 8601."""
+    async for rows in batches:
+        lines = [
+            json.dumps(
+                {c: _json_value(_value(r, c)) for c in columns}, ensure_ascii=False
+            )
+            for r in rows
+        ]
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def arrow_schema(columns: list[str]):
+    """Схема Arrow: Decimal(12, 2), date32, словарные строки для повторяющихся значений."""
+    import pyarrow as pa
+
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    types = {
+        "amount": pa.decimal128(12, 2),
+        "transaction_date": pa.date32(),
+        **{c: dictionary for c in DICTIONARY_COLUMNS},
+    }
+    return pa.schema([pa.field(c, types.get(c, pa.string())) for c in columns])
+
+
+def _record_batch(schema, rows: Sequence[Row]):
+    import pyarrow as pa
+
+    arrays = []
+    for field in schema:
+        values = [_value(r, field.name) for r in rows]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Файлоподобный приёмник для pyarrow: записанное забирается через drain()."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def iter_arrow(
+    batches: AsyncIterator[Sequence[Row]],
+    columns: list[str],
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    """
+    Parquet (zstd, по row group на пачку) или Arrow IPC stream. Каждая пачка
+    записывается сразу и отдаётся клиенту, в памяти — только текущая пачка.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema(columns)
+    sink = _ChunkSink()
+    output = pa.PythonFile(sink, mode="w")
+    if export_format == ExportFormat.PARQUET:
+        writer = pq.ParquetWriter(
+            output,
+            schema,
+            compression="zstd",
+            use_dictionary=[c for c in DICTIONARY_COLUMNS if c in columns],
+        )
+    else:
+        writer = pa.ipc.new_stream(output, schema)
+
+    async for rows in batches:
+        if rows:
+            writer.write_batch(_record_batch(schema, rows))
+            yield sink.drain()
+    writer.close()
+    yield sink.drain()
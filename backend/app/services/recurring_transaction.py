@@ -1,21 +1,25 @@
 """Сервис для шаблонов повторяющихся транзакций"""
 
 from datetime import date, timedelta
-from decimal import Decimal
 import uuid
 
-from dateutil.relativedelta import relativedelta
-
 from app.repositories.recurring_transaction import RecurringTransactionRepository
 from app.schemas.recurring_transaction import (
     RecurringTransactionCreate,
     RecurringTransactionUpdate,
     RecurringTransaction as RecurringTransactionSchema,
+    CashFlowForecast,
 )
+from app.services.budget_spend import expense_change
+from app.services.cash_flow_forecast import forecast_cash_flow
+from app.core.recurrence import compile_rule
 from app.services.transaction import TransactionService
 from app.repositories.category import CategoryRepository
-from app.core.exceptions import NotFoundException
-from app.schemas.transaction import TransactionCreate, TransactionType
+from app.core.config import settings
+from app.core.exceptions import NotFoundException, ValidationException
+
+# Максимальное окно прогноза денежного потока
+MAX_FORECAST_DAYS = 5 * 366
 
 
 class RecurringTransactionService:
@@ -81,8 +85,9 @@ class RecurringTransactionService:
             start = update_data.get("start_date", existing.start_date)
             freq = update_data.get("frequency", existing.frequency)
             interval = update_data.get("interval", existing.interval)
+            # Только будущие выполнения: первая дата нового расписания с сегодня
             update_data["next_occurrence"] = self._next_occurrence(
-                start, freq, interval, date.today()
+                date.today() - timedelta(days=1), freq, interval, start
             )
         updated = await self.recurring_repo.update(recurring_id, **update_data)
         return RecurringTransactionSchema.model_validate(updated)
@@ -93,45 +98,73 @@ class RecurringTransactionService:
         if not deleted:
             raise NotFoundException("Шаблон не найден")
 
-    async def process_due(self, current_date: date) -> dict:
-        """Создать транзакции по всем шаблонам, у которых next_occurrence <= current_date."""
-        due = await self.recurring_repo.get_active_due_today(current_date)
+    async def forecast(
+        self, until: date, start: date | None = None, currency: str = "RUB"
+    ) -> CashFlowForecast:
+        """Прогноз доходов, расходов и баланса по всем активным шаблонам."""
+        start = start or date.today()
+        if until < start:
+            raise ValidationException("until должно быть не раньше start")
+        if (until - start).days > MAX_FORECAST_DAYS:
+            raise ValidationException("Окно прогноза не должно превышать 5 лет")
+        templates = await self.recurring_repo.get_active_for_forecast(start, until)
+        return forecast_cash_flow(templates, start, until, currency)
+
+    async def process_due(
+        self, current_date: date, batch_size: int | None = None
+    ) -> dict:
+        """
+        Создать транзакции по всем шаблонам, у которых next_occurrence <= current_date.
+
+        Шаблоны захватываются пачками по batch_size через FOR UPDATE SKIP
+        LOCKED, поэтому несколько воркеров (и ручной запуск из админки)
+        обрабатывают непересекающиеся пачки параллельно. Пропущенные периоды
+        догоняются за один запуск: на каждую дату от next_occurrence до
+        min(current_date, end_date) создаётся транзакция. Пачка — одна
+        транзакция БД: INSERT ... SELECT транзакций (ON CONFLICT DO NOTHING
+        по шаблону и дате), UPDATE next_occurrence и обновление счётчиков
+        бюджетов. Если пачка падает (например, сумма шаблона не помещается в
+        транзакцию), её шаблоны обрабатываются по одному в SAVEPOINT, чтобы
+        ошибка одного не мешала остальным и попала в отчёт.
+        """
+        batch_size = batch_size or settings.RECURRING_BATCH_SIZE
+        session = self.recurring_repo.session
         created_count = 0
         errors: list[dict] = []
+        failed: set[uuid.UUID] = set()
 
-        for recurring in due:
+        while True:
+            claimed = await self.recurring_repo.claim_due(
+                current_date, batch_size, exclude=failed
+            )
+            if not claimed:
+                await session.commit()
+                break
             try:
-                tx_data = TransactionCreate(
-                    amount=Decimal(str(recurring.amount)),
-                    currency=recurring.currency,
-                    category_id=recurring.category_id,
-                    description=f"{recurring.name} (автоматически создано)",
-                    transaction_date=recurring.next_occurrence,
-                    type=(
-                        TransactionType.INCOME
-                        if recurring.type == "income"
-                        else TransactionType.EXPENSE
-                    ),
-                    is_recurring=False,
-                    recurring_pattern=None,
-                )
-                # Создаём транзакцию; recurring_template_id задаётся в репозитории/модели
-                await self.transaction_service.create_transaction(
-                    tx_data, recurring_template_id=recurring.id
-                )
-                created_count += 1
-
-                next_date = self._next_occurrence(
-                    recurring.next_occurrence,
-                    recurring.frequency,
-                    recurring.interval,
-                    current_date,
-                )
-                await self.recurring_repo.update_next_occurrence(
-                    recurring.id, next_date
-                )
-            except Exception as e:
-                errors.append({"recurring_id": str(recurring.id), "error": str(e)})
+                inserted = await self.recurring_repo.generate_due(current_date, claimed)
+                await self._apply_budget_spend(inserted)
+                await session.commit()
+                created_count += len(inserted)
+                continue
+            except Exception:
+                await session.rollback()
+
+            # Блокировки сняты откатом: шаблоны пачки захватываются заново
+            claimed = await self.recurring_repo.claim_due(
+                current_date, batch_size, exclude=failed, template_ids=claimed
+            )
+            for recurring_id in claimed:
+                try:
+                    async with session.begin_nested():
+                        inserted = await self.recurring_repo.generate_due(
+                            current_date, [recurring_id]
+                        )
+                        await self._apply_budget_spend(inserted)
+                    created_count += len(inserted)
+                except Exception as e:
+                    failed.add(recurring_id)
+                    errors.append({"recurring_id": str(recurring_id), "error": str(e)})
+            await session.commit()
 
         return {
             "created_count": created_count,
@@ -139,20 +172,25 @@ class RecurringTransactionService:
             "errors": errors,
         }
 
+    async def _apply_budget_spend(self, inserted) -> None:
+        """Учесть созданные расходы в счётчиках бюджетов (без commit)."""
+        changes = []
+        for row in inserted:
+            changes += expense_change(
+                row.category_id, row.transaction_date, row.amount, row.type
+            )
+        await self.transaction_service.budget_spend.apply(changes)
+
     def _next_occurrence(
         self,
         current: date,
         frequency: str,
         interval: int,
-        reference: date,
+        anchor: date,
     ) -> date:
-        """Следующая дата выполнения по частоте и интервалу."""
-        if frequency == "daily":
-            return current + timedelta(days=interval)
-        if frequency == "weekly":
-            return current + timedelta(weeks=interval)
-        if frequency == "monthly":
-            return current + relativedelta(months=interval)
-        if frequency == "yearly":
-            return current + relativedelta(years=interval)
-        raise ValueError(f"Недопустимая частота: {frequency}")
+        """
+        Первая дата расписания с якорем anchor строго после current (до якоря —
+        сам якорь). Даты считаются от якоря, а не от current, поэтому день
+        месячного шаблона не зависит от того, с какой даты идёт расчёт.
+        """
+        return compile_rule(frequency, interval, anchor).next_after(current)
@@ -0,0 +1,171 @@
+"""
+Сервис ленты изменений (delta sync): клиенты получают только созданные,
+изменённые и удалённые после токена сущности, а не весь набор данных.
+
+Токен — курсор (метка времени, ранг источника, id). Каждый источник читается
+по индексу (updated_at, id), ранг упорядочивает строки разных таблиц с
+одинаковой меткой, поэтому страницы не теряют и не повторяют записи.
+"""
+
+import base64
+import binascii
+import heapq
+from datetime import datetime
+from typing import Any, NamedTuple
+import uuid
+
+from app.core.exceptions import ValidationException
+from app.models.budget import Budget as BudgetModel
+from app.models.category import Category as CategoryModel
+from app.models.recurring_transaction import (
+    RecurringTransaction as RecurringTransactionModel,
+)
+from app.models.transaction import Transaction as TransactionModel
+from app.repositories.sync import SyncRepository
+from app.schemas.budget import Budget
+from app.schemas.category import Category
+from app.schemas.recurring_transaction import RecurringTransaction
+from app.schemas.sync import SyncChanges, SyncDeletion, SyncEntityType
+from app.schemas.transaction import Transaction
+
+# Источники в порядке ранга: (тип, модель, схема, поле ответа)
+SYNC_SOURCES = (
+    (SyncEntityType.CATEGORY, CategoryModel, Category, "categories"),
+    (
+        SyncEntityType.RECURRING_TRANSACTION,
+        RecurringTransactionModel,
+        RecurringTransaction,
+        "recurring_transactions",
+    ),
+    (SyncEntityType.TRANSACTION, TransactionModel, Transaction, "transactions"),
+    (SyncEntityType.BUDGET, BudgetModel, Budget, "budgets"),
+)
+# Надгробия идут после всех сущностей с той же меткой
+TOMBSTONE_RANK = len(SYNC_SOURCES)
+DEFAULT_SYNC_LIMIT = 500
+
+
+class SyncCursor(NamedTuple):
+    """Позиция в ленте: последняя отданная запись (или начало ленты)"""
+
+    timestamp: datetime | None
+    rank: int
+    id: uuid.UUID | None
+
+
+START_CURSOR = SyncCursor(None, -1, None)
+
+
+def encode_token(cursor: SyncCursor) -> str:
+    """Непрозрачный токен курсора (base64url)"""
+    raw = "|".join(
+        [
+            cursor.timestamp.isoformat() if cursor.timestamp else "",
+            str(cursor.rank),
+            str(cursor.id) if cursor.id else "",
+        ]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode("ascii").rstrip("=")
+
+
+def decode_token(token: str | None) -> SyncCursor:
+    """Разобрать токен; пустой токен — полная синхронизация с начала ленты"""
+    if not token:
+        return START_CURSOR
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode()
+        timestamp, rank, id = raw.split("|")
+        cursor = SyncCursor(
+            datetime.fromisoformat(timestamp) if timestamp else None,
+            int(rank),
+            uuid.UUID(id) if id else None,
+        )
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ValidationException("Invalid sync token")
+    if (
+        cursor.timestamp is None
+        or cursor.timestamp.tzinfo is None
+        or not -1 <= cursor.rank <= TOMBSTONE_RANK
+        or (cursor.rank >= 0) != (cursor.id is not None)
+    ):
+        raise ValidationException("Invalid sync token")
+    return cursor
+
+
+class SyncService:
+    """Сервис ленты изменений"""
+
+    def __init__(self, sync_repo: SyncRepository):
+        self.sync_repo = sync_repo
+
+    @staticmethod
+    def _bounds(cursor: SyncCursor, rank: int) -> dict[str, Any]:
+        """
+        Условие курсора для источника: в своём ранге — по (метка, id), у
+        источников с меньшим рангом метка строго больше, с большим — не меньше.
+        """
+        return {
+            "since": cursor.timestamp,
+            "since_id": cursor.id if rank == cursor.rank else None,
+            "inclusive": rank > cursor.rank,
+        }
+
+    async def get_changes(
+        self, since: str | None = None, limit: int = DEFAULT_SYNC_LIMIT
+    ) -> SyncChanges:
+        """Страница изменений после токена since (не больше limit записей)"""
+        cursor = decode_token(since)
+        horizon = await self.sync_repo.get_horizon()
+
+        # Из каждого источника достаточно limit + 1 строк: больше на
+        # странице всё равно не окажется, лишняя строка означает has_more
+        sources = []
+        for rank, (_, model, _, _) in enumerate(SYNC_SOURCES):
+            rows = await self.sync_repo.get_changed(
+                model, horizon, limit=limit + 1, **self._bounds(cursor, rank)
+            )
+            sources.append([((r.updated_at, rank, r.id), r) for r in rows])
+        tombstones = await self.sync_repo.get_tombstones(
+            horizon, limit=limit + 1, **self._bounds(cursor, TOMBSTONE_RANK)
+        )
+        sources.append([((t.deleted_at, TOMBSTONE_RANK, t.id), t) for t in tombstones])
+
+        # Завершаем читающую транзакцию: если сессия дальше будет писать, её
+        # now() (а с ним и updated_at) не должен оказаться раньше горизонта
+        await self.sync_repo.session.commit()
+
+        merged = heapq.merge(*sources, key=lambda item: item[0])
+        page = [item for _, item in zip(range(limit + 1), merged)]
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        changes: dict[str, list] = {field: [] for *_, field in SYNC_SOURCES}
+        deleted = []
+        for (_, rank, _), row in page:
+            if rank == TOMBSTONE_RANK:
+                deleted.append(
+                    SyncDeletion(
+                        entity_type=row.entity_type,
+                        id=row.entity_id,
+                        deleted_at=row.deleted_at,
+                    )
+                )
+            else:
+                _, _, schema, field = SYNC_SOURCES[rank]
+                changes[field].append(schema.model_validate(row))
+
+        if has_more:
+            next_cursor = SyncCursor(*page[-1][0])
+        elif cursor.timestamp is not None and cursor.timestamp >= horizon:
+            next_cursor = cursor
+        else:
+            # Всё до горизонта отдано: следующий запрос начнётся с него
+            next_cursor = SyncCursor(horizon, -1, None)
+
+        return SyncChanges(
+            **changes,
+            deleted=deleted,
+            next_token=encode_token(next_cursor),
+            has_more=has_more,
+        )
@@ -4,13 +4,16 @@ from typing import Dict, TYPE_CHECKING
 from datetime import date
 from decimal import Decimal
 import uuid
-import csv
-from io import StringIO
 
+from sqlalchemy.exc import IntegrityError
+
+from app.repositories.budget_spend import BudgetSpendRepository
 from app.repositories.transaction import TransactionRepository
 from app.repositories.category import CategoryRepository
 from app.schemas.transaction import TransactionCreate, TransactionUpdate, Transaction
-from app.core.exceptions import NotFoundException
+from app.services.budget_spend import BudgetSpendService, expense_change
+from app.core.recurrence import compile_rule
+from app.core.exceptions import ConflictException, NotFoundException
 
 if TYPE_CHECKING:
     from app.repositories.recurring_transaction import RecurringTransactionRepository
@@ -24,10 +27,16 @@ class TransactionService:
         transaction_repo: TransactionRepository,
         category_repo: CategoryRepository,
         recurring_repo: "RecurringTransactionRepository | None" = None,
+        budget_spend: BudgetSpendService | None = None,
     ):
         self.transaction_repo = transaction_repo
         self.category_repo = category_repo
         self.recurring_repo = recurring_repo
+        # Счётчики расходов бюджетов обновляются в той же транзакции БД,
+        # что и запись транзакции (commit делает репозиторий транзакций)
+        self.budget_spend = budget_spend or BudgetSpendService(
+            BudgetSpendRepository(transaction_repo.session)
+        )
 
     async def create_transaction(
         self, data: TransactionCreate, recurring_template_id: uuid.UUID | None = None
@@ -64,26 +73,14 @@ class TransactionService:
                 and self.recurring_repo is not None
             ):
                 pattern = data.recurring_pattern
-
-                # Вычислить следующую дату выполнения (после даты транзакции)
-                from dateutil.relativedelta import relativedelta
-                from datetime import timedelta
-
                 frequency = pattern.frequency
                 interval = pattern.interval
                 start_date = data.transaction_date
 
-                # Вычислить next_occurrence как следующую дату ПОСЛЕ start_date
-                if frequency == "daily":
-                    next_occurrence = start_date + timedelta(days=interval)
-                elif frequency == "weekly":
-                    next_occurrence = start_date + timedelta(weeks=interval)
-                elif frequency == "monthly":
-                    next_occurrence = start_date + relativedelta(months=interval)
-                elif frequency == "yearly":
-                    next_occurrence = start_date + relativedelta(years=interval)
-                else:
-                    next_occurrence = start_date + relativedelta(months=1)
+                # next_occurrence — следующая дата расписания ПОСЛЕ start_date
+                next_occurrence = compile_rule(
+                    frequency, interval, start_date
+                ).next_after(start_date)
 
                 # Создать шаблон повторяющейся транзакции
                 template_data = {
@@ -105,6 +102,14 @@ class TransactionService:
                 template = await self.recurring_repo.create(**template_data)
                 transaction_data["recurring_template_id"] = template.id
 
+            await self.budget_spend.apply(
+                expense_change(
+                    data.category_id,
+                    data.transaction_date,
+                    data.amount,
+                    data.type.value,
+                )
+            )
             transaction = await self.transaction_repo.create(**transaction_data)
             return Transaction.model_validate(transaction)
         except Exception as e:
@@ -164,6 +169,13 @@ class TransactionService:
         existing = await self.transaction_repo.get_by_id(transaction_id)
         if not existing:
             raise NotFoundException("Transaction not found")
+        # Прежний вклад в расходы: объект изменится при обновлении
+        old_change = expense_change(
+            existing.category_id,
+            existing.transaction_date,
+            existing.amount,
+            existing.type,
+        )
 
         # Проверить категорию если она обновляется
         if data.category_id:
@@ -204,25 +216,14 @@ class TransactionService:
                     else dict(pattern)
                 )
 
-            # Вычислить следующую дату выполнения (после даты транзакции)
-            from dateutil.relativedelta import relativedelta
-            from datetime import timedelta
-
             frequency = pattern.get("frequency", "monthly")
             interval = pattern.get("interval", 1)
             start_date = existing.transaction_date
 
-            # Вычислить next_occurrence как следующую дату ПОСЛЕ start_date
-            if frequency == "daily":
-                next_occurrence = start_date + timedelta(days=interval)
-            elif frequency == "weekly":
-                next_occurrence = start_date + timedelta(weeks=interval)
-            elif frequency == "monthly":
-                next_occurrence = start_date + relativedelta(months=interval)
-            elif frequency == "yearly":
-                next_occurrence = start_date + relativedelta(years=interval)
-            else:
-                next_occurrence = start_date + relativedelta(months=1)
+            # next_occurrence — следующая дата расписания ПОСЛЕ start_date
+            next_occurrence = compile_rule(frequency, interval, start_date).next_after(
+                start_date
+            )
 
             # Создать шаблон повторяющейся транзакции
             template_data = {
@@ -243,92 +244,80 @@ class TransactionService:
             template = await self.recurring_repo.create(**template_data)
             update_data["recurring_template_id"] = template.id
 
-        # Обновить транзакцию
-        updated = await self.transaction_repo.update(transaction_id, update_data)
+        # Перенести вклад в расходы: сумма, дата, категория или тип могли измениться
+        def new_value(field: str):
+            value = update_data.get(field)
+            return value if value is not None else getattr(existing, field)
+
+        # Дата транзакции шаблона уникальна: перенос на занятую дату — конфликт
+        new_date = new_value("transaction_date")
+        if (
+            existing.recurring_template_id is not None
+            and new_date != existing.transaction_date
+            and await self.transaction_repo.template_occurrence_exists(
+                existing.recurring_template_id, new_date, exclude_id=transaction_id
+            )
+        ):
+            raise ConflictException(
+                f"Transaction of this recurring template on {new_date} already exists"
+            )
+
+        new_change = expense_change(
+            new_value("category_id"),
+            new_value("transaction_date"),
+            new_value("amount"),
+            new_value("type"),
+        )
+        await self.budget_spend.apply(
+            [(c, d, -amount) for c, d, amount in old_change] + new_change
+        )
+
+        # Обновить транзакцию (IntegrityError — гонка с параллельной обработкой шаблона)
+        try:
+            updated = await self.transaction_repo.update(transaction_id, update_data)
+        except IntegrityError as e:
+            await self.transaction_repo.session.rollback()
+            if "uq_transactions_recurring_template_date" not in str(e.orig):
+                raise
+            raise ConflictException(
+                f"Transaction of this recurring template on {new_date} already exists"
+            )
         return Transaction.model_validate(updated)
 
     async def delete_transaction(self, transaction_id: uuid.UUID) -> None:
         """Удалить транзакцию"""
+        existing = await self.transaction_repo.get_by_id(transaction_id)
+        if not existing:
+            raise NotFoundException("Transaction not found")
+        await self.budget_spend.apply(
+            (c, d, -amount)
+            for c, d, amount in expense_change(
+                existing.category_id,
+                existing.transaction_date,
+                existing.amount,
+                existing.type,
+            )
+        )
         deleted = await self.transaction_repo.delete(transaction_id)
         if not deleted:
             raise NotFoundException("Transaction not found")
 
-    async def import_from_csv(self, csv_content: str) -> Dict:
-        """Импортировать транзакции из CSV"""
-        reader = csv.DictReader(StringIO(csv_content))
-        created = []
-        errors = []
-
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                # Найти категорию по имени
-                category = await self.category_repo.get_by_name_and_type(
-                    row["category_name"], row["type"]
+    async def bulk_import(self, rows: list[dict]) -> int:
+        """
+        Массово вставить импортированные транзакции (категории уже разрешены).
+        Строки с уже известным import_fingerprint пропускаются; возвращает число вставленных.
+        """
+
+        async def count_inserted(inserted) -> None:
+            # Только реально вставленные строки, до commit вставки
+            await self.budget_spend.apply(
+                change
+                for row in inserted
+                for change in expense_change(
+                    row.category_id, row.transaction_date, row.amount, row.type
                 )
-                if not category:
-                    errors.append(
-                        {
-                            "row": row_num,
-                            "error": f"Category '{row['category_name']}' not found",
-                        }
-                    )
-                    continue
-
-                # Создать транзакцию
-                transaction_data = TransactionCreate(
-                    amount=Decimal(row["amount"]),
-                    currency=row.get("currency", "USD"),
-                    category_id=category.id,
-                    description=row.get("description"),
-                    transaction_date=date.fromisoformat(row["transaction_date"]),
-                    type=row["type"],
-                    is_recurring=False,
-                )
-                transaction = await self.create_transaction(transaction_data)
-                created.append(transaction)
-            except Exception as e:
-                errors.append({"row": row_num, "error": str(e)})
-
-        return {"created": len(created), "errors": errors}
-
-    async def export_to_csv(
-        self,
-        start_date: date | None = None,
-        end_date: date | None = None,
-        category_id: uuid.UUID | None = None,
-    ) -> str:
-        """Экспортировать транзакции в CSV"""
-        transactions, _ = await self.transaction_repo.get_filtered(
-            start_date=start_date,
-            end_date=end_date,
-            category_id=category_id,
-            limit=10000,
-        )
-
-        output = StringIO()
-        writer = csv.DictWriter(
-            output,
-            fieldnames=[
-                "amount",
-                "currency",
-                "category_name",
-                "description",
-                "transaction_date",
-                "type",
-            ],
-        )
-        writer.writeheader()
-
-        for t in transactions:
-            writer.writerow(
-                {
-                    "amount": str(t.amount),
-                    "currency": t.currency,
-                    "category_name": t.category.name,
-                    "description": t.description or "",
-                    "transaction_date": t.transaction_date.isoformat(),
-                    "type": t.type,
-                }
             )
 
-        return output.getvalue()
+        return await self.transaction_repo.bulk_insert_ignore_conflicts(
+            rows, before_commit=count_inserted
+        )
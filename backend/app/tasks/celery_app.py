@@ -2,7 +2,8 @@
 Конфигурация Celery для фоновых задач.
 
 - Broker: Redis
-- Celery Beat: повторяющиеся транзакции (время из БД), обновление курсов (01:00 UTC)
+- Celery Beat: повторяющиеся транзакции (время из БД), обновление курсов (01:00 UTC),
+  очистка файлов фонового экспорта (ежечасно)
 """
 
 from celery import Celery
@@ -82,4 +83,8 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.currency_tasks.update_exchange_rates_task",
         "schedule": crontab(hour=1, minute=0),  # Ежедневно 01:00 UTC
     },
+    "cleanup-export-artifacts": {
+        "task": "app.tasks.csv_tasks.cleanup_export_artifacts_task",
+        "schedule": crontab(minute=15),  # Ежечасно, в :15
+    },
 }
@@ -1,9 +1,10 @@
 """
-Фоновые задачи импорта CSV.
+Фоновые задачи импорта и экспорта CSV.
 Сохраняют статус в TaskResult (running → completed/failed).
 """
 
 import logging
+from datetime import timedelta
 from uuid import uuid4
 
 from app.tasks.celery_app import celery_app
@@ -12,10 +13,17 @@ from app.schemas.csv_import import CSVColumnMapping
 logger = logging.getLogger(__name__)
 
 
-async def _run_import(csv_content: str, mapping: dict, date_format: str, task_id: str):
+async def _run_import(
+    csv_content: str,
+    mapping: dict,
+    date_format: str,
+    task_id: str,
+    import_source: str = "csv",
+):
     """Асинхронная логика импорта с сохранением результата в TaskResult."""
     from app.core.async_runner import get_session_factory
     from app.repositories.category import CategoryRepository
+    from app.repositories.task_result import TaskResultRepository
     from app.repositories.transaction import TransactionRepository
     from app.services.transaction import TransactionService
     from app.services.csv_import import CSVImportService
@@ -23,13 +31,18 @@ async def _run_import(csv_content: str, mapping: dict, date_format: str, task_id
 
     factory = get_session_factory()
     async with factory() as session:
-        task_result = TaskResult(
-            id=uuid4(),
-            task_id=task_id,
-            task_type="csv_import",
-            status="running",
-        )
-        session.add(task_result)
+        # TaskResult мог быть создан заранее (при постановке в очередь, с отпечатком файла)
+        task_result = await TaskResultRepository(session).get_by_task_id(task_id)
+        if task_result is None:
+            task_result = TaskResult(
+                id=uuid4(),
+                task_id=task_id,
+                task_type="csv_import",
+                status="running",
+            )
+            session.add(task_result)
+        else:
+            task_result.status = "running"
         await session.commit()
         await session.refresh(task_result)
 
@@ -40,8 +53,9 @@ async def _run_import(csv_content: str, mapping: dict, date_format: str, task_id
             transaction_service = TransactionService(transaction_repo, category_repo)
             csv_service = CSVImportService(transaction_service, category_repo)
             result = await csv_service._process_csv(
-                csv_content, mapping_obj, date_format
+                csv_content, mapping_obj, date_format, import_source
             )
+            result.task_id = task_id
             task_result.status = "completed"
             task_result.result = result.model_dump()
             task_result.error = None
@@ -54,10 +68,90 @@ async def _run_import(csv_content: str, mapping: dict, date_format: str, task_id
 
 
 @celery_app.task(bind=True)
-def import_csv_task(self, csv_content: str, mapping: dict, date_format: str) -> dict:
+def import_csv_task(
+    self,
+    csv_content: str,
+    mapping: dict,
+    date_format: str,
+    import_source: str = "csv",
+) -> dict:
     """Фоновая задача импорта CSV. Сохраняет статус в TaskResult."""
     from app.core.async_runner import run_async
 
     task_id = self.request.id
-    run_async(_run_import(csv_content, mapping, date_format, task_id))
+    run_async(_run_import(csv_content, mapping, date_format, task_id, import_source))
+    return {"task_id": task_id, "status": "completed"}
+
+
+async def _run_export(task_id: str, params: dict, compression: str):
+    """
+    Асинхронная логика экспорта в сжатый файл. Прогресс пишется в TaskResult
+    через отдельную сессию: основная занята потоковой выгрузкой.
+    """
+    from app.core.async_runner import get_session_factory
+    from app.core.config import settings
+    from app.repositories.task_result import TaskResultRepository
+    from app.repositories.transaction import TransactionRepository
+    from app.schemas.csv_import import CSVExportRequest, ExportCompression
+    from app.services.csv_export import CSVExportService
+    from app.models.task_result import TaskResult
+
+    factory = get_session_factory()
+    async with factory() as status_session:
+        task_result = await TaskResultRepository(status_session).get_by_task_id(task_id)
+        if task_result is None:
+            task_result = TaskResult(
+                id=uuid4(), task_id=task_id, task_type="csv_export", status="running"
+            )
+            status_session.add(task_result)
+        else:
+            task_result.status = "running"
+        await status_session.commit()
+
+        async def on_progress(result: dict) -> None:
+            task_result.result = result
+            await status_session.commit()
+
+        try:
+            async with factory() as export_session:
+                service = CSVExportService(
+                    TransactionRepository(export_session),
+                    use_copy=settings.CSV_EXPORT_USE_COPY,
+                )
+                result = await service.export_to_artifact(
+                    task_id,
+                    CSVExportRequest(**params),
+                    ExportCompression(compression),
+                    on_progress,
+                )
+            task_result.status = "completed"
+            task_result.result = result
+            task_result.error = None
+        except Exception as e:
+            logger.exception("Ошибка экспорта CSV: %s", e)
+            task_result.status = "failed"
+            task_result.result = None
+            task_result.error = str(e)
+        await status_session.commit()
+
+
+@celery_app.task(bind=True)
+def export_csv_task(self, params: dict, compression: str = "gzip") -> dict:
+    """Фоновая задача экспорта CSV в сжатый файл. Сохраняет статус в TaskResult."""
+    from app.core.async_runner import run_async
+
+    task_id = self.request.id
+    run_async(_run_export(task_id, params, compression))
     return {"task_id": task_id, "status": "completed"}
+
+
+@celery_app.task
+def cleanup_export_artifacts_task() -> dict:
+    """Удалить файлы фонового экспорта старше EXPORT_ARTIFACT_RETENTION_HOURS."""
+    from app.core.config import settings
+    from app.services.export_artifacts import cleanup_expired_artifacts
+
+    removed = cleanup_expired_artifacts(
+        timedelta(hours=settings.EXPORT_ARTIFACT_RETENTION_HOURS)
+    )
+    return {"removed": removed}
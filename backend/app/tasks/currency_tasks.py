@@ -1,23 +1,79 @@
-"""Ежедневная задача обновления курсов валют (01:00 UTC)."""
+"""
+Ежедневная задача обновления курсов валют (01:00 UTC) и загрузка
+исторических курсов по запросу администратора.
+"""
+
+import logging
+from uuid import uuid4
 
 from app.tasks.celery_app import celery_app
 from app.core.async_runner import run_async, get_session_factory
 
+logger = logging.getLogger(__name__)
+
 
 async def _run_update_rates():
-    """Обновить курсы валют через API."""
+    """Обновить курсы валют через API (базы — EXCHANGE_RATE_BASE_CURRENCIES)."""
     from app.repositories.exchange_rate import ExchangeRateRepository
     from app.repositories.currency import CurrencyRepository
-    from app.services.exchange_rate import ExchangeRateService
+    from app.services.exchange_rate import ExchangeRateService, base_currencies
 
     async with get_session_factory()() as session:
         exchange_repo = ExchangeRateRepository(session)
         currency_repo = CurrencyRepository(session)
         service = ExchangeRateService(exchange_repo, currency_repo)
-        return await service.update_rates("USD")
+        return await service.update_rates_many(base_currencies())
 
 
 @celery_app.task
 def update_exchange_rates_task() -> dict:
     """Ежедневная задача обновления курсов валют."""
     return run_async(_run_update_rates())
+
+
+async def _run_backfill(task_id: str, params: dict):
+    """Загрузить исторические курсы, статус и итог — в TaskResult."""
+    from app.models.task_result import TaskResult
+    from app.repositories.currency import CurrencyRepository
+    from app.repositories.exchange_rate import ExchangeRateRepository
+    from app.repositories.task_result import TaskResultRepository
+    from app.schemas.currency import ExchangeRateBackfillRequest
+    from app.services.exchange_rate import ExchangeRateService
+
+    async with get_session_factory()() as session:
+        task_result = await TaskResultRepository(session).get_by_task_id(task_id)
+        if task_result is None:
+            task_result = TaskResult(
+                id=uuid4(),
+                task_id=task_id,
+                task_type="exchange_rate_backfill",
+                status="running",
+            )
+            session.add(task_result)
+        else:
+            task_result.status = "running"
+        await session.commit()
+
+        service = ExchangeRateService(
+            ExchangeRateRepository(session), CurrencyRepository(session)
+        )
+        try:
+            result = await service.run_backfill(ExchangeRateBackfillRequest(**params))
+            task_result.status = "completed"
+            task_result.result = result
+            task_result.error = None
+        except Exception as e:
+            logger.exception("Ошибка загрузки исторических курсов: %s", e)
+            await session.rollback()
+            task_result.status = "failed"
+            task_result.result = None
+            task_result.error = str(e)
+        await session.commit()
+
+
+@celery_app.task(bind=True)
+def backfill_exchange_rates_task(self, params: dict) -> dict:
+    """Загрузка исторических курсов за период. Сохраняет статус в TaskResult."""
+    task_id = self.request.id
+    run_async(_run_backfill(task_id, params))
+    return {"task_id": task_id, "status": "completed"}
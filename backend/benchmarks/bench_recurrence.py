@@ -0,0 +1,101 @@
+"""
+Микро-бенчмарки расписаний повторяющихся транзакций (app.core.recurrence).
+
+Запуск из backend/:  python -m benchmarks.bench_recurrence [--number N]
+
+Сравнивает пошаговый relativedelta (как было до общего модуля) с
+ScheduleRule (кэш правил и «зажатия» к концу месяца) и пакетную
+развёртку expand_schedules на прогнозе по тысячам шаблонов.
+"""
+
+import argparse
+import random
+import timeit
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from app.core.recurrence import ScheduleRule, compile_rule, expand_schedules
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+TODAY = date(2026, 10, 19)
+HORIZON = TODAY + timedelta(days=730)
+
+
+def _relativedelta_step(current: date, frequency: str, interval: int) -> date:
+    return (
+        current
+        + {
+            "daily": relativedelta(days=interval),
+            "weekly": relativedelta(weeks=interval),
+            "monthly": relativedelta(months=interval),
+            "yearly": relativedelta(years=interval),
+        }[frequency]
+    )
+
+
+def _templates(count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    return [
+        (
+            rnd.choice(FREQUENCIES),
+            rnd.randint(1, 3),
+            TODAY + timedelta(days=rnd.randint(0, 60)),
+        )
+        for _ in range(count)
+    ]
+
+
+def bench_next_after(templates):
+    """Следующая дата для каждого шаблона"""
+    return {
+        "relativedelta": lambda: [
+            _relativedelta_step(anchor, f, i) for f, i, anchor in templates
+        ],
+        "ScheduleRule (без кэша)": lambda: [
+            ScheduleRule(f, i, anchor).next_after(anchor) for f, i, anchor in templates
+        ],
+        "compile_rule (кэш)": lambda: [
+            compile_rule(f, i, anchor).next_after(anchor) for f, i, anchor in templates
+        ],
+    }
+
+
+def bench_two_year_series(templates):
+    """Все даты на 2 года вперёд"""
+
+    def stepwise():
+        for f, i, current in templates:
+            while current <= HORIZON:
+                current = _relativedelta_step(current, f, i)
+
+    schedules = [(f, i, anchor, HORIZON) for f, i, anchor in templates]
+    return {
+        "relativedelta по шагам": stepwise,
+        "ScheduleRule.between": lambda: [
+            compile_rule(f, i, anchor).between(TODAY, HORIZON)
+            for f, i, anchor in templates
+        ],
+        "expand_schedules (NumPy)": lambda: expand_schedules(schedules, TODAY),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--templates", type=int, default=1000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    templates = _templates(args.templates)
+    for title, cases in (
+        ("next_after", bench_next_after(templates)),
+        ("ряд дат на 2 года", bench_two_year_series(templates)),
+    ):
+        print(f"{title}, шаблонов: {len(templates)}")
+        for name, func in cases.items():
+            best = min(timeit.repeat(func, number=1, repeat=args.number))
+            print(f"  {name:<28} {best * 1000:9.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -46,11 +46,14 @@ async def test_db() -> AsyncGenerator[AsyncSession, None]:
     from app.models.category import Category  # noqa: F401
     from app.models.transaction import Transaction  # noqa: F401
     from app.models.budget import Budget  # noqa: F401
+    from app.models.budget_spend import BudgetSpend  # noqa: F401
+    from app.models.budget_threshold_event import BudgetThresholdEvent  # noqa: F401
     from app.models.recurring_transaction import RecurringTransaction  # noqa: F401
     from app.models.currency import Currency  # noqa: F401
     from app.models.exchange_rate import ExchangeRate  # noqa: F401
     from app.models.task_result import TaskResult  # noqa: F401
     from app.models.app_setting import AppSetting  # noqa: F401
+    from app.models.sync_tombstone import SyncTombstone  # noqa: F401
 
     # Create async engine for test database
     engine = create_async_engine(
@@ -71,6 +74,11 @@ async def test_db() -> AsyncGenerator[AsyncSession, None]:
         expire_on_commit=False,
     )
 
+    # Процессный кэш курсов не должен переживать пересоздание таблиц
+    from app.services.exchange_rate_cache import exchange_rate_cache
+
+    exchange_rate_cache.invalidate()
+
     # Create test session
     async with async_session() as session:
         yield session
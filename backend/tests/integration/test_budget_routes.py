@@ -5,6 +5,7 @@ Integration tests for budget routes
 import pytest
 from httpx import AsyncClient
 from datetime import date, timedelta
+from decimal import Decimal
 
 
 @pytest.mark.asyncio
@@ -217,3 +218,171 @@ async def test_get_budget_progress(client: AsyncClient):
     assert float(data["spent"]) == 1500.0
     assert float(data["remaining"]) == 3500.0
     assert float(data["percentage"]) == 30.0
+
+
+@pytest.mark.asyncio
+async def test_budget_progress_counts_only_category_expenses_in_period(
+    client: AsyncClient,
+):
+    """В прогресс попадают только расходы категории бюджета внутри периода."""
+    categories = []
+    for name, type_ in (("Такси", "expense"), ("Кино", "expense"), ("Бонус", "income")):
+        response = await client.post(
+            "/api/v1/categories/",
+            json={"name": name, "icon": "🚕", "type": type_, "color": "#123456"},
+        )
+        categories.append(response.json()["id"])
+    taxi, cinema, bonus = categories
+
+    budget_response = await client.post(
+        "/api/v1/budgets/",
+        json={
+            "category_id": taxi,
+            "amount": 1000.0,
+            "period": "monthly",
+            "start_date": "2024-03-01",
+            "end_date": "2024-03-31",
+        },
+    )
+    budget_id = budget_response.json()["id"]
+
+    for amount, category_id, type_, day in (
+        (100.25, taxi, "expense", "2024-03-01"),
+        (200.50, taxi, "expense", "2024-03-31"),
+        (999.0, taxi, "expense", "2024-04-01"),
+        (999.0, cinema, "expense", "2024-03-10"),
+        (999.0, bonus, "income", "2024-03-10"),
+    ):
+        response = await client.post(
+            "/api/v1/transactions/",
+            json={
+                "amount": amount,
+                "type": type_,
+                "category_id": category_id,
+                "transaction_date": day,
+            },
+        )
+        assert response.status_code == 201
+
+    response = await client.get(f"/api/v1/budgets/{budget_id}/progress")
+    assert response.status_code == 200
+    data = response.json()
+    assert Decimal(data["spent"]) == Decimal("300.75")
+    assert Decimal(data["remaining"]) == Decimal("699.25")
+
+
+@pytest.mark.asyncio
+async def test_bulk_budget_progress_matches_single_progress(client: AsyncClient):
+    """GET /budgets/progress совпадает с /{id}/progress и учитывает фильтры."""
+    cat_response = await client.post(
+        "/api/v1/categories/",
+        json={"name": "Продукты", "icon": "🛒", "type": "expense", "color": "#123456"},
+    )
+    category_id = cat_response.json()["id"]
+
+    budget_ids = {}
+    for period, start, end in (
+        ("monthly", "2024-03-01", "2024-03-31"),
+        ("yearly", "2024-01-01", "2024-12-31"),
+        ("monthly", "2024-05-01", "2024-05-31"),
+    ):
+        response = await client.post(
+            "/api/v1/budgets/",
+            json={
+                "category_id": category_id,
+                "amount": 1000.0,
+                "period": period,
+                "start_date": start,
+                "end_date": end,
+            },
+        )
+        budget_ids[(period, start)] = response.json()["id"]
+
+    for amount, day in (
+        (100.0, "2024-03-05"),
+        (50.5, "2024-03-20"),
+        (10, "2024-07-01"),
+    ):
+        await client.post(
+            "/api/v1/transactions/",
+            json={
+                "amount": amount,
+                "type": "expense",
+                "category_id": category_id,
+                "transaction_date": day,
+            },
+        )
+
+    response = await client.get("/api/v1/budgets/progress")
+    assert response.status_code == 200
+    items = {item["budget"]["id"]: item for item in response.json()}
+    assert len(items) == 3
+    for budget_id in budget_ids.values():
+        single = (await client.get(f"/api/v1/budgets/{budget_id}/progress")).json()
+        assert items[budget_id] == single
+    assert Decimal(items[budget_ids[("monthly", "2024-03-01")]]["spent"]) == Decimal(
+        "150.50"
+    )
+    assert Decimal(items[budget_ids[("yearly", "2024-01-01")]]["spent"]) == Decimal(
+        "160.50"
+    )
+    assert Decimal(items[budget_ids[("monthly", "2024-05-01")]]["spent"]) == 0
+
+    response = await client.get(
+        "/api/v1/budgets/progress",
+        params={"active_on": "2024-03-15", "period": "monthly"},
+    )
+    assert [item["budget"]["id"] for item in response.json()] == [
+        budget_ids[("monthly", "2024-03-01")]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_budget_forecast_single_and_bulk(client: AsyncClient):
+    """Прогноз по дневным расходам: одиночный и массовый варианты совпадают."""
+    cat_response = await client.post(
+        "/api/v1/categories/",
+        json={"name": "Обеды", "icon": "🍲", "type": "expense", "color": "#123456"},
+    )
+    category_id = cat_response.json()["id"]
+    budget_response = await client.post(
+        "/api/v1/budgets/",
+        json={
+            "category_id": category_id,
+            "amount": 500.0,
+            "period": "monthly",
+            "start_date": "2024-03-01",
+            "end_date": "2024-03-31",
+        },
+    )
+    budget_id = budget_response.json()["id"]
+    for day in range(1, 15):
+        await client.post(
+            "/api/v1/transactions/",
+            json={
+                "amount": 20.0,
+                "type": "expense",
+                "category_id": category_id,
+                "transaction_date": f"2024-03-{day:02d}",
+            },
+        )
+
+    response = await client.get(
+        f"/api/v1/budgets/{budget_id}/forecast", params={"as_of": "2024-03-14"}
+    )
+    assert response.status_code == 200
+    forecast = response.json()
+    assert forecast["days_elapsed"] == 14
+    assert Decimal(forecast["spent"]) == Decimal("280.00")
+    assert Decimal(forecast["daily_rate"]) == Decimal("20.00")
+    assert Decimal(forecast["projected_spend"]) == Decimal("620.00")
+    assert forecast["will_exceed"] is True
+
+    bulk = await client.get("/api/v1/budgets/forecast", params={"as_of": "2024-03-14"})
+    assert bulk.status_code == 200
+    assert bulk.json() == [forecast]
+
+    missing = await client.get(
+        "/api/v1/budgets/00000000-0000-0000-0000-000000000000/forecast"
+    )
+    assert missing.status_code == 404
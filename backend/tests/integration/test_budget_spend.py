@@ -0,0 +1,184 @@
+"""
+Интеграционные тесты счётчиков расходов бюджетов и событий порогов.
+"""
+
+import base64
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import delete
+
+from app.models.budget_spend import BudgetSpend
+
+
+async def _create_category(client: AsyncClient, name: str) -> str:
+    response = await client.post(
+        "/api/v1/categories/",
+        json={"name": name, "icon": "🛒", "type": "expense", "color": "#123456"},
+    )
+    return response.json()["id"]
+
+
+async def _create_budget(client: AsyncClient, category_id: str, amount=100) -> str:
+    response = await client.post(
+        "/api/v1/budgets/",
+        json={
+            "category_id": category_id,
+            "amount": amount,
+            "period": "monthly",
+            "start_date": "2024-03-01",
+            "end_date": "2024-03-31",
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def _create_expense(client: AsyncClient, category_id: str, amount, day) -> str:
+    response = await client.post(
+        "/api/v1/transactions/",
+        json={
+            "amount": amount,
+            "type": "expense",
+            "category_id": category_id,
+            "transaction_date": day,
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def _spent(client: AsyncClient, budget_id: str) -> Decimal:
+    response = await client.get(f"/api/v1/budgets/{budget_id}/progress")
+    return Decimal(response.json()["spent"])
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_counter_follows_transaction_changes(client: AsyncClient, test_db):
+    """Создание, перенос (сумма, дата, категория, тип) и удаление меняют счётчик."""
+    food = await _create_category(client, "Продукты")
+    cafe = await _create_category(client, "Кафе")
+    food_budget = await _create_budget(client, food)
+    cafe_budget = await _create_budget(client, cafe)
+
+    transaction_id = await _create_expense(client, food, 40, "2024-03-10")
+    await _create_expense(client, food, 5, "2024-04-01")
+    assert await _spent(client, food_budget) == Decimal("40")
+
+    url = f"/api/v1/transactions/{transaction_id}"
+    await client.put(url, json={"amount": 55.5})
+    assert await _spent(client, food_budget) == Decimal("55.5")
+
+    await client.put(url, json={"categoryId": cafe})
+    assert await _spent(client, food_budget) == 0
+    assert await _spent(client, cafe_budget) == Decimal("55.5")
+
+    await client.put(url, json={"transactionDate": "2024-02-29"})
+    assert await _spent(client, cafe_budget) == 0
+
+    await client.put(url, json={"transactionDate": "2024-03-31"})
+    await client.put(url, json={"type": "income"})
+    assert await _spent(client, cafe_budget) == 0
+    await client.put(url, json={"type": "expense"})
+    assert await _spent(client, cafe_budget) == Decimal("55.5")
+
+    assert (await client.delete(url)).status_code == 204
+    assert await _spent(client, cafe_budget) == 0
+
+    # Без счётчика прогресс считается по транзакциям и совпадает с ним
+    await _create_expense(client, cafe, 12, "2024-03-02")
+    counted = await client.get("/api/v1/budgets/progress")
+    await test_db.execute(delete(BudgetSpend))
+    await test_db.commit()
+    assert (await client.get("/api/v1/budgets/progress")).json() == counted.json()
+    assert await _spent(client, cafe_budget) == Decimal("12")
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_budget_created_after_transactions_starts_from_their_sum(
+    client: AsyncClient,
+):
+    """Новый бюджет учитывает уже существующие расходы и сразу пишет события."""
+    category_id = await _create_category(client, "Такси")
+    await _create_expense(client, category_id, 90, "2024-03-05")
+    budget_id = await _create_budget(client, category_id, amount=100)
+    assert await _spent(client, budget_id) == Decimal("90")
+
+    response = await client.get(
+        "/api/v1/budgets/threshold-events", params={"budget_id": budget_id}
+    )
+    assert [e["threshold"] for e in response.json()] == [80]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_threshold_events_are_recorded_on_crossing(client: AsyncClient):
+    """События 80% и 100% пишутся один раз при пересечении, повторно — после спада."""
+    category_id = await _create_category(client, "Развлечения")
+    await _create_budget(client, category_id, amount=100)
+
+    async def thresholds() -> list[int]:
+        response = await client.get("/api/v1/budgets/threshold-events")
+        assert response.status_code == 200
+        return sorted(e["threshold"] for e in response.json())
+
+    await _create_expense(client, category_id, 50, "2024-03-01")
+    assert await thresholds() == []
+    last = await _create_expense(client, category_id, 30, "2024-03-02")
+    assert await thresholds() == [80]
+    await _create_expense(client, category_id, 5, "2024-03-03")
+    assert await thresholds() == [80]
+    await _create_expense(client, category_id, 20, "2024-03-04")
+    assert await thresholds() == [80, 100]
+
+    # Спад ниже 80% (105 -> 75) и новое пересечение обоих порогов
+    await client.delete(f"/api/v1/transactions/{last}")
+    assert await thresholds() == [80, 100]
+    await _create_expense(client, category_id, 30, "2024-03-06")
+    assert await thresholds() == [80, 80, 100, 100]
+
+    # Уменьшение суммы бюджета тоже может пересечь порог
+    other = await _create_category(client, "Книги")
+    other_budget = await _create_budget(client, other, amount=100)
+    await _create_expense(client, other, 60, "2024-03-10")
+    await client.put(f"/api/v1/budgets/{other_budget}", json={"amount": 70})
+    response = await client.get(
+        "/api/v1/budgets/threshold-events", params={"budget_id": other_budget}
+    )
+    assert [(e["threshold"], Decimal(e["budget_amount"])) for e in response.json()] == [
+        (80, Decimal("70"))
+    ]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_csv_import_counts_only_inserted_rows(client: AsyncClient):
+    """Импорт CSV обновляет счётчик; повторная загрузка того же файла его не меняет."""
+    category_id = await _create_category(client, "Кафе")
+    budget_id = await _create_budget(client, category_id, amount=1000)
+    csv_content = (
+        "amount,date,type,category\n"
+        "10.50,2024-03-01,expense,Кафе\n"
+        "20.00,2024-03-15,expense,Кафе\n"
+        "99.00,2024-04-15,expense,Кафе\n"
+        "500.00,2024-03-15,income,Кафе\n"
+    )
+    payload = {
+        "file_content": base64.b64encode(csv_content.encode()).decode("ascii"),
+        "mapping": {
+            "amount": "amount",
+            "transaction_date": "date",
+            "type": "type",
+            "category_name": "category",
+        },
+        "date_format": "%Y-%m-%d",
+    }
+    response = await client.post("/api/v1/csv/import", json=payload)
+    assert response.json()["created_count"] == 4
+    assert await _spent(client, budget_id) == Decimal("30.50")
+
+    await client.post("/api/v1/csv/import", json=payload)
+    assert await _spent(client, budget_id) == Decimal("30.50")
@@ -0,0 +1,91 @@
+"""
+Интеграционные тесты проверки CSV без записи в БД (POST /api/v1/csv/import, dry_run).
+"""
+
+import base64
+import json
+
+import pytest
+from httpx import AsyncClient
+
+
+MAPPING = {
+    "amount": "amount",
+    "category_name": "category",
+    "transaction_date": "date",
+    "type": "type",
+}
+
+
+def _payload(csv_content: str, **extra) -> dict:
+    return {
+        "file_content": base64.b64encode(csv_content.encode("utf-8")).decode("ascii"),
+        "mapping": MAPPING,
+        "date_format": "%Y-%m-%d",
+        "dry_run": True,
+        **extra,
+    }
+
+
+def _parse_ndjson(text: str) -> list[dict]:
+    return [json.loads(line) for line in text.splitlines() if line]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_dry_run_streams_errors_and_writes_nothing(client: AsyncClient):
+    """Dry run возвращает NDJSON с ошибками и summary, не создавая категорий и транзакций."""
+    csv_content = (
+        "amount,date,type,category\n"
+        "100,2024-01-01,income,Новая\n"
+        "abc,2024-01-02,expense,Еда\n"
+        "50,01/03/2024,expense,Еда\n"
+    )
+    response = await client.post("/api/v1/csv/import", json=_payload(csv_content))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = _parse_ndjson(response.text)
+    errors = [line for line in lines if line["type"] == "error"]
+    assert [e["row"] for e in errors] == [3, 4]
+    assert lines[-1] == {
+        "type": "summary",
+        "checked_rows": 3,
+        "valid_rows": 1,
+        "error_count": 2,
+        "aborted": False,
+    }
+
+    assert (await client.get("/api/v1/categories/")).json() == []
+    assert (await client.get("/api/v1/transactions/")).json()["total"] == 0
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_dry_run_aborts_after_max_errors(client: AsyncClient):
+    """После max_errors ошибок проверка прерывается, остаток файла не разбирается."""
+    rows = "".join(f"{i + 1},bad-date,expense,Еда\n" for i in range(50_000))
+    response = await client.post(
+        "/api/v1/csv/import",
+        json=_payload("amount,date,type,category\n" + rows, max_errors=5),
+    )
+    lines = _parse_ndjson(response.text)
+    assert len(lines) == 6
+    summary = lines[-1]
+    assert summary["aborted"] is True
+    assert summary["error_count"] == 5
+    assert summary["checked_rows"] == 5
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_dry_run_reports_missing_columns(client: AsyncClient):
+    """Если в файле нет обязательной колонки из маппинга — одна ошибка и прерывание."""
+    response = await client.post(
+        "/api/v1/csv/import",
+        json=_payload("sum,date,type,category\n100,2024-01-01,income,Еда\n"),
+    )
+    lines = _parse_ndjson(response.text)
+    assert lines[0]["row"] == 1
+    assert "amount" in lines[0]["error"]
+    assert lines[-1]["aborted"] is True
@@ -0,0 +1,193 @@
+"""
+Интеграционные тесты фонового экспорта CSV: /csv/export?async=true,
+прогресс в TaskResult и скачивание сжатого файла с поддержкой Range.
+"""
+
+import base64
+import csv
+import gzip
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.tasks.csv_tasks import _run_export
+
+
+@pytest.fixture(autouse=True)
+def artifact_dir(tmp_path):
+    with patch.object(settings, "EXPORT_ARTIFACT_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+async def _import_rows(client: AsyncClient, count: int) -> None:
+    csv_content = "amount,date,type,category\n" + "".join(
+        f"{i + 1}.00,2024-05-{i % 28 + 1:02d},expense,Кафе\n" for i in range(count)
+    )
+    await client.post(
+        "/api/v1/csv/import",
+        json={
+            "file_content": base64.b64encode(csv_content.encode()).decode("ascii"),
+            "mapping": {
+                "amount": "amount",
+                "transaction_date": "date",
+                "type": "type",
+                "category_name": "category",
+            },
+            "date_format": "%Y-%m-%d",
+        },
+    )
+
+
+async def _run_enqueued_export(
+    client: AsyncClient, test_db: AsyncSession, params: dict | None = None
+) -> str:
+    """Поставить экспорт в очередь и выполнить задачу в процессе теста."""
+    with patch("app.tasks.csv_tasks.export_csv_task.apply_async") as apply_async:
+        response = await client.get(
+            "/api/v1/csv/export", params={"async": "true", **(params or {})}
+        )
+    assert response.status_code == 202
+    job = response.json()
+    kwargs = apply_async.call_args.kwargs
+    assert kwargs["task_id"] == job["task_id"]
+
+    factory = async_sessionmaker(test_db.bind, expire_on_commit=False)
+    with patch("app.core.async_runner.get_session_factory", return_value=factory):
+        await _run_export(job["task_id"], *kwargs["args"])
+    return job["task_id"]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_export_enqueues_pending_task(client: AsyncClient):
+    """async=true возвращает 202 с task_id; TaskResult создаётся в статусе pending."""
+    with patch("app.tasks.csv_tasks.export_csv_task.apply_async") as apply_async:
+        response = await client.get(
+            "/api/v1/csv/export",
+            params={
+                "async": "true",
+                "columns": "amount,type",
+                "date_format": "%d.%m.%Y",
+            },
+        )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+    assert job["download_url"].endswith(f"/csv/export/{job['task_id']}/download")
+    params, compression = apply_async.call_args.kwargs["args"]
+    assert params["columns"] == ["amount", "type"]
+    assert params["date_format"] == "%d.%m.%Y"
+    assert compression == "gzip"
+
+    status = await client.get(f"/api/v1/tasks/{job['task_id']}/status")
+    assert status.json()["task_type"] == "csv_export"
+    assert status.json()["status"] == "pending"
+
+    download = await client.get(job["download_url"])
+    assert download.status_code == 409
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_export_writes_gzip_and_reports_result(
+    client: AsyncClient, test_db: AsyncSession
+):
+    """Задача пишет gzip-файл со всеми строками; итог виден в статусе задачи."""
+    await _import_rows(client, 5)
+    task_id = await _run_enqueued_export(client, test_db)
+
+    status = (await client.get(f"/api/v1/tasks/{task_id}/status")).json()
+    assert status["status"] == "completed"
+    assert status["result"]["total_rows"] == 5
+    assert status["result"]["progress"] == 100.0
+    assert status["result"]["compression"] == "gzip"
+
+    response = await client.get(f"/api/v1/csv/export/{task_id}/download")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert int(response.headers["content-length"]) == status["result"]["size_bytes"]
+    rows = list(csv.DictReader(StringIO(gzip.decompress(response.content).decode())))
+    assert len(rows) == 5
+    assert {r["category_name"] for r in rows} == {"Кафе"}
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_download_supports_range_resume(
+    client: AsyncClient, test_db: AsyncSession
+):
+    """Докачка по Range: части складываются в исходный файл; вне файла — 416."""
+    await _import_rows(client, 20)
+    task_id = await _run_enqueued_export(client, test_db)
+    url = f"/api/v1/csv/export/{task_id}/download"
+    full = (await client.get(url)).content
+    size = len(full)
+
+    head = await client.get(url, headers={"Range": "bytes=0-9"})
+    assert head.status_code == 206
+    assert head.headers["content-range"] == f"bytes 0-9/{size}"
+    tail = await client.get(
+        url, headers={"Range": "bytes=10-", "If-Range": head.headers["etag"]}
+    )
+    assert tail.status_code == 206
+    assert head.content + tail.content == full
+
+    suffix = await client.get(url, headers={"Range": "bytes=-5"})
+    assert suffix.content == full[-5:]
+
+    stale = await client.get(url, headers={"Range": "bytes=10-", "If-Range": '"x"'})
+    assert stale.status_code == 200
+    assert stale.content == full
+
+    outside = await client.get(url, headers={"Range": f"bytes={size}-"})
+    assert outside.status_code == 416
+    assert outside.headers["content-range"] == f"bytes */{size}"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_download_after_cleanup_is_not_found(
+    client: AsyncClient, test_db: AsyncSession, artifact_dir
+):
+    """После удаления файла по сроку хранения скачивание возвращает 404."""
+    task_id = await _run_enqueued_export(client, test_db)
+    for path in artifact_dir.iterdir():
+        path.unlink()
+    response = await client.get(f"/api/v1/csv/export/{task_id}/download")
+    assert response.status_code == 404
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_zstd_without_package_is_rejected(client: AsyncClient):
+    """zstd — опциональная зависимость: без пакета zstandard запрос отклоняется."""
+    with patch.dict("sys.modules", {"zstandard": None}):
+        response = await client.get(
+            "/api/v1/csv/export", params={"async": "true", "compression": "zstd"}
+        )
+    assert response.status_code == 422
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_async_export_in_parquet_format(
+    client: AsyncClient, test_db: AsyncSession
+):
+    """Фоновый экспорт поддерживает колоночные форматы: файл .parquet.gz."""
+    pq = pytest.importorskip("pyarrow.parquet")
+    await _import_rows(client, 3)
+    task_id = await _run_enqueued_export(client, test_db, {"format": "parquet"})
+
+    status = (await client.get(f"/api/v1/tasks/{task_id}/status")).json()
+    assert status["result"]["format"] == "parquet"
+    response = await client.get(f"/api/v1/csv/export/{task_id}/download")
+    assert (
+        f"transactions_{task_id}.parquet.gz" in response.headers["content-disposition"]
+    )
+    table = pq.read_table(BytesIO(gzip.decompress(response.content)))
+    assert table.num_rows == 3
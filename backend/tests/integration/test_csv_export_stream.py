@@ -0,0 +1,120 @@
+"""
+Интеграционные тесты потокового экспорта CSV (серверный курсор пачками).
+"""
+
+import base64
+import csv
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+
+
+async def _import_rows(client: AsyncClient, count: int) -> None:
+    csv_content = "amount,date,type,category\n" + "".join(
+        f"{i + 1}.00,2024-05-{i % 28 + 1:02d},expense,Кафе\n" for i in range(count)
+    )
+    response = await client.post(
+        "/api/v1/csv/import",
+        json={
+            "file_content": base64.b64encode(csv_content.encode()).decode("ascii"),
+            "mapping": {
+                "amount": "amount",
+                "transaction_date": "date",
+                "type": "type",
+                "category_name": "category",
+            },
+            "date_format": "%Y-%m-%d",
+        },
+    )
+    assert response.json()["created_count"] == count
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "url",
+    ["/api/v1/csv/export", "/api/v1/transactions/export"],
+)
+async def test_export_streams_all_rows_across_batches(client: AsyncClient, url: str):
+    """Выгрузка больше одной пачки курсора содержит все строки в порядке убывания даты."""
+    await _import_rows(client, 7)
+    with patch("app.services.csv_export.EXPORT_BATCH_SIZE", 3):
+        response = await client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+
+    rows = list(csv.DictReader(StringIO(response.text)))
+    assert len(rows) == 7
+    assert {r["category_name"] for r in rows} == {"Кафе"}
+    dates = [r["transaction_date"] for r in rows]
+    assert dates == sorted(dates, reverse=True)
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_export_columns_and_date_format(client: AsyncClient):
+    """Выбор колонок и формата даты сохраняется в потоковом экспорте."""
+    await _import_rows(client, 1)
+    response = await client.get(
+        "/api/v1/csv/export",
+        params={"columns": "transaction_date,amount", "date_format": "%d.%m.%Y"},
+    )
+    assert response.text.splitlines() == ["transaction_date,amount", "01.05.2024,1.00"]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "date_format",
+    ["%Y-%m-%d", "%d.%m.%Y", "%b %d, %Y", "%A %j", "100%% %y/%m", "%U-%Y"],
+)
+async def test_copy_export_matches_python_formatter(
+    client: AsyncClient, date_format: str
+):
+    """COPY TO STDOUT и форматирование в Python дают одинаковый CSV."""
+    await _import_rows(client, 3)
+    quoted = (
+        'amount,date,type,category,description\n5,2024-06-02,income,"A, ""B""",Да\n'
+    )
+    await client.post(
+        "/api/v1/csv/import",
+        json={
+            "file_content": base64.b64encode(quoted.encode()).decode("ascii"),
+            "mapping": {
+                "amount": "amount",
+                "transaction_date": "date",
+                "type": "type",
+                "category_name": "category",
+                "description": "description",
+            },
+            "date_format": "%Y-%m-%d",
+        },
+    )
+    params = {
+        "columns": "amount,currency,category_name,description,transaction_date,type,x",
+        "date_format": date_format,
+    }
+
+    copy_response = await client.get("/api/v1/csv/export", params=params)
+    with patch("app.api.routes.csv_routes.settings.CSV_EXPORT_USE_COPY", False):
+        python_response = await client.get("/api/v1/csv/export", params=params)
+
+    assert copy_response.status_code == python_response.status_code == 200
+    assert copy_response.text.splitlines() == python_response.text.splitlines()
+    assert len(copy_response.text.splitlines()) == 5
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_export_response_is_compressed(client: AsyncClient):
+    """Потоковый экспорт сжимается по Accept-Encoding и прозрачно распаковывается."""
+    await _import_rows(client, 100)
+    response = await client.get(
+        "/api/v1/csv/export", headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert len(response.text.splitlines()) == 101
@@ -0,0 +1,102 @@
+"""
+Интеграционные тесты идемпотентного импорта CSV:
+отпечатки строк (ON CONFLICT DO NOTHING) и отпечаток файла (прежний TaskResult).
+"""
+
+import base64
+import pytest
+from httpx import AsyncClient
+
+
+MAPPING = {
+    "amount": "amount",
+    "category_name": "category",
+    "transaction_date": "date",
+    "type": "type",
+    "description": "description",
+}
+
+
+def _payload(csv_content: str, import_source: str = "csv") -> dict:
+    return {
+        "file_content": base64.b64encode(csv_content.encode("utf-8")).decode("ascii"),
+        "mapping": MAPPING,
+        "date_format": "%Y-%m-%d",
+        "import_source": import_source,
+    }
+
+
+async def _count_transactions(client: AsyncClient) -> int:
+    response = await client.get("/api/v1/transactions/")
+    assert response.status_code == 200
+    return response.json()["total"]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_identical_reupload_returns_previous_task_result(client: AsyncClient):
+    """Повторная загрузка того же файла не создаёт транзакций и возвращает прежний task_id."""
+    csv_content = (
+        "amount,date,type,category,description\n"
+        "10.00,2024-03-01,expense,Кафе,Кофе\n"
+        "2500,2024-03-02,income,Зарплата,Аванс\n"
+    )
+    first = await client.post("/api/v1/csv/import", json=_payload(csv_content))
+    assert first.status_code == 200
+    first_data = first.json()
+    assert first_data["status"] == "completed"
+    assert first_data["created_count"] == 2
+    assert first_data["duplicate_file"] is False
+
+    second = await client.post("/api/v1/csv/import", json=_payload(csv_content))
+    assert second.status_code == 200
+    second_data = second.json()
+    assert second_data["duplicate_file"] is True
+    assert second_data["task_id"] == first_data["task_id"]
+    assert second_data["created_count"] == 2
+
+    status = await client.get(f"/api/v1/tasks/{first_data['task_id']}/status")
+    assert status.status_code == 200
+    assert status.json()["status"] == "completed"
+    assert await _count_transactions(client) == 2
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_overlapping_export_skips_already_imported_rows(client: AsyncClient):
+    """Пересекающаяся выписка вставляет только новые строки; одинаковые строки в файле не схлопываются."""
+    first_file = (
+        "amount,date,type,category,description\n"
+        "10.00,2024-03-01,expense,Кафе,Кофе\n"
+        "10.00,2024-03-01,expense,Кафе,Кофе\n"
+        "45.50,2024-03-02,expense,Продукты,\n"
+    )
+    response = await client.post("/api/v1/csv/import", json=_payload(first_file))
+    assert response.json()["created_count"] == 3
+
+    overlapping = first_file + "99.90,2024-03-03,expense,Продукты,Рынок\n"
+    response = await client.post("/api/v1/csv/import", json=_payload(overlapping))
+    data = response.json()
+    assert data["duplicate_file"] is False
+    assert data["created_count"] == 1
+    assert data["skipped_count"] == 3
+    assert await _count_transactions(client) == 4
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_fingerprints_are_scoped_to_import_source(client: AsyncClient):
+    """Одинаковые строки из разных источников импорта не считаются дубликатами."""
+    csv_content = (
+        "amount,date,type,category,description\n10.00,2024-03-01,expense,Кафе,\n"
+    )
+    first = await client.post(
+        "/api/v1/csv/import", json=_payload(csv_content, "bank-a")
+    )
+    second = await client.post(
+        "/api/v1/csv/import", json=_payload(csv_content, "bank-b")
+    )
+    assert first.json()["created_count"] == 1
+    assert second.json()["created_count"] == 1
+    assert second.json()["duplicate_file"] is False
+    assert await _count_transactions(client) == 2
@@ -0,0 +1,197 @@
+"""
+Интеграционные тесты пакетной конвертации /currencies/convert.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from httpx import AsyncClient
+
+from app.models.currency import Currency
+from app.models.exchange_rate import ExchangeRate
+
+CONVERT_URL = "/api/v1/currencies/convert"
+
+
+@pytest.fixture
+async def rates(test_db):
+    """Валюты и курсы USD->EUR на две даты"""
+    test_db.add_all(
+        [
+            Currency(code="USD", name="Доллар США", symbol="$"),
+            Currency(code="EUR", name="Евро", symbol="€"),
+            Currency(code="RUB", name="Рубль", symbol="₽"),
+        ]
+    )
+    await test_db.flush()
+    test_db.add_all(
+        [
+            ExchangeRate(
+                from_currency="USD",
+                to_currency="EUR",
+                rate=Decimal("0.9"),
+                date=date(2024, 1, 1),
+            ),
+            ExchangeRate(
+                from_currency="USD",
+                to_currency="EUR",
+                rate=Decimal("0.95"),
+                date=date(2024, 2, 1),
+            ),
+        ]
+    )
+    await test_db.commit()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_convert_batch_in_order_with_per_item_errors(client: AsyncClient, rates):
+    """Результаты в порядке запроса, курс — на дату, без курса — ошибка позиции."""
+    items = [
+        {"amount": "10", "from_currency": "USD", "to_currency": "EUR", "date": d}
+        for d in ("2024-01-15", "2024-02-01", "2024-03-01")
+    ]
+    items.insert(1, {**items[0], "from_currency": "RUB"})
+    items.append({**items[0], "to_currency": "usd"})
+
+    response = await client.post(CONVERT_URL, json={"items": items})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["error_count"] == 1
+
+    results = data["results"]
+    assert [r["date"] for r in results] == [i["date"] for i in items]
+    assert [
+        (Decimal(r["converted"]), r["rate_date"]) for r in results if not r["error"]
+    ] == [
+        (Decimal("9.0"), "2024-01-01"),
+        (Decimal("9.5"), "2024-02-01"),
+        (Decimal("9.5"), "2024-02-01"),
+        (Decimal("10"), "2024-01-15"),
+    ]
+    assert results[1]["converted"] is None
+    assert "RUB -> EUR" in results[1]["error"]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_convert_batch_validates_request(client: AsyncClient):
+    response = await client.post(CONVERT_URL, json={"items": []})
+    assert response.status_code == 422
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_cross_rate_through_base_currency(client: AsyncClient, test_db, rates):
+    """Курс EUR->RUB выводится из хранимых USD->EUR и USD->RUB."""
+    test_db.add(
+        ExchangeRate(
+            from_currency="USD",
+            to_currency="RUB",
+            rate=Decimal("90"),
+            date=date(2024, 2, 1),
+        )
+    )
+    await test_db.commit()
+
+    response = await client.get(
+        "/api/v1/currencies/exchange-rate",
+        params={
+            "from_currency": "EUR",
+            "to_currency": "RUB",
+            "rate_date": "2024-02-10",
+        },
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert Decimal(data["rate"]) == Decimal("94.7368421053")
+    assert (data["date"], data["id"]) == ("2024-02-01", None)
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_rates_as_of_for_many_keys(client: AsyncClient, test_db, rates):
+    """Курсы на даты для набора пар: as-of, fallback, обратный и кросс-курс."""
+    test_db.add(
+        ExchangeRate(
+            from_currency="USD",
+            to_currency="RUB",
+            rate=Decimal("90"),
+            date=date(2024, 1, 15),
+        )
+    )
+    await test_db.commit()
+
+    keys = [
+        ("USD", "EUR", "2024-01-31"),
+        ("usd", "eur", "2024-02-01"),
+        ("USD", "EUR", "2023-06-01"),
+        ("EUR", "USD", "2024-01-20"),
+        ("EUR", "RUB", "2024-01-20"),
+        ("RUB", "RUB", "2024-01-20"),
+        ("GBP", "EUR", "2024-01-20"),
+    ]
+    response = await client.post(
+        "/api/v1/currencies/rates/as-of",
+        json={
+            "keys": [
+                {"from_currency": f, "to_currency": t, "date": d} for f, t, d in keys
+            ]
+        },
+    )
+    assert response.status_code == 200, response.text
+    results = [
+        (Decimal(r["rate"]) if r["rate"] else None, r["rate_date"])
+        for r in response.json()
+    ]
+    assert results == [
+        (Decimal("0.9"), "2024-01-01"),
+        (Decimal("0.95"), "2024-02-01"),
+        # Раньше всех курсов — последний известный
+        (Decimal("0.95"), "2024-02-01"),
+        (Decimal("1.1111111111"), "2024-01-01"),
+        (Decimal("100"), "2024-01-01"),
+        (Decimal("1"), "2024-01-20"),
+        (None, None),
+    ]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_convert_and_rates_as_of_pick_same_pivot(
+    client: AsyncClient, test_db, rates
+):
+    """Кросс-курс через базу вне EXCHANGE_RATE_BASE_CURRENCIES — одинаково в обоих путях."""
+    test_db.add(Currency(code="GBP", name="Фунт стерлингов", symbol="£"))
+    await test_db.flush()
+    test_db.add_all(
+        ExchangeRate(from_currency=f, to_currency=t, rate=Decimal(r), date=d)
+        for f, t, r, d in (
+            ("USD", "RUB", "90", date(2024, 1, 15)),
+            ("EUR", "GBP", "0.85", date(2024, 1, 10)),
+            ("EUR", "RUB", "100", date(2024, 1, 5)),
+        )
+    )
+    await test_db.commit()
+
+    keys = [
+        {"from_currency": f, "to_currency": t, "date": "2024-01-20"}
+        for f, t in (("GBP", "RUB"), ("RUB", "GBP"), ("EUR", "RUB"), ("GBP", "USD"))
+    ]
+    as_of = await client.post("/api/v1/currencies/rates/as-of", json={"keys": keys})
+    assert as_of.status_code == 200, as_of.text
+    converted = await client.post(
+        CONVERT_URL, json={"items": [{**key, "amount": "1"} for key in keys]}
+    )
+    assert converted.status_code == 200, converted.text
+
+    def rates_of(results):
+        return [
+            (Decimal(r["rate"]) if r["rate"] else None, r["rate_date"]) for r in results
+        ]
+
+    assert rates_of(as_of.json()) == rates_of(converted.json()["results"])
+    # GBP→RUB только через EUR: 100 / 0.85, дата — ранняя из ног
+    assert rates_of(as_of.json())[0] == (Decimal("117.6470588235"), "2024-01-05")
+    assert rates_of(as_of.json())[-1] == (None, None)
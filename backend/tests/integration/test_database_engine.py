@@ -0,0 +1,93 @@
+"""
+Интеграционные тесты настройки engine из Settings.
+"""
+
+import asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import build_engine, pool_status
+from app.models.transaction import Transaction
+from app.repositories.transaction import TransactionRepository
+
+
+def _url(test_db: AsyncSession) -> str:
+    return test_db.bind.url.render_as_string(hide_password=False)
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_engine_applies_pool_and_server_timeouts(
+    test_db: AsyncSession, monkeypatch
+):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 2)
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 1500)
+    monkeypatch.setattr(settings, "DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", 0)
+    engine = build_engine(_url(test_db))
+    try:
+        assert engine.echo is False
+        async with engine.connect() as connection:
+            timeout = await connection.scalar(text("SHOW statement_timeout"))
+            idle = await connection.scalar(
+                text("SHOW idle_in_transaction_session_timeout")
+            )
+            assert (timeout, idle) == ("1500ms", "0")
+            status = pool_status(engine)
+            assert (status["size"], status["checked_out"]) == (2, 1)
+        assert pool_status(engine)["checked_in"] == 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_engine_without_statement_cache_for_pgbouncer(
+    test_db: AsyncSession, monkeypatch
+):
+    """С DB_STATEMENT_CACHE_SIZE=0 запросы идут с уникальными именами выражений."""
+    monkeypatch.setattr(settings, "DB_STATEMENT_CACHE_SIZE", 0)
+    engine = build_engine(_url(test_db))
+    try:
+        async with engine.connect() as connection:
+            for value in range(3):
+                query = text("SELECT CAST(:value AS int)")
+                assert await connection.scalar(query, {"value": value}) == value
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_slow_export_outlives_idle_in_transaction_timeout(
+    test_db: AsyncSession, sample_category, monkeypatch
+):
+    """Медленный потребитель выгрузки не обрывается по idle-in-transaction."""
+    test_db.add_all(
+        Transaction(
+            amount=Decimal("10.00"),
+            currency="USD",
+            category_id=sample_category.id,
+            transaction_date=date(2024, 1, 1) + timedelta(days=day),
+            type="expense",
+        )
+        for day in range(3)
+    )
+    await test_db.commit()
+
+    monkeypatch.setattr(settings, "DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", 100)
+    engine = build_engine(_url(test_db))
+    try:
+        async with AsyncSession(engine) as session:
+            repo = TransactionRepository(session)
+            dates = []
+            async for partition in repo.stream_export_rows(batch_size=1):
+                await asyncio.sleep(0.3)
+                dates.extend(row.transaction_date for row in partition)
+        assert dates == [date(2024, 1, 3), date(2024, 1, 2), date(2024, 1, 1)]
+    finally:
+        await engine.dispose()
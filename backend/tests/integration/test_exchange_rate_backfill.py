@@ -0,0 +1,180 @@
+"""
+Интеграционные тесты upsert курсов и загрузки исторических курсов.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.currency import Currency
+from app.models.exchange_rate import ExchangeRate
+from app.repositories.currency import CurrencyRepository
+from app.repositories.exchange_rate import ExchangeRateRepository
+from app.services.exchange_rate import ExchangeRateService
+from app.services.exchange_rate_backfill import iter_api_rates
+from app.services.exchange_rate_cache import ExchangeRateCache
+from app.tasks.currency_tasks import _run_backfill
+
+BACKFILL_URL = "/api/v1/admin/tasks/backfill-rates"
+
+
+class _FakeAPIClient:
+    def __init__(self, rates: dict[str, float] | None = None):
+        self.rates = rates or {}
+        self.windows: list[tuple[date, date]] = []
+
+    async def get_latest_rates_many(self, base_currencies):
+        return {base: self.rates for base in base_currencies}, {}
+
+    async def get_historical_rates(self, base_currency: str, start: date, end: date):
+        self.windows.append((start, end))
+        return {
+            start + timedelta(days=offset): self.rates
+            for offset in range((end - start).days + 1)
+        }
+
+
+@pytest.fixture
+async def currencies(test_db: AsyncSession):
+    test_db.add_all(
+        [
+            Currency(code="USD", name="Доллар США", symbol="$"),
+            Currency(code="EUR", name="Евро", symbol="€"),
+            Currency(code="RUB", name="Рубль", symbol="₽"),
+        ]
+    )
+    await test_db.commit()
+
+
+def _service(session: AsyncSession, api_client=None) -> ExchangeRateService:
+    return ExchangeRateService(
+        ExchangeRateRepository(session),
+        CurrencyRepository(session),
+        api_client=api_client,
+        rate_cache=ExchangeRateCache(),
+    )
+
+
+async def _stored_rates(session: AsyncSession) -> list[tuple]:
+    result = await session.execute(
+        select(
+            ExchangeRate.from_currency,
+            ExchangeRate.to_currency,
+            ExchangeRate.date,
+            ExchangeRate.rate,
+        ).order_by(ExchangeRate.date, ExchangeRate.to_currency)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_update_rates_twice_a_day_updates_rates(
+    test_db: AsyncSession, currencies
+):
+    """Повторное обновление за день перезаписывает курс, а не падает."""
+    client = _FakeAPIClient({"EUR": 0.9, "RUB": 90.0})
+    assert (await _service(test_db, client).update_rates())["updated_count"] == 2
+
+    client.rates = {"EUR": 0.95, "RUB": 91.5}
+    assert (await _service(test_db, client).update_rates())["updated_count"] == 2
+    today = date.today()
+    assert await _stored_rates(test_db) == [
+        ("USD", "EUR", today, Decimal("0.95")),
+        ("USD", "RUB", today, Decimal("91.5")),
+    ]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_backfill_from_file_in_batches(
+    client: AsyncClient, test_db: AsyncSession, currencies, tmp_path, monkeypatch
+):
+    """Файл загружается пачками; мусорные строки и дубли не ломают загрузку."""
+    monkeypatch.setattr(settings, "EXCHANGE_RATE_BACKFILL_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "EXCHANGE_RATE_BACKFILL_BATCH_SIZE", 2)
+    (tmp_path / "rates.csv").write_text(
+        "date,from_currency,to_currency,rate\n"
+        "2024-01-01,USD,EUR,0.90\n"
+        "2024-01-01,,RUB,89\n"
+        "2024-01-02,usd,eur,0.91\n"
+        "2024-01-02,USD,EUR,0.92\n"
+        "2024-01-02,USD,GBP,0.8\n"
+        "2024-01-03,USD,EUR,oops\n"
+        "2024-01-03,USD,EUR,-1\n"
+        "2024-02-01,USD,EUR,0.99\n",
+        encoding="utf-8",
+    )
+    body = {
+        "start_date": "2024-01-01",
+        "end_date": "2024-01-31",
+        "source": "file",
+        "file_path": "rates.csv",
+    }
+    with patch(
+        "app.tasks.currency_tasks.backfill_exchange_rates_task.apply_async"
+    ) as apply_async:
+        response = await client.post(BACKFILL_URL, json=body)
+    assert response.status_code == 202, response.text
+    job = response.json()
+    assert apply_async.call_args.kwargs["task_id"] == job["task_id"]
+
+    factory = async_sessionmaker(test_db.bind, expire_on_commit=False)
+    with patch("app.tasks.currency_tasks.get_session_factory", return_value=factory):
+        await _run_backfill(job["task_id"], *apply_async.call_args.kwargs["args"])
+        # Повторный запуск идемпотентен
+        await _run_backfill(job["task_id"], *apply_async.call_args.kwargs["args"])
+
+    status = (await client.get(job["status_url"])).json()
+    assert status["task_type"] == "exchange_rate_backfill"
+    assert status["status"] == "completed"
+    assert status["result"]["upserted_count"] == 3
+    assert status["result"]["skipped_count"] == 4
+    assert status["result"]["batches"] == 2
+    assert await _stored_rates(test_db) == [
+        ("USD", "EUR", date(2024, 1, 1), Decimal("0.9")),
+        ("USD", "RUB", date(2024, 1, 1), Decimal("89")),
+        ("USD", "EUR", date(2024, 1, 2), Decimal("0.92")),
+    ]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_backfill_rejects_bad_requests(
+    client: AsyncClient, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(settings, "EXCHANGE_RATE_BACKFILL_DIR", str(tmp_path))
+    base = {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+    for body in (
+        {**base, "end_date": "2023-12-31"},
+        {**base, "source": "file"},
+        {**base, "source": "file", "file_path": "../secrets.csv"},
+        {**base, "source": "file", "file_path": "missing.csv"},
+    ):
+        response = await client.post(BACKFILL_URL, json=body)
+        assert response.status_code == 422, body
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_backfill_from_api_by_windows(test_db: AsyncSession, currencies):
+    """API опрашивается окнами по диапазону дат, а не запросом на каждый день."""
+    client = _FakeAPIClient({"EUR": 0.9, "RUB": 90.0, "XXX": 1.0})
+    start, end = date(2023, 1, 1), date(2024, 12, 31)
+    result = await _service(test_db, client).backfill(
+        iter_api_rates(client, "USD", start, end), start, end, batch_size=500
+    )
+    assert client.windows == [
+        (date(2023, 1, 1), date(2024, 1, 1)),
+        (date(2024, 1, 2), date(2024, 12, 31)),
+    ]
+    days = (end - start).days + 1
+    assert result["upserted_count"] == 2 * days
+    assert result["skipped_count"] == days
+    assert len(await _stored_rates(test_db)) == 2 * days
@@ -0,0 +1,117 @@
+"""
+Интеграционные тесты типизированных форматов экспорта: NDJSON, Parquet, Arrow IPC.
+"""
+
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+
+COLUMNS = (
+    "id,amount,currency,category_id,category_name,description,transaction_date,type"
+)
+
+
+async def _import_rows(client: AsyncClient) -> None:
+    csv_content = (
+        "amount,date,type,category,currency,description\n"
+        "12.50,2024-05-01,expense,Кафе,EUR,Обед\n"
+        "1000,2024-05-02,income,Зарплата,USD,\n"
+        "3.05,2024-05-03,expense,Кафе,EUR,Кофе\n"
+    )
+    response = await client.post(
+        "/api/v1/csv/import",
+        json={
+            "file_content": base64.b64encode(csv_content.encode()).decode("ascii"),
+            "mapping": {
+                "amount": "amount",
+                "transaction_date": "date",
+                "type": "type",
+                "category_name": "category",
+                "currency": "currency",
+                "description": "description",
+            },
+            "date_format": "%Y-%m-%d",
+        },
+    )
+    assert response.json()["created_count"] == 3
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_ndjson_export_keeps_exact_values(client: AsyncClient):
+    """NDJSON: одна строка на транзакцию, сумма строкой без потери точности, даты ISO."""
+    await _import_rows(client)
+    response = await client.get(
+        "/api/v1/csv/export", params={"format": "ndjson", "columns": COLUMNS}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert ".ndjson" in response.headers["content-disposition"]
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["amount"] for r in records] == ["3.05", "1000.00", "12.50"]
+    assert records[0]["transaction_date"] == "2024-05-03"
+    assert records[1]["description"] is None
+    assert len(records[0]["id"]) == 36
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_parquet_export_is_typed_and_dictionary_encoded(client: AsyncClient):
+    """Parquet: Decimal(12,2), date32, словарные category_name/currency; пачки — row groups."""
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    await _import_rows(client)
+    with patch("app.services.csv_export.COLUMNAR_BATCH_SIZE", 2):
+        response = await client.get(
+            "/api/v1/csv/export", params={"format": "parquet", "columns": COLUMNS}
+        )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+
+    parquet_file = pq.ParquetFile(BytesIO(response.content))
+    assert parquet_file.metadata.num_row_groups == 2
+    table = parquet_file.read()
+    assert table.schema.field("amount").type == pa.decimal128(12, 2)
+    assert table.schema.field("transaction_date").type == pa.date32()
+    assert pa.types.is_dictionary(table.schema.field("category_name").type)
+    assert pa.types.is_dictionary(table.schema.field("currency").type)
+    assert table.column("amount").to_pylist() == [
+        Decimal("3.05"),
+        Decimal("1000.00"),
+        Decimal("12.50"),
+    ]
+    assert table.column("transaction_date").to_pylist()[0] == date(2024, 5, 3)
+    assert table.column("category_name").to_pylist() == ["Кафе", "Зарплата", "Кафе"]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_arrow_stream_export_across_batches(client: AsyncClient):
+    """Arrow IPC stream читается целиком, словари разных пачек не конфликтуют."""
+    pa = pytest.importorskip("pyarrow")
+    await _import_rows(client)
+    with patch("app.services.csv_export.COLUMNAR_BATCH_SIZE", 1):
+        response = await client.get(
+            "/api/v1/csv/export",
+            params={"format": "arrow", "columns": "amount,currency,category_name"},
+        )
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(BytesIO(response.content)).read_all()
+    assert table.num_rows == 3
+    assert table.column("currency").to_pylist() == ["EUR", "USD", "EUR"]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_columnar_export_without_pyarrow_is_rejected(client: AsyncClient):
+    """Без pyarrow в окружении Parquet/Arrow отклоняются с 422, а не 500."""
+    with patch.dict("sys.modules", {"pyarrow": None}):
+        response = await client.get("/api/v1/csv/export", params={"format": "parquet"})
+    assert response.status_code == 422
@@ -0,0 +1,326 @@
+"""
+Интеграционные тесты пакетной обработки шаблонов повторяющихся транзакций.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.recurrence import compile_rule
+from app.models.recurring_transaction import RecurringTransaction
+from app.repositories.category import CategoryRepository
+from app.repositories.recurring_transaction import RecurringTransactionRepository
+from app.repositories.transaction import TransactionRepository
+from app.services.recurring_transaction import RecurringTransactionService
+from app.services.transaction import TransactionService
+
+RUN_URL = "/api/v1/admin/tasks/run-recurring"
+
+
+async def _create_template(client: AsyncClient, category_id: str, **fields) -> str:
+    payload = {
+        "name": "Шаблон",
+        "amount": 10,
+        "currency": "RUB",
+        "category_id": category_id,
+        "type": "expense",
+        "frequency": "monthly",
+        "interval": 1,
+        "start_date": "2024-01-31",
+        **fields,
+    }
+    response = await client.post("/api/v1/recurring-transactions/", json=payload)
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+async def _next_occurrence(client: AsyncClient, template_id: str) -> str:
+    response = await client.get(f"/api/v1/recurring-transactions/{template_id}")
+    return response.json()["nextOccurrence"]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_batch_creates_transactions_and_advances_schedule(
+    client: AsyncClient, sample_category
+):
+    """Все пропущенные даты всех шаблонов создаются пакетом за один запуск."""
+    category_id = str(sample_category.id)
+    response = await client.post(
+        "/api/v1/budgets/",
+        json={
+            "category_id": category_id,
+            "amount": 1000,
+            "period": "monthly",
+            "start_date": "2024-01-01",
+            "end_date": "2024-01-31",
+        },
+    )
+    budget_id = response.json()["id"]
+    monthly = await _create_template(client, category_id, name="Подписка")
+    weekly = await _create_template(
+        client, category_id, frequency="weekly", interval=2, start_date="2024-01-20"
+    )
+    yearly = await _create_template(
+        client,
+        category_id,
+        type="income",
+        frequency="yearly",
+        start_date="2024-02-29",
+    )
+    future = await _create_template(client, category_id, start_date="2024-03-01")
+
+    response = await client.post(RUN_URL, params={"target_date": "2024-02-29"})
+    assert response.status_code == 200
+    assert response.json()["created_count"] == 6
+    assert response.json()["error_count"] == 0
+
+    assert await _next_occurrence(client, monthly) == "2024-03-29"
+    assert await _next_occurrence(client, weekly) == "2024-03-02"
+    assert await _next_occurrence(client, yearly) == "2025-02-28"
+    assert await _next_occurrence(client, future) == "2024-03-01"
+
+    transactions = (await client.get("/api/v1/transactions/")).json()["items"]
+    dates = sorted((t["transactionDate"], t["type"]) for t in transactions)
+    assert dates == [
+        ("2024-01-20", "expense"),
+        ("2024-01-31", "expense"),
+        ("2024-02-03", "expense"),
+        ("2024-02-17", "expense"),
+        ("2024-02-29", "expense"),
+        ("2024-02-29", "income"),
+    ]
+    by_date = {t["transactionDate"]: t for t in transactions}
+    assert by_date["2024-01-31"]["description"] == "Подписка (автоматически создано)"
+    assert by_date["2024-01-31"]["recurringTemplateId"] == monthly
+
+    # Расходы января попали в счётчик бюджета
+    progress = await client.get(f"/api/v1/budgets/{budget_id}/progress")
+    assert Decimal(progress.json()["spent"]) == Decimal("20")
+
+    # Повторный запуск на ту же дату ничего не дублирует
+    response = await client.post(RUN_URL, params={"target_date": "2024-02-29"})
+    assert response.json()["created_count"] == 0
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_catch_up_stops_at_end_date(client: AsyncClient, sample_category):
+    """Пропуск после end_date догоняется только до end_date."""
+    template_id = await _create_template(
+        client,
+        str(sample_category.id),
+        frequency="daily",
+        interval=3,
+        start_date="2024-01-01",
+        end_date="2024-01-10",
+    )
+
+    response = await client.post(RUN_URL, params={"target_date": "2024-02-01"})
+    assert response.json()["created_count"] == 4
+    assert await _next_occurrence(client, template_id) == "2024-01-13"
+
+    response = await client.post(RUN_URL, params={"target_date": "2024-03-01"})
+    assert response.json()["created_count"] == 0
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_failing_template_is_reported_and_others_are_created(
+    client: AsyncClient, sample_category
+):
+    """Ошибка одного шаблона не откатывает остальные и попадает в отчёт."""
+    category_id = str(sample_category.id)
+    ok = await _create_template(client, category_id)
+    # Сумма помещается в шаблон (Numeric(15, 2)), но не в транзакцию
+    broken = await _create_template(client, category_id, amount=10**9)
+
+    response = await client.post(RUN_URL, params={"target_date": "2024-02-01"})
+    data = response.json()
+    assert data["created_count"] == 1
+    assert data["error_count"] == 1
+    assert data["errors"][0]["recurring_id"] == broken
+
+    assert await _next_occurrence(client, ok) == "2024-02-29"
+    assert await _next_occurrence(client, broken) == "2024-01-31"
+    assert (await client.get("/api/v1/transactions/")).json()["total"] == 1
+
+
+def _service(session: AsyncSession) -> RecurringTransactionService:
+    category_repo = CategoryRepository(session)
+    return RecurringTransactionService(
+        RecurringTransactionRepository(session),
+        TransactionService(TransactionRepository(session), category_repo),
+        category_repo,
+    )
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_small_batches_and_rerun_are_idempotent(
+    client: AsyncClient, test_db: AsyncSession, sample_category
+):
+    """Пачки по одному шаблону покрывают все; повтор дат не дублирует транзакции."""
+    category_id = str(sample_category.id)
+    first = await _create_template(client, category_id, start_date="2024-01-01")
+    await _create_template(client, category_id, start_date="2024-01-15")
+    await _create_template(client, category_id, start_date="2024-02-10")
+
+    result = await _service(test_db).process_due(date(2024, 2, 20), batch_size=1)
+    assert result["created_count"] == 5
+
+    # Откат расписания (как при повторном запуске после сбоя до commit
+    # соседней пачки): уже созданные даты пропускаются, расписание сдвигается
+    await test_db.execute(
+        update(RecurringTransaction)
+        .where(RecurringTransaction.id == uuid.UUID(first))
+        .values(next_occurrence=date(2024, 1, 1))
+    )
+    await test_db.commit()
+    result = await _service(test_db).process_due(date(2024, 3, 5), batch_size=1)
+    assert result["created_count"] == 1
+    assert await _next_occurrence(client, first) == "2024-04-01"
+    assert (await client.get("/api/v1/transactions/")).json()["total"] == 6
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_templates_claimed_by_another_worker_are_skipped(
+    client: AsyncClient, test_db: AsyncSession, sample_category
+):
+    """Шаблоны, захваченные другим воркером, пропускаются без ожидания."""
+    category_id = str(sample_category.id)
+    locked = await _create_template(client, category_id)
+    free = await _create_template(client, category_id)
+
+    async with AsyncSession(test_db.bind) as other:
+        await other.execute(
+            select(RecurringTransaction)
+            .where(RecurringTransaction.id == uuid.UUID(locked))
+            .with_for_update()
+        )
+        result = await _service(test_db).process_due(date(2024, 1, 31))
+        assert result["created_count"] == 1
+        await other.rollback()
+
+    assert await _next_occurrence(client, free) == "2024-02-29"
+    assert await _next_occurrence(client, locked) == "2024-01-31"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_cash_flow_forecast(client: AsyncClient, sample_category):
+    """Прогноз суммирует будущие даты шаблонов по дням и месяцам."""
+    category_id = str(sample_category.id)
+    await _create_template(
+        client,
+        category_id,
+        type="income",
+        amount=1000,
+        start_date="2024-01-31",
+    )
+    await _create_template(
+        client,
+        category_id,
+        amount=100,
+        frequency="weekly",
+        start_date="2024-01-05",
+        end_date="2024-02-10",
+    )
+    await _create_template(client, category_id, amount=1, currency="USD")
+    response = await client.put(
+        f"/api/v1/recurring-transactions/"
+        f"{await _create_template(client, category_id, amount=5)}",
+        json={"isActive": False},
+    )
+    assert response.status_code == 200
+
+    response = await client.get(
+        "/api/v1/recurring-transactions/forecast",
+        params={"start": "2024-01-10", "until": "2024-03-31"},
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["occurrences"] == 11
+    assert Decimal(data["totalIncome"]) == Decimal("3000")
+    # 5 недель по 100 и три месяца по 1 USD (91 RUB)
+    assert Decimal(data["totalExpense"]) == Decimal("773")
+    assert [m["period"] for m in data["months"]] == ["2024-01", "2024-02", "2024-03"]
+    assert [Decimal(m["net"]) for m in data["months"]] == [
+        Decimal("609"),
+        Decimal("709"),
+        Decimal("909"),
+    ]
+    assert Decimal(data["months"][-1]["balance"]) == Decimal("2227")
+    assert data["days"][0] == {
+        "period": "2024-01-12",
+        "income": "0.00",
+        "expense": "100.00",
+        "net": "-100.00",
+        "balance": "-100.00",
+    }
+    assert Decimal(data["days"][-1]["balance"]) == Decimal("2227")
+
+    response = await client.get(
+        "/api/v1/recurring-transactions/forecast",
+        params={"start": "2024-03-01", "until": "2024-01-01"},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_moving_generated_transaction_onto_taken_date_conflicts(
+    client: AsyncClient, sample_category
+):
+    """Перенос созданной транзакции на занятую дату шаблона — 409, а не 500."""
+    template_id = await _create_template(client, str(sample_category.id))
+    response = await client.post(RUN_URL, params={"target_date": "2024-02-29"})
+    assert response.json()["created_count"] == 2
+
+    transactions = (await client.get("/api/v1/transactions/")).json()["items"]
+    by_date = {t["transactionDate"]: t["id"] for t in transactions}
+    url = f"/api/v1/transactions/{by_date['2024-02-29']}"
+
+    response = await client.put(url, json={"transactionDate": "2024-01-31"})
+    assert response.status_code == 409, response.text
+
+    # Свободная дата по-прежнему допустима, транзакции не изменились
+    response = await client.put(url, json={"transactionDate": "2024-02-28"})
+    assert response.status_code == 200, response.text
+    dates = sorted(
+        t["transactionDate"]
+        for t in (await client.get("/api/v1/transactions/")).json()["items"]
+        if t["recurringTemplateId"] == template_id
+    )
+    assert dates == ["2024-01-31", "2024-02-28"]
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_schedule_update_keeps_month_end_anchor(
+    client: AsyncClient, sample_category
+):
+    """Смена расписания считает даты от start_date, а не шагом от любой даты."""
+    category_id = str(sample_category.id)
+    future = await _create_template(client, category_id, start_date="2030-01-31")
+    url = f"/api/v1/recurring-transactions/{future}"
+    response = await client.put(url, json={"interval": 2})
+    assert response.status_code == 200, response.text
+    # Шаблон ещё не начался — первое выполнение в сам start_date
+    assert await _next_occurrence(client, future) == "2030-01-31"
+
+    past = await _create_template(client, category_id)
+    url = f"/api/v1/recurring-transactions/{past}"
+    assert (await client.put(url, json={"frequency": "monthly"})).status_code == 200
+    next_occurrence = date.fromisoformat(await _next_occurrence(client, past))
+    # Ближайшая с сегодня дата расписания 31.01.2024 -> 29.02 -> ... -> 28-е
+    assert next_occurrence >= date.today()
+    assert next_occurrence == compile_rule("monthly", 1, date(2024, 1, 31)).next_after(
+        date.today() - timedelta(days=1)
+    )
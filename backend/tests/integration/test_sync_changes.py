@@ -0,0 +1,204 @@
+"""
+Интеграционные тесты ленты изменений /sync/changes (delta sync с надгробиями).
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+SYNC_URL = "/api/v1/sync/changes"
+
+
+async def _create_category(client: AsyncClient, name: str = "Продукты") -> str:
+    response = await client.post(
+        "/api/v1/categories/",
+        json={"name": name, "icon": "🛒", "type": "expense", "color": "#FF5733"},
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def _create_transaction(client: AsyncClient, category_id: str, amount=10) -> str:
+    response = await client.post(
+        "/api/v1/transactions/",
+        json={
+            "amount": amount,
+            "type": "expense",
+            "category_id": category_id,
+            "transaction_date": "2024-02-15",
+        },
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def _sync(client: AsyncClient, since: str | None = None, **params) -> dict:
+    if since is not None:
+        params["since"] = since
+    response = await client.get(SYNC_URL, params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_full_sync_then_only_new_changes(client: AsyncClient):
+    """Без токена — все сущности; с токеном — только изменённые после него."""
+    category_id = await _create_category(client)
+    transaction_id = await _create_transaction(client, category_id)
+    today = date.today()
+    response = await client.post(
+        "/api/v1/budgets/",
+        json={
+            "category_id": category_id,
+            "amount": 500,
+            "period": "monthly",
+            "start_date": today.isoformat(),
+            "end_date": (today + timedelta(days=30)).isoformat(),
+        },
+    )
+    assert response.status_code == 201
+
+    first = await _sync(client)
+    assert [c["id"] for c in first["categories"]] == [category_id]
+    assert [t["id"] for t in first["transactions"]] == [transaction_id]
+    assert first["transactions"][0]["category"]["name"] == "Продукты"
+    assert len(first["budgets"]) == 1
+    assert first["deleted"] == [] and first["has_more"] is False
+
+    # Без изменений лента пуста, токен пригоден для повторного запроса
+    idle = await _sync(client, first["next_token"])
+    assert not (idle["categories"] or idle["transactions"] or idle["budgets"])
+
+    response = await client.put(
+        f"/api/v1/transactions/{transaction_id}", json={"description": "Обновлено"}
+    )
+    assert response.status_code == 200
+    delta = await _sync(client, idle["next_token"])
+    assert [t["description"] for t in delta["transactions"]] == ["Обновлено"]
+    assert delta["categories"] == [] and delta["budgets"] == []
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_deletes_are_reported_as_tombstones(client: AsyncClient):
+    """Удаление транзакции и каскадное удаление бюджета категории дают надгробия."""
+    category_id = await _create_category(client)
+    transaction_id = await _create_transaction(client, category_id)
+    other_category_id = await _create_category(client, "Кино")
+    today = date.today()
+    response = await client.post(
+        "/api/v1/budgets/",
+        json={
+            "category_id": other_category_id,
+            "amount": 100,
+            "period": "monthly",
+            "start_date": today.isoformat(),
+            "end_date": (today + timedelta(days=30)).isoformat(),
+        },
+    )
+    budget_id = response.json()["id"]
+    token = (await _sync(client))["next_token"]
+
+    assert (
+        await client.delete(f"/api/v1/transactions/{transaction_id}")
+    ).status_code == 204
+    assert (
+        await client.delete(f"/api/v1/categories/{other_category_id}")
+    ).status_code == 204
+
+    delta = await _sync(client, token)
+    deleted = {(d["entity_type"], d["id"]) for d in delta["deleted"]}
+    assert deleted == {
+        ("transaction", transaction_id),
+        ("budget", budget_id),
+        ("category", other_category_id),
+    }
+    assert delta["transactions"] == [] and delta["categories"] == []
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_deleting_template_resyncs_generated_transactions(client: AsyncClient):
+    """Удаление шаблона снимает связь у транзакций, и они попадают в ленту."""
+    category_id = await _create_category(client)
+    response = await client.post(
+        "/api/v1/transactions/",
+        json={
+            "amount": 10.99,
+            "type": "expense",
+            "category_id": category_id,
+            "transaction_date": date.today().isoformat(),
+            "is_recurring": True,
+            "recurring_pattern": {"frequency": "monthly", "interval": 1},
+        },
+    )
+    assert response.status_code == 201
+    transaction_id = response.json()["id"]
+    template_id = response.json()["recurringTemplateId"]
+    assert template_id is not None
+    token = (await _sync(client))["next_token"]
+
+    response = await client.delete(f"/api/v1/recurring-transactions/{template_id}")
+    assert response.status_code == 204
+
+    delta = await _sync(client, token)
+    assert [d["id"] for d in delta["deleted"]] == [template_id]
+    assert [t["id"] for t in delta["transactions"]] == [transaction_id]
+    assert delta["transactions"][0]["recurringTemplateId"] is None
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_paging_returns_every_change_exactly_once(client: AsyncClient):
+    """Страницы по limit покрывают все изменения без пропусков и повторов."""
+    category_id = await _create_category(client)
+    created = {await _create_transaction(client, category_id, i + 1) for i in range(6)}
+
+    seen, token, pages = [], None, 0
+    while True:
+        page = await _sync(client, token, limit=2)
+        pages += 1
+        seen += [t["id"] for t in page["transactions"]]
+        seen += [c["id"] for c in page["categories"]]
+        token = page["next_token"]
+        if not page["has_more"]:
+            break
+    assert pages == 4
+    assert sorted(seen) == sorted(created | {category_id})
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+@pytest.mark.parametrize("token", ["garbage!", "MjAyNHwxfA"])
+async def test_invalid_token_is_rejected(client: AsyncClient, token: str):
+    response = await client.get(SYNC_URL, params={"since": token})
+    assert response.status_code == 422
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_only_writing_transactions_hold_horizon(client: AsyncClient, test_db):
+    """Открытая читающая транзакция не задерживает ленту, пишущая — задерживает."""
+    token = (await _sync(client))["next_token"]
+    engine = create_async_engine(test_db.bind.url)
+    try:
+        async with engine.connect() as other:
+            await other.execute(text("SELECT 1"))
+            category_id = await _create_category(client)
+            delta = await _sync(client, token)
+            assert [c["id"] for c in delta["categories"]] == [category_id]
+
+            # Транзакция с xid могла записать строку с меткой раньше токена
+            await other.execute(text("SELECT txid_current()"))
+            await _create_category(client, "Кино")
+            held = await _sync(client, delta["next_token"])
+            assert held["categories"] == []
+            await other.commit()
+        released = await _sync(client, delta["next_token"])
+        assert [c["name"] for c in released["categories"]] == ["Кино"]
+    finally:
+        await engine.dispose()
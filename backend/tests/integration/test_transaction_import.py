@@ -0,0 +1,94 @@
+"""
+Интеграционные тесты POST /api/v1/transactions/import:
+эндпоинт использует общий движок импорта (как /csv/import).
+"""
+
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+
+
+HEADER = "amount,currency,category_name,description,transaction_date,type\n"
+
+
+def _files(csv_content: str) -> dict:
+    return {"file": ("transactions.csv", csv_content.encode("utf-8"), "text/csv")}
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_import_file_creates_transactions_and_categories(client: AsyncClient):
+    """Файл в формате /transactions/export импортируется, недостающие категории создаются."""
+    csv_content = (
+        HEADER
+        + "12.50,EUR,Кафе,Обед,2024-05-01,expense\n"
+        + "1000,USD,Зарплата,,2024-05-02,income\n"
+        + "oops,USD,Кафе,,2024-05-03,expense\n"
+    )
+    response = await client.post(
+        "/api/v1/transactions/import", files=_files(csv_content)
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "completed"
+    assert data["created_count"] == 2
+    assert data["error_count"] == 1
+    assert data["errors"][0]["row"] == 4
+
+    categories = (await client.get("/api/v1/categories/")).json()
+    assert {(c["name"], c["type"]) for c in categories} >= {
+        ("Кафе", "expense"),
+        ("Зарплата", "income"),
+    }
+
+    status = await client.get(f"/api/v1/tasks/{data['task_id']}/status")
+    assert status.json()["status"] == "completed"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_import_file_reupload_is_idempotent(client: AsyncClient):
+    """Повторная загрузка того же файла возвращает прежний результат без новых строк."""
+    csv_content = HEADER + "12.50,EUR,Кафе,Обед,2024-05-01,expense\n"
+    first = await client.post("/api/v1/transactions/import", files=_files(csv_content))
+    second = await client.post("/api/v1/transactions/import", files=_files(csv_content))
+    assert second.json()["duplicate_file"] is True
+    assert second.json()["task_id"] == first.json()["task_id"]
+
+    listing = await client.get("/api/v1/transactions/")
+    assert listing.json()["total"] == 1
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_import_large_file_goes_to_background(client: AsyncClient):
+    """Файл больше порога ставится в очередь; TaskResult создаётся в статусе pending."""
+    csv_content = HEADER + "".join(
+        f"{i + 1}.00,USD,Кафе,,2024-05-01,expense\n" for i in range(1001)
+    )
+    with patch("app.tasks.csv_tasks.import_csv_task.apply_async") as apply_async:
+        response = await client.post(
+            "/api/v1/transactions/import", files=_files(csv_content)
+        )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "pending"
+    apply_async.assert_called_once()
+    assert apply_async.call_args.kwargs["task_id"] == data["task_id"]
+
+    status = await client.get(f"/api/v1/tasks/{data['task_id']}/status")
+    assert status.json()["task_type"] == "csv_import"
+    assert status.json()["status"] == "pending"
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_import_file_invalid_encoding(client: AsyncClient):
+    """Файл не в UTF-8 возвращает failed с понятной ошибкой."""
+    response = await client.post(
+        "/api/v1/transactions/import",
+        files={"file": ("t.csv", HEADER.encode() + b"\xff\xfe,,\n", "text/csv")},
+    )
+    assert response.status_code == 200
+    assert response.json()["status"] == "failed"
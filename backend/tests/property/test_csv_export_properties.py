@@ -10,7 +10,7 @@ from hypothesis import given, strategies as st
 from unittest.mock import AsyncMock, MagicMock
 from datetime import date
 
-from app.services.csv_export import CSVExportService
+from app.services.csv_export import CSVExportService, strftime_to_char
 
 
 def _make_transaction(
@@ -24,8 +24,7 @@ def _make_transaction(
     t = MagicMock()
     t.amount = amount
     t.currency = currency
-    t.category = MagicMock()
-    t.category.name = category_name
+    t.category_name = category_name
     t.description = description
     t.transaction_date = transaction_date or date(2024, 1, 15)
     t.type = type
@@ -33,8 +32,12 @@ def _make_transaction(
 
 
 def _make_export_service(transactions):
+    async def stream_export_rows(*args, **kwargs):
+        yield transactions
+
     repo = MagicMock()
-    repo.get_filtered = AsyncMock(return_value=(transactions, len(transactions)))
+    repo.stream_export_rows = stream_export_rows
+    repo.session.close = AsyncMock()
     return CSVExportService(repo)
 
 
@@ -94,3 +97,54 @@ async def test_property_export_special_chars_quoted():
     assert "comma" in out
     lines = out.strip().split("\n")
     assert len(lines) >= 2
+
+
+@pytest.mark.asyncio
+@given(batches=st.lists(st.integers(min_value=0, max_value=5), max_size=5))
+async def test_property_stream_csv_chunks_match_batches(batches):
+    """
+    Свойство 11: Потоковый экспорт отдаёт заголовок отдельным блоком и по блоку
+    на каждую пачку курсора; склеенный результат содержит все строки.
+    """
+
+    async def stream_export_rows(*args, **kwargs):
+        for size in batches:
+            yield [_make_transaction() for _ in range(size)]
+
+    repo = MagicMock()
+    repo.stream_export_rows = stream_export_rows
+    repo.session.close = AsyncMock()
+    svc = CSVExportService(repo)
+
+    chunks = [
+        c
+        async for c in svc.stream_csv(None, None, None, ["amount", "type"], "%Y-%m-%d")
+    ]
+    assert len(chunks) == 1 + len(batches)
+    assert chunks[0] == b"amount,type\r\n"
+    assert b"".join(chunks).count(b"\n") == 1 + sum(batches)
+    repo.session.close.assert_awaited_once()
+
+
+@given(
+    tokens=st.lists(
+        st.sampled_from(["%Y", "%m", "%d", "%b", "%%", "-", ".", " ", "/", "г."]),
+        min_size=1,
+        max_size=8,
+    ),
+    unsupported=st.sampled_from(["%U", "%W", "%c", "%x", "%f", "%"]),
+)
+def test_property_strftime_to_char_supported_or_fallback(tokens, unsupported):
+    """
+    Свойство 12: формат из поддерживаемых директив и литералов переводится в
+    to_char (литералы в кавычках), неподдерживаемая директива даёт fallback (None).
+    """
+    date_format = "".join(tokens)
+    result = strftime_to_char(date_format)
+    assert result is not None
+    assert result.count('"') % 2 == 0
+    for literal in ("-", ".", "/", "г."):
+        if literal in tokens:
+            assert literal in result
+
+    assert strftime_to_char(date_format + unsupported) is None
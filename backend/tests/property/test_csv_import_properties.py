@@ -5,13 +5,14 @@ Property-based тесты для CSVImportService.
 Валидирует: требования 1.4, 1.5, 1.7, 1.8, 1.9, 1.10, 7.5, 7.6, 7.9
 """
 
+import base64
 import pytest
 from hypothesis import given, strategies as st
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock, MagicMock, patch
 import uuid
 
 from app.schemas.csv_import import CSVColumnMapping
-from app.services.csv_import import CSVImportService
+from app.services.csv_import import CSVImportService, iter_base64_lines
 
 
 # Стратегии
@@ -36,13 +37,11 @@ def build_csv_rows(amounts, dates, types, categories):
 def _make_csv_service():
     """CSVImportService с замоканными зависимостями (без фикстуры для Hypothesis)."""
     transaction_service = MagicMock()
-    transaction_service.create_transaction = AsyncMock()
+    transaction_service.bulk_import = AsyncMock(side_effect=lambda rows: len(rows))
     category_repo = MagicMock()
-    category_repo.get_by_name_and_type = AsyncMock(return_value=None)
-    category_repo.create = AsyncMock()
-    created_cat = MagicMock()
-    created_cat.id = uuid.uuid4()
-    category_repo.create.return_value = created_cat
+    category_repo.get_or_create_many = AsyncMock(
+        side_effect=lambda keys: {key: uuid.uuid4() for key in keys}
+    )
     return CSVImportService(transaction_service, category_repo)
 
 
@@ -145,7 +144,7 @@ async def test_property_csv_validation_invalid_date_in_errors():
 
 @pytest.mark.asyncio
 async def test_property_csv_auto_create_category():
-    """Свойство 5: При отсутствии категории вызывается category_repo.create."""
+    """Свойство 5: Категории строк разрешаются/создаются одним вызовом get_or_create_many."""
     svc = _make_csv_service()
     csv_content = "amount,date,type,category\n100,2024-01-01,income,NewCategory"
     mapping = CSVColumnMapping(
@@ -156,4 +155,53 @@ async def test_property_csv_auto_create_category():
     )
     result = await svc._process_csv(csv_content, mapping, "%Y-%m-%d")
     assert result.created_count == 1
-    svc.category_repo.create.assert_called_once()
+    svc.category_repo.get_or_create_many.assert_awaited_once_with(
+        {("NewCategory", "income")}
+    )
+
+
+@pytest.mark.asyncio
+@given(
+    amounts=st.lists(amount_str, min_size=1, max_size=10),
+    source=st.sampled_from(["csv", "bank-a", "bank-b"]),
+)
+async def test_property_csv_row_fingerprints_stable_and_unique(amounts, source):
+    """
+    Свойство 6: Отпечатки строк детерминированы для одного файла и источника,
+    уникальны внутри файла (одинаковые строки различаются порядковым номером).
+    """
+    csv_content = build_csv_rows(
+        amounts,
+        ["2024-01-15"] * len(amounts),
+        ["expense"] * len(amounts),
+        ["Food"] * len(amounts),
+    )
+    mapping = CSVColumnMapping(
+        amount="amount",
+        category_name="category",
+        transaction_date="date",
+        type="type",
+    )
+
+    async def fingerprints():
+        svc = _make_csv_service()
+        await svc._process_csv(csv_content, mapping, "%Y-%m-%d", source)
+        rows = svc.transaction_service.bulk_import.await_args.args[0]
+        return [r["import_fingerprint"] for r in rows]
+
+    first = await fingerprints()
+    assert first == await fingerprints()
+    assert len(set(first)) == len(amounts)
+
+
+@given(text=st.text(), chunk_size=st.sampled_from([4, 8, 64]))
+def test_property_iter_base64_lines_roundtrip(text, chunk_size):
+    """
+    Свойство 7: Потоковое декодирование Base64 по блокам даёт тот же текст,
+    что и декодирование целиком, при любом разбиении на блоки.
+    """
+    encoded = base64.b64encode(text.encode("utf-8")).decode("ascii")
+    with patch("app.services.csv_import.BASE64_CHUNK_SIZE", chunk_size):
+        lines = list(iter_base64_lines(encoded))
+    assert "".join(lines) == text
+    assert all(line.endswith("\n") for line in lines[:-1])
@@ -11,22 +11,24 @@ from unittest.mock import AsyncMock, MagicMock
 from datetime import date
 from decimal import Decimal
 
+from app.schemas.currency import ConversionItem
 from app.services.currency import CurrencyService
+from app.services.exchange_rate_cache import ExchangeRateCache
 
 
 def _make_currency_service(rate_value=None):
-    """rate_value: если задан, get_rate и get_latest_rate возвращают курс с этим значением."""
+    """rate_value: если задан, в таблице курсов есть курс USD->EUR с этим значением."""
     currency_repo = MagicMock()
     exchange_repo = MagicMock()
+    rows = []
     if rate_value is not None:
         rate = MagicMock()
+        rate.from_currency, rate.to_currency = "USD", "EUR"
+        rate.date = date(2023, 6, 1)
         rate.rate = Decimal(str(rate_value))
-        exchange_repo.get_rate = AsyncMock(return_value=rate)
-        exchange_repo.get_latest_rate = AsyncMock(return_value=rate)
-    else:
-        exchange_repo.get_rate = AsyncMock(return_value=None)
-        exchange_repo.get_latest_rate = AsyncMock(return_value=None)
-    return CurrencyService(currency_repo, exchange_repo)
+        rows.append(rate)
+    exchange_repo.get_all_rates = AsyncMock(return_value=rows)
+    return CurrencyService(currency_repo, exchange_repo, ExchangeRateCache())
 
 
 amount_strategy = st.decimals(
@@ -56,3 +58,31 @@ async def test_property_convert_amount_times_rate(amount, rate_val):
     result = await svc.convert_amount(amount, "USD", "EUR", date(2024, 1, 1))
     expected = amount * Decimal(str(rate_val))
     assert abs(result - expected) < Decimal("0.0001")
+
+
+@pytest.mark.asyncio
+@given(
+    amount=amount_strategy,
+    rate_val=st.floats(min_value=0.0001, max_value=10000, allow_nan=False),
+    to_code=st.sampled_from(["EUR", "USD"]),
+)
+async def test_property_batch_conversion_matches_single(amount, rate_val, to_code):
+    """Свойство 21: пакетная конвертация даёт ту же сумму, что и одиночная."""
+    svc = _make_currency_service(rate_value=rate_val)
+    single = await svc.convert_amount(amount, "USD", to_code, date(2024, 1, 1))
+    batch = await svc.convert_batch(
+        [
+            ConversionItem(
+                amount=amount,
+                from_currency="USD",
+                to_currency=to_code,
+                date=date(2024, 1, 1),
+            )
+        ]
+    )
+    converted = batch.results[0].converted
+    assert converted == single
+    assert str(converted) == str(single)
+    if to_code != "USD":
+        # Фиксированная точность — 10 знаков, как у курсов
+        assert converted.as_tuple().exponent == -10
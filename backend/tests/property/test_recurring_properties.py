@@ -10,9 +10,25 @@ from hypothesis import given, strategies as st
 from unittest.mock import MagicMock
 from datetime import date, timedelta
 
+from app.core.recurrence import compile_rule, expand_schedules
 from app.services.recurring_transaction import RecurringTransactionService
 
 
+def _relativedelta_step(current: date, freq: str, interval: int) -> date:
+    """Эталонный шаг расписания"""
+    from dateutil.relativedelta import relativedelta
+
+    return (
+        current
+        + {
+            "daily": relativedelta(days=interval),
+            "weekly": relativedelta(weeks=interval),
+            "monthly": relativedelta(months=interval),
+            "yearly": relativedelta(years=interval),
+        }[freq]
+    )
+
+
 def _make_recurring_service():
     return RecurringTransactionService(
         recurring_repo=MagicMock(),
@@ -75,3 +91,68 @@ async def test_property_next_occurrence_always_after_start(start, interval):
     for freq in ("daily", "weekly", "monthly", "yearly"):
         next_d = svc._next_occurrence(start, freq, interval, ref)
         assert next_d > start or next_d >= start
+
+
+@given(
+    schedules=st.lists(
+        st.tuples(
+            st.sampled_from(["daily", "weekly", "monthly", "yearly"]),
+            st.integers(min_value=1, max_value=4),
+            st.dates(min_value=date(2020, 1, 1), max_value=date(2026, 12, 31)),
+            st.integers(min_value=-30, max_value=800),
+        ),
+        max_size=8,
+    ),
+    lower=st.dates(min_value=date(2020, 1, 1), max_value=date(2028, 12, 31)),
+)
+def test_property_expand_schedules_matches_step_by_step(schedules, lower):
+    """Свойство 18: Пакетная развёртка и ScheduleRule совпадают с пошаговым relativedelta."""
+    schedules = [
+        (freq, interval, start, start + timedelta(days=span))
+        for freq, interval, start, span in schedules
+    ]
+    expected = []
+    for index, (freq, interval, current, last) in enumerate(schedules):
+        dates = []
+        while current <= last:
+            if current >= lower:
+                dates.append(current)
+            current = _relativedelta_step(current, freq, interval)
+        expected += [(index, d) for d in dates]
+        rule = compile_rule(freq, interval, schedules[index][2])
+        assert rule.between(lower, last) == dates
+
+    rows, dates = expand_schedules(schedules, lower)
+    assert sorted(zip(rows.tolist(), dates.tolist())) == sorted(expected)
+
+
+@given(
+    freq=st.sampled_from(["daily", "weekly", "monthly", "yearly"]),
+    interval=st.integers(min_value=1, max_value=5),
+    anchor=st.dates(min_value=date(2000, 1, 1), max_value=date(2030, 12, 31)),
+    current=st.dates(min_value=date(1999, 1, 1), max_value=date(2040, 12, 31)),
+)
+def test_property_next_after_is_first_later_occurrence(freq, interval, anchor, current):
+    """Свойство 19: next_after — первая дата расписания строго после current."""
+    rule = compile_rule(freq, interval, anchor)
+    index = rule.index_after(current)
+    assert rule.occurrence(index) == rule.next_after(current) > current
+    assert index == 0 or rule.occurrence(index - 1) <= current
+
+
+@pytest.mark.asyncio
+@given(
+    anchor_day=st.integers(min_value=28, max_value=31),
+    months=st.integers(min_value=0, max_value=60),
+    offset=st.integers(min_value=0, max_value=30),
+)
+async def test_property_next_occurrence_follows_anchor(anchor_day, months, offset):
+    """Свойство 12: следующая дата — дата расписания якоря, с какой бы даты ни считать."""
+    anchor = date(2024, 1, anchor_day)
+    rule = compile_rule("monthly", 1, anchor)
+    current = rule.occurrence(months) + timedelta(days=offset)
+    svc = _make_recurring_service()
+    next_d = svc._next_occurrence(current, "monthly", 1, anchor)
+    assert next_d > current
+    assert next_d in rule.between(anchor, next_d)
+    assert rule.between(current + timedelta(days=1), next_d) == [next_d]
@@ -0,0 +1,100 @@
+"""Unit-тесты векторизованного прогноза расходов бюджетов."""
+
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.services.budget_forecast import forecast_budgets, prior_period_start
+
+
+def _budget(amount="300.00", period="monthly", start=date(2024, 3, 1), end=None):
+    now = datetime(2024, 1, 1)
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        category_id=uuid.uuid4(),
+        amount=Decimal(amount),
+        currency="USD",
+        period=period,
+        start_date=start,
+        end_date=end or date(2024, 3, 31),
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _days(budget, first: date, last: date, amount: str):
+    day = first
+    while day <= last:
+        yield (budget.id, day, Decimal(amount))
+        day += timedelta(days=1)
+
+
+def test_prior_period_start():
+    assert prior_period_start(_budget()) == date(2024, 2, 1)
+    yearly = _budget(period="yearly", start=date(2024, 1, 1), end=date(2024, 12, 31))
+    assert prior_period_start(yearly) == date(2023, 1, 1)
+
+
+def test_constant_daily_spend_is_projected_to_period_end():
+    budget = _budget()
+    daily = list(_days(budget, date(2024, 3, 1), date(2024, 3, 10), "10.00"))
+    [forecast] = forecast_budgets([budget], daily, date(2024, 3, 10), window=7)
+    assert forecast.days_elapsed == 10
+    assert forecast.days_remaining == 21
+    assert forecast.spent == Decimal("100.00")
+    assert forecast.daily_rate == Decimal("10.00")
+    assert forecast.projected_spend == Decimal("310.00")
+    assert forecast.projected_remaining == Decimal("-10.00")
+    assert forecast.will_exceed is True
+
+
+def test_window_uses_prior_period_at_period_start():
+    """В начале периода окно захватывает конец предыдущего периода."""
+    budget = _budget()
+    daily = list(_days(budget, date(2024, 2, 1), date(2024, 2, 29), "7.00"))
+    daily.append((budget.id, date(2024, 3, 1), Decimal("14.00")))
+    [forecast] = forecast_budgets([budget], daily, date(2024, 3, 1), window=7)
+    assert forecast.spent == Decimal("14.00")
+    assert forecast.prior_period_spent == Decimal("203.00")
+    assert forecast.daily_rate == Decimal("8.00")
+    assert forecast.projected_spend == Decimal("254.00")
+
+
+def test_many_budgets_future_and_finished_periods():
+    """Бюджеты разной длины и положения относительно as_of считаются вместе."""
+    current = _budget()
+    future = _budget(start=date(2024, 4, 1), end=date(2024, 4, 30))
+    finished = _budget(start=date(2024, 1, 1), end=date(2024, 1, 31))
+    yearly = _budget(
+        amount="1000.00",
+        period="yearly",
+        start=date(2024, 1, 1),
+        end=date(2024, 12, 31),
+    )
+    daily = (
+        list(_days(current, date(2024, 3, 1), date(2024, 3, 15), "1.00"))
+        + list(_days(future, date(2024, 3, 1), date(2024, 3, 31), "2.00"))
+        + [(finished.id, date(2024, 1, 20), Decimal("55.55"))]
+        + list(_days(yearly, date(2023, 12, 25), date(2024, 3, 15), "0.50"))
+    )
+    by_id = {
+        f.budget.id: f
+        for f in forecast_budgets(
+            [current, future, finished, yearly], daily, date(2024, 3, 15)
+        )
+    }
+
+    assert by_id[current.id].projected_spend == Decimal("31.00")
+    assert by_id[future.id].days_elapsed == 0
+    assert by_id[future.id].spent == 0
+    assert by_id[future.id].projected_spend == Decimal("60.00")
+    assert by_id[finished.id].days_remaining == 0
+    assert by_id[finished.id].projected_spend == Decimal("55.55")
+    assert by_id[yearly.id].spent == Decimal("37.50")
+    assert by_id[yearly.id].prior_period_spent == Decimal("3.50")
+    assert by_id[yearly.id].projected_spend == Decimal("183.00")
+
+
+def test_no_budgets():
+    assert forecast_budgets([], [], date(2024, 3, 1)) == []
@@ -0,0 +1,141 @@
+"""Unit-тесты middleware сжатия ответов (согласование, порог, поблочное сжатие)."""
+
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from starlette.responses import Response, StreamingResponse
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+
+
+async def _call(app, accept_encoding: str = "gzip", **middleware_kwargs) -> list:
+    """Вызвать app через middleware и вернуть отправленные ASGI-сообщения."""
+    messages = []
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            # Клиент не отключается: ждём, пока ответ не будет отправлен
+            await asyncio.Event().wait()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await CompressionMiddleware(app, **middleware_kwargs)(scope, receive, send)
+    return messages
+
+
+def _headers(messages) -> dict:
+    return {k.decode(): v.decode() for k, v in messages[0]["headers"]}
+
+
+def _body(messages) -> bytes:
+    return b"".join(m.get("body", b"") for m in messages[1:])
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("gzip", "gzip"),
+        ("gzip;q=0.5, br", "br"),
+        ("br;q=0, gzip", "gzip"),
+        ("*", "zstd"),
+        ("identity", None),
+        ("", None),
+        ("gzip, br, zstd", "zstd"),
+    ],
+)
+def test_negotiate_encoding(accept, expected):
+    assert negotiate_encoding(accept, ["zstd", "br", "gzip"]) == expected
+
+
+@pytest.mark.asyncio
+async def test_small_response_is_not_compressed():
+    app = Response(b"x" * 100, media_type="application/json")
+    messages = await _call(app, minimum_size=1024)
+    assert "content-encoding" not in _headers(messages)
+    assert _body(messages) == b"x" * 100
+
+
+@pytest.mark.asyncio
+async def test_large_response_is_gzipped_with_length_and_vary():
+    payload = b'{"category": "Groceries"}' * 200
+    app = Response(payload, media_type="application/json", headers={"ETag": '"v1"'})
+    messages = await _call(app, minimum_size=1024)
+    headers = _headers(messages)
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == 'W/"v1"'
+    body = _body(messages)
+    assert int(headers["content-length"]) == len(body) < len(payload)
+    assert gzip.decompress(body) == payload
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_is_compressed_chunk_by_chunk():
+    chunks = [b"amount,type\n", b"10.00,expense\n" * 100, b"20.00,income\n" * 100]
+
+    async def generate():
+        for chunk in chunks:
+            yield chunk
+
+    messages = await _call(StreamingResponse(generate(), media_type="text/csv"))
+    headers = _headers(messages)
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+
+    # Каждый блок сброшен клиенту и распаковывается сразу, до конца потока
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    bodies = [m["body"] for m in messages[1:]]
+    assert len(bodies) == len(chunks) + 1
+    for chunk, body in zip(chunks, bodies):
+        assert decompressor.decompress(body) == chunk
+    assert messages[-1]["more_body"] is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "response",
+    [
+        Response(b"x" * 4096, media_type="application/gzip"),
+        Response(b"x" * 4096, headers={"Content-Encoding": "br"}),
+        Response(
+            b"x" * 4096, status_code=206, headers={"Content-Range": "bytes 0-4095/9000"}
+        ),
+        Response(b"x" * 4096, headers={"Cache-Control": "no-transform"}),
+    ],
+)
+async def test_already_encoded_and_partial_responses_are_skipped(response):
+    messages = await _call(response, minimum_size=10)
+    assert _headers(messages).get("content-encoding") in (None, "br")
+    assert _body(messages) == b"x" * 4096
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+async def test_optional_encodings(encoding, module):
+    lib = pytest.importorskip(module)
+    payload = b"description,category\n" * 500
+    messages = await _call(
+        Response(payload, media_type="text/csv"),
+        accept_encoding=encoding,
+        encodings=["zstd", "br", "gzip"],
+    )
+    assert _headers(messages)["content-encoding"] == encoding
+    body = _body(messages)
+    if encoding == "br":
+        assert lib.decompress(body) == payload
+    else:
+        assert lib.ZstdDecompressor().decompressobj().decompress(body) == payload
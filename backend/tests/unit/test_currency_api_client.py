@@ -0,0 +1,105 @@
+"""
+Unit-тесты HTTP-клиента API курсов валют (заглушка API — httpx.MockTransport).
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.currency_api_client import CurrencyAPIClient
+from app.core.exceptions import CurrencyAPIError
+
+
+def _client(handler, **kwargs) -> tuple[CurrencyAPIClient, list[float]]:
+    delays: list[float] = []
+
+    async def sleep(delay: float) -> None:
+        delays.append(delay)
+
+    client = CurrencyAPIClient(
+        base_url="http://rates.test/latest",
+        api_key="",
+        max_retries=3,
+        backoff=0.5,
+        transport=httpx.MockTransport(handler),
+        sleep=sleep,
+        **kwargs,
+    )
+    return client, delays
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_retries_transient_errors_with_jittered_backoff():
+    attempts = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request.url.path)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        if len(attempts) == 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"rates": {"EUR": 0.9, "BAD": "x"}})
+
+    client, delays = _client(handler)
+    assert await client.get_latest_rates("USD") == {"EUR": 0.9}
+    assert attempts == ["/latest/USD"] * 3
+    assert len(delays) == 2
+    assert 0 <= delays[0] <= 0.5 and 0 <= delays[1] <= 1.0
+
+    # Пул соединений один на клиент, а не новый на каждый запрос
+    pool = client._client()
+    await client.get_latest_rates("USD")
+    assert client._client() is pool
+    await client.aclose()
+    assert pool.is_closed
+
+    metrics = client.metrics.snapshot()
+    assert (metrics["requests"], metrics["failures"], metrics["retries"]) == (2, 0, 2)
+    assert metrics["latency_max"] >= metrics["latency_avg"] > 0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_exhausted_retries_and_client_errors_raise():
+    calls = {"n": 0}
+
+    def unavailable(request: httpx.Request) -> httpx.Response:
+        calls["n"] += 1
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client, delays = _client(unavailable)
+    with pytest.raises(CurrencyAPIError, match="после 4 попыток"):
+        await client.get_latest_rates("USD")
+    assert calls["n"] == 4 and len(delays) == 3
+
+    # 4xx (кроме 429) и некорректный ответ не повторяются
+    for response in (httpx.Response(404), httpx.Response(200, content=b"<html>")):
+        client, delays = _client(lambda request, r=response: r)
+        with pytest.raises(CurrencyAPIError):
+            await client.get_latest_rates("USD")
+        assert delays == []
+        assert client.metrics.snapshot()["failures"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_many_bases_fetched_concurrently_with_per_base_errors():
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        base = request.url.path.rsplit("/", 1)[-1]
+        if base == "GBP":
+            return httpx.Response(400)
+        return httpx.Response(200, json={"rates": {"RUB": 90.0}})
+
+    client, _ = _client(handler)
+    rates, errors = await client.get_latest_rates_many(["USD", "EUR", "GBP", "USD"])
+    assert rates == {"USD": {"RUB": 90.0}, "EUR": {"RUB": 90.0}}
+    assert list(errors) == ["GBP"]
+    assert in_flight["max"] == 3
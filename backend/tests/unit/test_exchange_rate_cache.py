@@ -0,0 +1,198 @@
+"""
+Unit-тесты процессного кэша курсов валют.
+"""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.exchange_rate_cache import (
+    RELOAD_RETRY_SECONDS,
+    VERSION_CHECK_SECONDS,
+    ExchangeRateCache,
+)
+
+
+def _rate(from_currency: str, to_currency: str, day: date, rate: str):
+    return SimpleNamespace(
+        from_currency=from_currency,
+        to_currency=to_currency,
+        date=day,
+        rate=Decimal(rate),
+    )
+
+
+def _repo(*rows):
+    repo = MagicMock()
+    repo.rows = list(rows)
+
+    async def get_all_rates(after=None):
+        return sorted(
+            (r for r in repo.rows if after is None or r.date > after),
+            key=lambda r: (r.from_currency, r.to_currency, r.date),
+        )
+
+    repo.get_all_rates = AsyncMock(side_effect=get_all_rates)
+    return repo
+
+
+class _Version:
+    """Версия курсов, общая для нескольких кэшей (как ключ в Redis)"""
+
+    def __init__(self):
+        self.value = 0
+        self.down = False
+
+    async def get(self) -> int:
+        if self.down:
+            raise ConnectionError("redis down")
+        return self.value
+
+    async def bump(self) -> None:
+        self.value += 1
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_as_of_lookup_uses_latest_rate_not_after_date():
+    repo = _repo(
+        _rate("USD", "EUR", date(2024, 1, 1), "0.90"),
+        _rate("USD", "EUR", date(2024, 1, 10), "0.92"),
+        _rate("USD", "RUB", date(2024, 1, 5), "90"),
+    )
+    cache = ExchangeRateCache(ttl_seconds=3600)
+
+    async def rate(from_currency, to_currency, day):
+        row = await cache.get(repo, from_currency, to_currency, day)
+        return row.rate if row else None
+
+    assert await rate("USD", "EUR", date(2024, 1, 1)) == Decimal("0.90")
+    assert await rate("usd", "eur", date(2024, 1, 9)) == Decimal("0.90")
+    assert await rate("USD", "EUR", date(2024, 1, 10)) == Decimal("0.92")
+    # Раньше всех курсов — последний известный (прежний fallback)
+    assert await rate("USD", "EUR", date(2023, 12, 1)) == Decimal("0.92")
+    assert await rate("GBP", "RUB", date(2024, 1, 5)) is None
+    assert repo.get_all_rates.await_count == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_reload_on_ttl_invalidate_and_newer_date():
+    clock = _Clock()
+    repo = _repo(_rate("USD", "EUR", date(2024, 1, 1), "0.90"))
+    cache = ExchangeRateCache(ttl_seconds=3600, clock=clock)
+
+    await cache.get(repo, "USD", "EUR", date(2024, 1, 1))
+    # Даты новее загруженных догружаются не чаще RELOAD_RETRY_SECONDS и
+    # только за дни после последнего загруженного
+    repo.rows.append(_rate("USD", "EUR", date(2024, 1, 2), "0.91"))
+    await cache.get(repo, "USD", "EUR", date(2024, 1, 2))
+    assert repo.get_all_rates.await_count == 1
+    clock.now = RELOAD_RETRY_SECONDS
+    rate = await cache.get(repo, "USD", "EUR", date(2024, 1, 2))
+    assert rate.rate == Decimal("0.91")
+    assert repo.get_all_rates.await_args.kwargs == {"after": date(2024, 1, 1)}
+    assert repo.get_all_rates.await_count == 2
+    assert (await cache.get(repo, "USD", "EUR", date(2024, 1, 1))).rate == Decimal(
+        "0.90"
+    )
+
+    await cache.get(repo, "USD", "EUR", date(2024, 1, 1))
+    assert repo.get_all_rates.await_count == 2
+    clock.now += 3600
+    await cache.get(repo, "USD", "EUR", date(2024, 1, 1))
+    assert repo.get_all_rates.await_count == 3
+
+    cache.invalidate()
+    await cache.get(repo, "USD", "EUR", date(2024, 1, 1))
+    assert repo.get_all_rates.await_count == 4
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_inverse_and_cross_rates_derived_from_base_pairs():
+    repo = _repo(
+        _rate("USD", "EUR", date(2024, 1, 1), "0.8"),
+        _rate("USD", "EUR", date(2024, 1, 10), "0.9"),
+        _rate("USD", "RUB", date(2024, 1, 5), "90"),
+        _rate("EUR", "GBP", date(2024, 1, 1), "0.85"),
+    )
+    cache = ExchangeRateCache(ttl_seconds=3600)
+
+    inverse = await cache.get(repo, "EUR", "USD", date(2024, 1, 10))
+    assert (inverse.rate, inverse.id) == (Decimal("1.1111111111"), None)
+
+    cross = await cache.get(repo, "eur", "rub", date(2024, 1, 7))
+    assert (cross.from_currency, cross.to_currency) == ("EUR", "RUB")
+    assert (cross.rate, cross.date) == (Decimal("112.5"), date(2024, 1, 1))
+    cross = await cache.get(repo, "RUB", "EUR", date(2024, 1, 12))
+    assert (cross.rate, cross.date) == (Decimal("0.01"), date(2024, 1, 5))
+
+    # Хранимая пара приоритетнее выведенной; без общей базы курса нет
+    direct = await cache.get(repo, "EUR", "GBP", date(2024, 1, 1))
+    assert direct.rate == Decimal("0.85")
+    assert await cache.get(repo, "GBP", "RUB", date(2024, 1, 5)) is None
+    assert repo.get_all_rates.await_count == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_version_change_reloads_other_processes():
+    """Запись курсов в одном процессе перечитывает таблицу в остальных."""
+    clock, version = _Clock(), _Version()
+    repo = _repo(_rate("USD", "EUR", date(2024, 1, 1), "0.90"))
+    writer = ExchangeRateCache(ttl_seconds=3600, clock=clock, version=version)
+    reader = ExchangeRateCache(ttl_seconds=3600, clock=clock, version=version)
+    await reader.get(repo, "USD", "EUR", date(2024, 1, 1))
+
+    # С версией дата новее загруженных не ходит в БД
+    clock.now = RELOAD_RETRY_SECONDS
+    await reader.get(repo, "USD", "EUR", date(2024, 6, 1))
+    assert repo.get_all_rates.await_count == 1
+
+    # Курс дня перезаписан (upsert) — догрузка новых дней его не увидит
+    repo.rows = [_rate("USD", "EUR", date(2024, 1, 1), "0.95")]
+    await writer.notify_changed()
+    # Версия сверяется не чаще VERSION_CHECK_SECONDS
+    await reader.get(repo, "USD", "EUR", date(2024, 1, 1))
+    assert repo.get_all_rates.await_count == 1
+    clock.now += VERSION_CHECK_SECONDS
+    rate = await reader.get(repo, "USD", "EUR", date(2024, 1, 1))
+    assert rate.rate == Decimal("0.95")
+    assert repo.get_all_rates.await_args.kwargs == {}
+    assert repo.get_all_rates.await_count == 2
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_unavailable_version_falls_back_to_loading_new_days():
+    clock, version = _Clock(), _Version()
+    repo = _repo(_rate("USD", "EUR", date(2024, 1, 1), "0.90"))
+    cache = ExchangeRateCache(ttl_seconds=3600, clock=clock, version=version)
+    await cache.get(repo, "USD", "EUR", date(2024, 1, 1))
+
+    version.down = True
+    await cache.notify_changed()
+    repo.rows.append(_rate("USD", "EUR", date(2024, 1, 2), "0.91"))
+    clock.now = RELOAD_RETRY_SECONDS
+    rate = await cache.get(repo, "USD", "EUR", date(2024, 1, 2))
+    assert rate.rate == Decimal("0.91")
+    assert repo.get_all_rates.await_count == 2
+
+    # После сбоя Redis версия неизвестна — догружаются только новые дни
+    repo.rows.append(_rate("USD", "EUR", date(2024, 1, 3), "0.92"))
+    clock.now += RELOAD_RETRY_SECONDS
+    rate = await cache.get(repo, "USD", "EUR", date(2024, 1, 3))
+    assert rate.rate == Decimal("0.92")
+    assert repo.get_all_rates.await_args.kwargs == {"after": date(2024, 1, 2)}
@@ -0,0 +1,86 @@
+"""Unit-тесты хранилища файлов фонового экспорта (Range, очистка, запись)."""
+
+import gzip
+import os
+import time
+from datetime import timedelta
+
+import pytest
+
+from app.schemas.csv_import import ExportCompression
+from app.services.export_artifacts import (
+    RangeNotSatisfiable,
+    cleanup_expired_artifacts,
+    parse_range,
+    write_artifact,
+)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("bytes=0-99", (0, 99)),
+        ("bytes=100-", (100, 999)),
+        ("bytes=-100", (900, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=10-5000", (10, 999)),
+        ("bytes=5-1", None),
+        ("bytes=0-1,5-9", None),
+        ("items=0-1", None),
+        ("bytes=abc", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+def test_parse_range_outside_file():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=1000-", 1000)
+
+
+def test_cleanup_removes_only_expired_files(tmp_path):
+    old = tmp_path / "old.csv.gz"
+    fresh = tmp_path / "fresh.csv.gz"
+    stale_part = tmp_path / "broken.csv.gz.part"
+    for path in (old, fresh, stale_part):
+        path.write_bytes(b"x")
+    past = time.time() - 2 * 3600
+    os.utime(old, (past, past))
+    os.utime(stale_part, (past, past))
+
+    removed = cleanup_expired_artifacts(timedelta(hours=1), directory=tmp_path)
+    assert removed == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["fresh.csv.gz"]
+
+
+def test_cleanup_missing_directory(tmp_path):
+    assert cleanup_expired_artifacts(timedelta(hours=1), tmp_path / "none") == 0
+
+
+@pytest.mark.asyncio
+async def test_write_artifact_gzip_and_no_partial_file_on_error(tmp_path):
+    async def chunks():
+        yield b"amount\n1\n"
+        yield b"2\n"
+
+    path = tmp_path / "t.csv.gz"
+    seen = []
+
+    async def on_chunk(chunk: bytes) -> None:
+        seen.append(chunk)
+
+    await write_artifact(chunks(), path, ExportCompression.GZIP, on_chunk)
+    assert seen == [b"amount\n1\n", b"2\n"]
+    assert gzip.decompress(path.read_bytes()) == b"amount\n1\n2\n"
+
+    async def failing():
+        yield b"amount\n"
+        raise RuntimeError("db gone")
+
+    broken = tmp_path / "broken.csv.gz"
+    with pytest.raises(RuntimeError):
+        await write_artifact(failing(), broken, ExportCompression.GZIP)
+    assert not broken.exists()
+    assert not (tmp_path / "broken.csv.gz.part").exists()
@@ -0,0 +1,50 @@
+"""
+Unit-тесты правил расписаний повторяющихся транзакций.
+"""
+
+from datetime import date
+
+import pytest
+
+from app.core.recurrence import ScheduleRule, compile_rule
+
+
+@pytest.mark.unit
+def test_month_end_anchor_clamps_and_stays_clamped():
+    """Шаблон с 31-го числа: 29.02 в високосный год, дальше — 29-е."""
+    rule = compile_rule("monthly", 1, date(2024, 1, 31))
+    assert rule.between(date(2024, 1, 1), date(2024, 5, 31)) == [
+        date(2024, 1, 31),
+        date(2024, 2, 29),
+        date(2024, 3, 29),
+        date(2024, 4, 29),
+        date(2024, 5, 29),
+    ]
+    assert rule.next_after(date(2024, 3, 29)) == date(2024, 4, 29)
+    assert rule.occurrence(24) == date(2026, 1, 28)
+
+
+@pytest.mark.unit
+def test_leap_day_yearly_and_day_steps():
+    yearly = compile_rule("yearly", 1, date(2024, 2, 29))
+    assert yearly.next_after(date(2024, 2, 29)) == date(2025, 2, 28)
+    assert yearly.next_after(date(2027, 3, 1)) == date(2028, 2, 28)
+
+    weekly = compile_rule("weekly", 2, date(2024, 1, 1))
+    assert weekly.next_after(date(2023, 6, 1)) == date(2024, 1, 1)
+    assert weekly.next_after(date(2024, 1, 14)) == date(2024, 1, 15)
+    assert weekly.between(date(2024, 1, 2), date(2024, 1, 29)) == [
+        date(2024, 1, 15),
+        date(2024, 1, 29),
+    ]
+
+
+@pytest.mark.unit
+def test_rules_are_compiled_once_and_validated():
+    anchor = date(2024, 1, 15)
+    assert compile_rule("monthly", 3, anchor) is compile_rule("monthly", 3, anchor)
+    assert compile_rule("monthly", 3, anchor) is not compile_rule("monthly", 2, anchor)
+    with pytest.raises(ValueError):
+        ScheduleRule("hourly", 1, anchor)
+    with pytest.raises(ValueError):
+        ScheduleRule("daily", 0, anchor)
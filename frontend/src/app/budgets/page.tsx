@@ -49,14 +49,13 @@ function BudgetsPageContent() {
     const loadProgress = async () => {
       const progress: Record<string, number> = {};
 
-      for (const budget of budgets) {
-        try {
-          const data = await budgetApi.getProgress(budget.id);
-          progress[budget.id] = data.spent || 0;
-        } catch {
-          // В случае ошибки показываем 0
-          progress[budget.id] = 0;
+      try {
+        const items = await budgetApi.getAllProgress();
+        for (const item of items) {
+          progress[item.budget.id] = Number(item.spent) || 0;
         }
+      } catch {
+        // В случае ошибки показываем 0 для всех бюджетов
       }
 
       setBudgetProgress(progress);
@@ -69,4 +69,13 @@ export const budgetApi = {
     const response = await apiClient.get<{ spent: number }>(`/budgets/${id}/progress`);
     return response.data;
   },
+
+  /**
+   * Получить прогресс всех бюджетов одним запросом
+   */
+  async getAllProgress(): Promise<{ budget: { id: string }; spent: number }[]> {
+    const response =
+      await apiClient.get<{ budget: { id: string }; spent: number }[]>("/budgets/progress");
+    return response.data;
+  },
 };
@@ -1,5 +1,10 @@
 import { apiClient } from "./client";
-import type { Currency, ExchangeRate } from "@/types/api";
+import type {
+  ConversionItem,
+  ConversionResponse,
+  Currency,
+  ExchangeRate,
+} from "@/types/api";
 
 export const currenciesApi = {
   async getAll(): Promise<Currency[]> {
@@ -21,4 +26,12 @@ export const currenciesApi = {
     });
     return res.data;
   },
+
+  /** Пакетная конвертация: результаты в порядке items, без курса — error */
+  async convert(items: ConversionItem[]): Promise<ConversionResponse> {
+    const res = await apiClient.post<ConversionResponse>("/currencies/convert", {
+      items,
+    });
+    return res.data;
+  },
 };
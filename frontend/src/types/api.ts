@@ -186,12 +186,32 @@ export interface Currency {
 }
 
 export interface ExchangeRate {
-  id: string;
+  /** null у выведенных (обратных и кросс) курсов */
+  id: string | null;
   fromCurrency: string;
   toCurrency: string;
   rate: number;
   date: string;
-  createdAt: string;
+  createdAt: string | null;
+}
+
+export interface ConversionItem {
+  amount: number;
+  fromCurrency: string;
+  toCurrency: string;
+  date: string;
+}
+
+export interface ConversionResult extends ConversionItem {
+  rate: number | null;
+  rateDate: string | null;
+  converted: number | null;
+  error: string | null;
+}
+
+export interface ConversionResponse {
+  results: ConversionResult[];
+  errorCount: number;
 }
 
 // Task status